@@ -1,15 +1,173 @@
+// Cards renderizados por vez; os seguintes entram ao rolar a página
+const CARD_BATCH = 48;
+
+// Shards de conteúdo já solicitados (nome -> Promise do objeto id -> conteúdo)
+const shardRequests = new Map();
+// Conteúdo dos prompts já carregados (id -> texto)
+const loadedContent = new Map();
+
+function loadShard(basePath, name) {
+    if (!shardRequests.has(name)) {
+        const request = fetch(`${basePath}/assets/data/content/${name}.json`)
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`HTTP error! status: ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(contents => {
+                Object.entries(contents).forEach(([id, content]) => loadedContent.set(id, content));
+                return contents;
+            })
+            .catch(error => {
+                // Permite nova tentativa na próxima vez que o card aparecer
+                shardRequests.delete(name);
+                throw error;
+            });
+        shardRequests.set(name, request);
+    }
+    return shardRequests.get(name);
+}
+
+async function loadContent(basePath, prompt) {
+    if (!loadedContent.has(prompt.id)) {
+        await loadShard(basePath, prompt.shard);
+    }
+    return loadedContent.get(prompt.id) || '';
+}
+
+function escapeHtml(text) {
+    return String(text).replace(/[&<>"']/g, char => ({
+        '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+    })[char]);
+}
+
+// Busca com o índice gerado por generate_gallery.py (scripts/text_index.py)
+const BM25_K1 = 1.2;
+const BM25_B = 0.75;
+// Limite de termos expandidos pelo prefixo da última palavra digitada
+const PREFIX_EXPANSIONS = 64;
+
+function foldText(text) {
+    return text.normalize('NFKD').replace(/[\u0300-\u036f]/g, '').toLowerCase();
+}
+
+async function loadSearchIndex(basePath) {
+    const response = await fetch(`${basePath}/assets/data/search-index.json`);
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+    const index = await response.json();
+    index.stopwords = new Set(index.stopwords);
+    index.decoded = new Map();
+    return index;
+}
+
+function queryTerms(index, query) {
+    return (foldText(query).match(/[a-z0-9]+/g) || [])
+        .filter(term => term.length > 1 && !index.stopwords.has(term));
+}
+
+// Posição do primeiro termo >= term na lista ordenada de termos
+function lowerBound(terms, term) {
+    let low = 0;
+    let high = terms.length;
+    while (low < high) {
+        const middle = (low + high) >> 1;
+        if (terms[middle] < term) {
+            low = middle + 1;
+        } else {
+            high = middle;
+        }
+    }
+    return low;
+}
+
+function postingsAt(index, position) {
+    if (!index.decoded.has(position)) {
+        const [deltas, frequencies] = index.postings[position];
+        const numbers = new Array(deltas.length);
+        let current = 0;
+        for (let i = 0; i < deltas.length; i++) {
+            current += deltas[i];
+            numbers[i] = current;
+        }
+        index.decoded.set(position, { numbers, frequencies });
+    }
+    return index.decoded.get(position);
+}
+
+// Pontuação BM25 de cada documento que contém um dos termos nas posições dadas
+function scoreTerms(index, positions) {
+    const scores = new Map();
+    positions.forEach(position => {
+        const { numbers, frequencies } = postingsAt(index, position);
+        const idf = Math.log(1 + (index.documents - numbers.length + 0.5) / (numbers.length + 0.5));
+        for (let i = 0; i < numbers.length; i++) {
+            const tf = frequencies[i];
+            const norm = 1 - BM25_B + BM25_B * index.lengths[numbers[i]] / index.average_length;
+            const score = idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm);
+            // Entre termos expandidos do mesmo prefixo vale o melhor
+            scores.set(numbers[i], Math.max(scores.get(numbers[i]) || 0, score));
+        }
+    });
+    return scores;
+}
+
+// Números dos documentos que contêm todos os termos da consulta, do mais relevante ao menos
+function searchPrompts(index, query) {
+    const terms = queryTerms(index, query);
+    if (!terms.length) {
+        return [];
+    }
+    // A última palavra ainda pode estar sendo digitada: vale como prefixo
+    const prefixLast = !/\s$/.test(query);
+    let totals = null;
+    for (let t = 0; t < terms.length; t++) {
+        const term = terms[t];
+        const positions = [];
+        let position = lowerBound(index.terms, term);
+        if (prefixLast && t === terms.length - 1) {
+            while (position < index.terms.length && index.terms[position].startsWith(term) && positions.length < PREFIX_EXPANSIONS) {
+                positions.push(position++);
+            }
+        } else if (index.terms[position] === term) {
+            positions.push(position);
+        }
+        const scores = scoreTerms(index, positions);
+        if (totals === null) {
+            totals = scores;
+        } else {
+            const merged = new Map();
+            totals.forEach((score, number) => {
+                if (scores.has(number)) {
+                    merged.set(number, score + scores.get(number));
+                }
+            });
+            totals = merged;
+        }
+        if (!totals.size) {
+            return [];
+        }
+    }
+    return Array.from(totals.entries())
+        .sort((a, b) => b[1] - a[1] || a[0] - b[0])
+        .map(([number]) => number);
+}
+
 document.addEventListener('DOMContentLoaded', async function() {
     try {
         // Determinar o caminho base
         const basePath = window.location.pathname.includes('/prompts/') ? '/prompts' : '';
         
-        // Carregar dados da galeria
-        const response = await fetch(`${basePath}/assets/data/gallery.json`);
+        // Carregar apenas o índice de metadados; o conteúdo vem dos shards sob demanda
+        const response = await fetch(`${basePath}/assets/data/gallery-index.json`);
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
         const galleryData = await response.json();
-        console.log('Gallery data loaded:', galleryData);
+        const promptsById = new Map(galleryData.prompts.map(prompt => [prompt.id, prompt]));
+        console.log(`Gallery index loaded: ${galleryData.prompts.length} prompts`);
         
         // Adicionar filtros dinamicamente
         const filterContainer = document.getElementById('categoryFilters');
@@ -34,37 +192,111 @@ document.addEventListener('DOMContentLoaded', async function() {
         }
         
         function createCard(prompt) {
+            const content = loadedContent.get(prompt.id);
             return `
-                <div class="prompt-card" data-category="${prompt.category.toLowerCase()}" data-model="${prompt.model}">
+                <div class="prompt-card" data-id="${escapeHtml(prompt.id)}" data-category="${escapeHtml(prompt.category.toLowerCase())}" data-model="${escapeHtml(prompt.model)}">
                     <div class="prompt-header">
                         <div class="prompt-meta">
-                            <span class="prompt-category">${prompt.category}</span>
-                            <span class="prompt-model">${prompt.model}</span>
+                            <span class="prompt-category">${escapeHtml(prompt.category)}</span>
+                            <span class="prompt-model">${escapeHtml(prompt.model)}</span>
                         </div>
-                        <h3 class="prompt-title">${prompt.title}</h3>
-                        <p class="prompt-description">${prompt.description}</p>
+                        <h3 class="prompt-title">${escapeHtml(prompt.title)}</h3>
+                        <p class="prompt-description">${escapeHtml(prompt.description)}</p>
                         <div class="prompt-tags">
-                            ${prompt.tags.map(tag => `<span class="prompt-tag">${tag}</span>`).join('')}
+                            ${prompt.tags.map(tag => `<span class="prompt-tag">${escapeHtml(tag)}</span>`).join('')}
                         </div>
                     </div>
                     <div class="prompt-content">
-                        <pre class="prompt-text">${prompt.content}</pre>
+                        <pre class="prompt-text${content === undefined ? ' loading' : ''}">${content === undefined ? 'Carregando...' : escapeHtml(content)}</pre>
                         <button class="copy-button" title="Copiar prompt">
                             <span class="material-icons">content_copy</span>
                         </button>
                     </div>
                     <div class="prompt-footer">
-                        <span class="prompt-version">v${prompt.version}</span>
-                        <span class="prompt-date">${prompt.date}</span>
+                        <span class="prompt-version">v${escapeHtml(prompt.version)}</span>
+                        <span class="prompt-date">${escapeHtml(prompt.date)}</span>
                     </div>
                 </div>
             `;
         }
 
+        // Preenche o conteúdo dos cards quando eles se aproximam da área visível
+        const contentObserver = 'IntersectionObserver' in window
+            ? new IntersectionObserver(entries => {
+                entries.forEach(entry => {
+                    if (entry.isIntersecting) {
+                        contentObserver.unobserve(entry.target);
+                        fillContent(entry.target);
+                    }
+                });
+            }, { rootMargin: '400px' })
+            : null;
+
+        async function fillContent(card) {
+            const prompt = promptsById.get(card.dataset.id);
+            const pre = card.querySelector('.prompt-text');
+            if (!prompt || !pre.classList.contains('loading')) {
+                return;
+            }
+            try {
+                pre.textContent = await loadContent(basePath, prompt);
+                pre.classList.remove('loading');
+            } catch (error) {
+                console.error('Erro ao carregar conteúdo do prompt:', error);
+                pre.textContent = 'Erro ao carregar o conteúdo.';
+                if (contentObserver) {
+                    contentObserver.observe(card);
+                }
+            }
+        }
+
+        let visiblePrompts = [];
+        let rendered = 0;
+        const sentinel = document.createElement('div');
+        sentinel.className = 'gallery-sentinel';
+        const batchObserver = 'IntersectionObserver' in window
+            ? new IntersectionObserver(entries => {
+                if (entries.some(entry => entry.isIntersecting)) {
+                    renderNextBatch();
+                }
+            }, { rootMargin: '800px' })
+            : null;
+
+        function renderNextBatch() {
+            const batch = visiblePrompts.slice(rendered, rendered + CARD_BATCH);
+            rendered += batch.length;
+            sentinel.remove();
+            gallery.insertAdjacentHTML('beforeend', batch.map(createCard).join(''));
+            const cards = gallery.querySelectorAll('.prompt-card');
+            for (let i = cards.length - batch.length; i < cards.length; i++) {
+                if (contentObserver) {
+                    contentObserver.observe(cards[i]);
+                } else {
+                    fillContent(cards[i]);
+                }
+            }
+            if (rendered < visiblePrompts.length) {
+                gallery.after(sentinel);
+                if (!batchObserver) {
+                    renderNextBatch();
+                }
+            }
+        }
+
         function renderCards(prompts) {
-            gallery.innerHTML = prompts.map(createCard).join('');
-            setupCopyButtons();
+            if (contentObserver) {
+                contentObserver.disconnect();
+            }
+            visiblePrompts = prompts;
+            rendered = 0;
+            gallery.innerHTML = '';
+            renderNextBatch();
+        }
+
+        if (batchObserver) {
+            batchObserver.observe(sentinel);
         }
+        setupCopyButtons(gallery, id => loadContent(basePath, promptsById.get(id)));
 
         // Renderizar cards iniciais
         renderCards(galleryData.prompts);
@@ -88,24 +320,33 @@ document.addEventListener('DOMContentLoaded', async function() {
             });
         });
 
-        // Configurar busca
+        // Configurar busca: o índice invertido só é baixado na primeira consulta
         const searchInput = document.querySelector('.prompt-search');
         if (searchInput) {
-            searchInput.addEventListener('input', (e) => {
-                const searchTerm = e.target.value.toLowerCase();
-                const filteredPrompts = galleryData.prompts.filter(prompt => {
-                    const activeFilter = document.querySelector('.filter-btn.active')?.getAttribute('data-filter');
-                    const matchesCategory = !activeFilter || activeFilter === 'all' || prompt.category.toLowerCase() === activeFilter;
-                    
-                    return matchesCategory && (
-                        prompt.title.toLowerCase().includes(searchTerm) ||
-                        prompt.description.toLowerCase().includes(searchTerm) ||
-                        prompt.tags.some(tag => tag.toLowerCase().includes(searchTerm)) ||
-                        prompt.content.toLowerCase().includes(searchTerm)
-                    );
-                });
+            let searchIndex = null;
+            let searchSequence = 0;
+            searchInput.addEventListener('input', async (e) => {
+                const query = e.target.value;
+                const sequence = ++searchSequence;
+                const activeFilter = document.querySelector('.filter-btn.active')?.getAttribute('data-filter');
+                const matchesCategory = prompt => !activeFilter || activeFilter === 'all' || prompt.category.toLowerCase() === activeFilter;
                 
-                renderCards(filteredPrompts);
+                if (!query.trim()) {
+                    renderCards(galleryData.prompts.filter(matchesCategory));
+                    return;
+                }
+                try {
+                    searchIndex = searchIndex || loadSearchIndex(basePath);
+                    const ranked = searchPrompts(await searchIndex, query);
+                    // Uma consulta mais recente já foi respondida
+                    if (sequence !== searchSequence) {
+                        return;
+                    }
+                    renderCards(ranked.map(number => galleryData.prompts[number]).filter(matchesCategory));
+                } catch (error) {
+                    searchIndex = null;
+                    console.error('Erro ao carregar o índice de busca:', error);
+                }
             });
         }
 
@@ -121,31 +362,33 @@ document.addEventListener('DOMContentLoaded', async function() {
     }
 });
 
-// Função para copiar o conteúdo do prompt
-function setupCopyButtons() {
-    document.querySelectorAll('.copy-button').forEach(button => {
-        button.addEventListener('click', async () => {
-            const card = button.closest('.prompt-card');
-            const promptText = card.querySelector('.prompt-text').textContent;
+// Função para copiar o conteúdo do prompt, carregando o shard se ainda não chegou
+function setupCopyButtons(gallery, getContent) {
+    gallery.addEventListener('click', async (event) => {
+        const button = event.target.closest('.copy-button');
+        if (!button) {
+            return;
+        }
+        const card = button.closest('.prompt-card');
+        
+        try {
+            const promptText = await getContent(card.dataset.id);
+            await navigator.clipboard.writeText(promptText);
+            const icon = button.querySelector('.material-icons');
+            const originalText = icon.textContent;
             
-            try {
-                await navigator.clipboard.writeText(promptText);
-                const icon = button.querySelector('.material-icons');
-                const originalText = icon.textContent;
-                
-                // Feedback visual
-                button.classList.add('copied');
-                icon.textContent = 'check';
-                
-                // Reverter após 2 segundos
-                setTimeout(() => {
-                    button.classList.remove('copied');
-                    icon.textContent = originalText;
-                }, 2000);
-            } catch (err) {
-                console.error('Erro ao copiar:', err);
-            }
-        });
+            // Feedback visual
+            button.classList.add('copied');
+            icon.textContent = 'check';
+            
+            // Reverter após 2 segundos
+            setTimeout(() => {
+                button.classList.remove('copied');
+                icon.textContent = originalText;
+            }, 2000);
+        } catch (err) {
+            console.error('Erro ao copiar:', err);
+        }
     });
 }
 
@@ -191,68 +434,6 @@ function expandCard(card) {
     };
 }
 
-// Estado dos filtros
-let activeFilters = new Set();
-let searchQuery = '';
-
-// Função para filtrar cards
-function filterCards() {
-    const cards = document.querySelectorAll('.prompt-card');
-    const query = searchQuery.toLowerCase();
-
-    cards.forEach(card => {
-        const title = card.querySelector('.prompt-title').textContent.toLowerCase();
-        const description = card.querySelector('.prompt-description').textContent.toLowerCase();
-        const content = card.querySelector('.prompt-text').textContent.toLowerCase();
-        const tags = Array.from(card.querySelectorAll('.prompt-tag')).map(tag => tag.textContent.toLowerCase());
-        
-        const matchesSearch = query === '' || 
-            title.includes(query) || 
-            description.includes(query) || 
-            content.includes(query);
-
-        const matchesFilters = activeFilters.size === 0 || 
-            tags.some(tag => activeFilters.has(tag));
-
-        card.style.display = (matchesSearch && matchesFilters) ? 'flex' : 'none';
-    });
-}
-
-// Configurar busca
-const searchInput = document.querySelector('.prompt-search');
-if (searchInput) {
-    searchInput.addEventListener('input', (e) => {
-        searchQuery = e.target.value;
-        filterCards();
-    });
-}
-
-// Configurar filtros de tag
-const filterButtons = document.querySelectorAll('.filter-btn');
-filterButtons.forEach(button => {
-    button.addEventListener('click', () => {
-        const filter = button.dataset.filter;
-        
-        if (filter === 'all') {
-            activeFilters.clear();
-            filterButtons.forEach(btn => btn.classList.remove('active'));
-            button.classList.add('active');
-        } else {
-            const isActive = button.classList.contains('active');
-            if (isActive) {
-                activeFilters.delete(filter);
-                button.classList.remove('active');
-            } else {
-                activeFilters.add(filter);
-                button.classList.add('active');
-            }
-            document.querySelector('[data-filter="all"]').classList.remove('active');
-        }
-        
-        filterCards();
-    });
-});
-
 // Adicionar event listeners aos botões de copiar
 document.querySelectorAll('.copy-button').forEach(button => {
     button.onclick = () => {
@@ -4,19 +4,19 @@
 import os
 import sys
 from pathlib import Path
-import frontmatter
 from collections import defaultdict
-from typing import Dict, Set, List
+from typing import Dict, Set, List, Optional
 import json
+from prompt_corpus import PromptCorpus, load_corpus
 
-def find_prompt_files() -> List[Path]:
-    """Find all prompt markdown files in the prompts directory."""
+def load_prompt_files() -> PromptCorpus:
+    """Load all prompt markdown files in the prompts directory."""
     prompts_dir = Path('prompts')
     if not prompts_dir.exists():
         print(f"Error: Directory {prompts_dir} does not exist")
         sys.exit(1)
     
-    return list(prompts_dir.glob('**/*.md'))
+    return load_corpus(str(prompts_dir))
 
 def get_directory_structure() -> List[str]:
     """Get all directories and subdirectories in prompts folder."""
@@ -30,32 +30,33 @@ def get_directory_structure() -> List[str]:
     
     return sorted(directories)
 
-def analyze_prompts() -> Dict:
-    """Analyze all prompts and extract metadata."""
-    files = find_prompt_files()
+def analyze_prompts(corpus: Optional[PromptCorpus] = None) -> Dict:
+    """Analyze all prompts, or an already loaded corpus, and extract metadata."""
+    if corpus is None:
+        corpus = load_prompt_files()
     
     # Initialize data structures
     models = set()
     prompt_types = set()
     tags = set()
     
+    for file_path, error in corpus.errors.items():
+        print(f"Error processing {file_path}: {error}")
+    
     # Process each file
-    for file_path in files:
+    for post in corpus:
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                post = frontmatter.load(f)
-                
-                # Extract metadata if available
-                if post.metadata:
-                    if 'model' in post.metadata:
-                        models.add(post.metadata['model'])
-                    if 'prompt_type' in post.metadata:
-                        prompt_types.add(post.metadata['prompt_type'])
-                    if 'tags' in post.metadata and isinstance(post.metadata['tags'], list):
-                        tags.update(post.metadata['tags'])
+            # Extract metadata if available
+            if post.metadata:
+                if 'model' in post.metadata:
+                    models.add(post.metadata['model'])
+                if 'prompt_type' in post.metadata:
+                    prompt_types.add(post.metadata['prompt_type'])
+                if 'tags' in post.metadata and isinstance(post.metadata['tags'], list):
+                    tags.update(post.metadata['tags'])
         
         except Exception as e:
-            print(f"Error processing {file_path}: {e}")
+            print(f"Error processing {post.path}: {e}")
             continue
     
     # Prepare final report
@@ -83,9 +84,14 @@ def save_report(report: Dict, output_file: str = "prompt_analysis.json"):
             f"{len(report.get('tags', []))} tags\n"
         )
 
+def run(corpus: Optional[PromptCorpus] = None, output_file: str = "prompt_analysis.json") -> int:
+    """Analyze the prompts and save the report; returns the exit code."""
+    report = analyze_prompts(corpus)
+    save_report(report, output_file)
+    return 0
+
 def main():
-    report = analyze_prompts()
-    save_report(report)
+    run()
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
@@ -2,59 +2,103 @@
 # -*- coding: utf-8 -*-
 
 import numpy as np
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
 from pathlib import Path
-from typing import Dict, List, Any
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from typing import Dict, List, Any, Optional
 import json
 from datetime import datetime
-import jinja2
+from embedding_store import EmbeddingStore, text_key
+from neighbour_index import NeighbourIndex
+from token_counter import TokenCounter
+from instrumentation import span
+
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
 
 class PromptAnalyzer:
-    def __init__(self):
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
+    def __init__(self, batch_size: int = 64, store: Optional[EmbeddingStore] = None):
+        self._model = None
         self.embeddings_cache = {}
+        self.batch_size = batch_size
+        self.store = store
+        self.token_counter = TokenCounter()
+    
+    @property
+    def model(self):
+        """The sentence-transformers model, loaded the first time something is encoded."""
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            with span('embedding', 'model-load'):
+                self._model = SentenceTransformer(EMBEDDING_MODEL)
+        return self._model
+        
+    def encode_prompts(self, prompts: List[str]) -> np.ndarray:
+        """
+        Encode prompts in batches into unit-length float32 rows.
+        With a store attached, only prompts whose content hash is not stored yet are encoded.
+        """
+        missing = list(dict.fromkeys(p for p in prompts if p not in self.embeddings_cache))
+        if missing and self.store is not None:
+            with span('io', 'embedding-store-read', prompts=len(missing)):
+                keys = [text_key(p) for p in missing]
+                positions, _ = self.store.lookup(keys)
+                stored = positions >= 0
+                vectors = np.asarray(self.store.matrix[positions[stored]], dtype=np.float32) if stored.any() else None
+            if vectors is not None:
+                for prompt, vector in zip((p for p, hit in zip(missing, stored) if hit), vectors):
+                    self.embeddings_cache[prompt] = vector
+            missing = [p for p, hit in zip(missing, stored) if not hit]
+        if missing:
+            with span('embedding', 'encode', prompts=len(missing)):
+                vectors = self.model.encode(missing, batch_size=self.batch_size,
+                                            convert_to_numpy=True, normalize_embeddings=True)
+            for prompt, vector in zip(missing, vectors):
+                self.embeddings_cache[prompt] = vector.astype(np.float32)
+            if self.store is not None:
+                with span('io', 'embedding-store-write', prompts=len(missing)):
+                    self.store.add([text_key(p) for p in missing], vectors)
+        if not prompts:
+            return np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32)
+        return np.vstack([self.embeddings_cache[p] for p in prompts])
+    
+    def neighbour_index(self, ids: List[str], prompts: List[str], **options) -> NeighbourIndex:
+        """Build a nearest-neighbour index over prompts, referenced by ids."""
+        return NeighbourIndex(ids, self.encode_prompts(prompts), **options)
         
     def compute_semantic_similarity(self, prompt1: str, prompt2: str) -> float:
         """Compute semantic similarity between two prompts."""
-        if prompt1 not in self.embeddings_cache:
-            self.embeddings_cache[prompt1] = self.model.encode([prompt1])[0]
-        if prompt2 not in self.embeddings_cache:
-            self.embeddings_cache[prompt2] = self.model.encode([prompt2])[0]
-            
-        similarity = cosine_similarity(
-            [self.embeddings_cache[prompt1]], 
-            [self.embeddings_cache[prompt2]]
-        )[0][0]
-        
-        return float(similarity)
+        embeddings = self.encode_prompts([prompt1, prompt2])
+        # Rows are unit length, so the dot product is the cosine similarity
+        return float(embeddings[0] @ embeddings[1])
     
-    def analyze_token_efficiency(self, prompt: str, response_tokens: int) -> Dict[str, float]:
-        """Analyze token efficiency metrics."""
-        prompt_tokens = len(prompt.split())
+    def analyze_token_efficiency(self, prompt: str, response_tokens: int, model=None) -> Dict[str, Any]:
+        """Analyze token efficiency metrics, counting prompt tokens with the model's tokenizer."""
+        prompt_tokens = self.token_counter.count(prompt, model)
+        tokenizer = self.token_counter.tokenizer(model)
         return {
             "token_ratio": response_tokens / prompt_tokens if prompt_tokens > 0 else 0,
             "prompt_tokens": prompt_tokens,
             "response_tokens": response_tokens,
-            "total_tokens": prompt_tokens + response_tokens
+            "total_tokens": prompt_tokens + response_tokens,
+            "tokenizer": tokenizer.name,
+            "estimated": tokenizer.estimated
         }
 
 class VisualizationGenerator:
     def __init__(self, output_dir: str = "benchmark_reports"):
         self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(exist_ok=True)
-        
-        # Load HTML template
-        template_path = Path(__file__).parent / "templates" / "report_template.html"
-        if not template_path.exists():
-            self._create_default_template()
-        
-        self.env = jinja2.Environment(
-            loader=jinja2.FileSystemLoader(template_path.parent)
-        )
+        self._env = None
+    
+    @property
+    def env(self):
+        """Jinja environment for the report template, created on first render."""
+        if self._env is None:
+            import jinja2
+            template_path = Path(__file__).parent / "templates" / "report_template.html"
+            if not template_path.exists():
+                self._create_default_template()
+            self._env = jinja2.Environment(
+                loader=jinja2.FileSystemLoader(template_path.parent)
+            )
+        return self._env
         
     def _create_default_template(self):
         template_dir = Path(__file__).parent / "templates"
@@ -119,6 +163,7 @@ class VisualizationGenerator:
     
     def generate_performance_charts(self, results: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Generate performance visualization charts."""
+        import plotly.graph_objects as go
         charts = []
         
         # Model Performance Comparison
@@ -166,39 +211,58 @@ class VisualizationGenerator:
         
         return charts
     
-    def generate_trend_charts(self, results: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Generate trend analysis charts."""
+    def generate_trend_charts(self, results: Dict[str, Any], history=None) -> List[Dict[str, Any]]:
+        """Score and latency trends over the runs recorded in a HistoryStore."""
         trends = []
+        if history is None or len(history.runs) < 2:
+            return trends
+        import html
+        import plotly.express as px
         
-        # Create a timeline of scores
-        timeline_data = []
-        for file_path, file_results in results["detailed_results"].items():
-            for criteria, criteria_results in file_results.items():
-                timeline_data.append({
-                    "file": file_path,
-                    "criteria": criteria,
-                    "score": criteria_results["score"]
-                })
-        
-        df = pd.DataFrame(timeline_data)
-        
-        # Score trends by criteria
-        fig = px.line(df, x=df.index, y="score", color="criteria",
-                     title="Score Trends by Criteria")
+        # Average score per criterion per run
+        scores = history.frame('scores')
+        by_run = scores.groupby(['timestamp', 'criterion'], observed=True)['score'].mean().reset_index()
+        fig = px.line(by_run, x="timestamp", y="score", color="criterion", markers=True,
+                      title="Average Score by Criteria over Runs")
         trends.append({
             "title": "Score Trends",
             "div": fig.to_html(full_html=False)
         })
         
+        # Average execution time per model per run
+        timings = history.frame('timings')
+        if len(timings):
+            by_run = timings.groupby(['timestamp', 'model'], observed=True)['execution_time'].mean().reset_index()
+            fig = px.line(by_run, x="timestamp", y="execution_time", color="model", markers=True,
+                          title="Average Execution Time by Model over Runs")
+            trends.append({
+                "title": "Latency Trends",
+                "div": fig.to_html(full_html=False)
+            })
+        
+        # Prompts that got worse in the latest run
+        rows = [(r['prompt'], r['criterion'], r['baseline'], r['latest']) for r in history.regressions('scores')]
+        rows += [(r['prompt'], f"{r['model']} time", r['baseline'], r['latest']) for r in history.regressions('timings')]
+        if rows:
+            table = "".join(
+                f"<tr><td>{html.escape(prompt)}</td><td>{html.escape(metric)}</td>"
+                f"<td>{baseline:.3f}</td><td>{latest:.3f}</td></tr>"
+                for prompt, metric, baseline, latest in rows
+            )
+            trends.append({
+                "title": "Regressions in the Latest Run",
+                "div": f"<table><tr><th>Prompt</th><th>Metric</th><th>Baseline</th><th>Latest</th></tr>{table}</table>"
+            })
+        
         return trends
     
-    def generate_html_report(self, results: Dict[str, Any], output_file: str) -> None:
+    def generate_html_report(self, results: Dict[str, Any], output_file: str, history=None) -> None:
         """Generate an HTML report with interactive visualizations."""
         template = self.env.get_template("report_template.html")
         
         # Generate charts
         charts = self.generate_performance_charts(results)
-        trends = self.generate_trend_charts(results)
+        trends = self.generate_trend_charts(results, history)
         
         # Prepare summary metrics
         summary_metrics = [
@@ -218,6 +282,7 @@ class VisualizationGenerator:
         )
         
         # Save report
+        self.output_dir.mkdir(exist_ok=True)
         report_path = self.output_dir / output_file
         with open(report_path, "w") as f:
             f.write(html_content)
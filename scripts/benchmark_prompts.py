@@ -4,17 +4,21 @@
 import os
 import sys
 from pathlib import Path
-import frontmatter
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import json
-from dataclasses import dataclass
+from dataclasses import dataclass, field, asdict
 from enum import Enum
 import yaml
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
-from benchmark_analysis import PromptAnalyzer, VisualizationGenerator
-import re
-import unicodedata
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+from prompt_corpus import PromptCorpus, PromptDocument, load_corpus, load_prompt
+from prompt_features import PromptFeatures
+from result_stream import ResultSink, ReportSummary, read_records, write_report
+from security_scanner import SecurityMatch, SecurityScanner, get_scanner, load_risk_patterns
+from instrumentation import Instrumentation, activate, active, lane, span
+from memory_profile import MemoryProfiler, memory_phase
 
 class ModelType(Enum):
     """Available LLM models for testing."""
@@ -65,6 +69,8 @@ class SecurityMetrics:
     risk_level: float
     identified_risks: List[SecurityRisk]
     sensitive_patterns: List[str]
+    matches: List[SecurityMatch] = field(default_factory=list)
+    risk_counts: Dict[str, int] = field(default_factory=dict)
 
 class EvaluationCriteria(Enum):
     STRUCTURE = "structure"
@@ -98,17 +104,126 @@ class BenchmarkResult:
     complexity_metrics: Optional[ComplexityMetrics] = None
     security_metrics: Optional[SecurityMetrics] = None
 
+# Criteria that have an evaluator, in the order benchmark_prompt runs them
+DEFAULT_CRITERIA = [
+    EvaluationCriteria.STRUCTURE,
+    EvaluationCriteria.CLARITY,
+    EvaluationCriteria.COMPLEXITY,
+    EvaluationCriteria.SECURITY,
+    EvaluationCriteria.I18N,
+    EvaluationCriteria.MODEL_PERFORMANCE,
+    EvaluationCriteria.SEMANTIC_SIMILARITY,
+    EvaluationCriteria.TOKEN_EFFICIENCY,
+]
+
+# Bump when an evaluator's output changes, so stored incremental results are recomputed
+EVALUATOR_VERSION = 2
+
+# Pure-CPU criteria that can be evaluated in worker processes
+STATIC_CRITERIA = [
+    EvaluationCriteria.STRUCTURE,
+    EvaluationCriteria.CLARITY,
+    EvaluationCriteria.COMPLEXITY,
+    EvaluationCriteria.SECURITY,
+    EvaluationCriteria.I18N,
+]
+
+def parse_criteria(value: str) -> List[EvaluationCriteria]:
+    """Parse a comma-separated --criteria value."""
+    criteria = []
+    for name in value.split(','):
+        name = name.strip().lower()
+        if not name:
+            continue
+        try:
+            criterion = EvaluationCriteria(name)
+        except ValueError:
+            raise argparse.ArgumentTypeError(
+                f"unknown criterion '{name}' (choose from {', '.join(c.value for c in DEFAULT_CRITERIA)})")
+        if criterion not in DEFAULT_CRITERIA:
+            raise argparse.ArgumentTypeError(f"criterion '{name}' has no evaluator")
+        criteria.append(criterion)
+    return criteria
+
 class PromptBenchmark:
-    def __init__(self, config_file: Optional[str] = None):
+    def __init__(self, config_file: Optional[str] = None, criteria: Optional[List[EvaluationCriteria]] = None,
+                 provider_url: Optional[str] = None, replay: bool = False, use_response_cache: bool = True):
         self.results: Dict[str, Dict[EvaluationCriteria, BenchmarkResult]] = {}
         self.config = self._load_config(config_file)
-        self.analyzer = PromptAnalyzer()
-        self.visualization = VisualizationGenerator()
+        self.criteria = set(criteria or DEFAULT_CRITERIA)
+        self.provider_url = provider_url
+        self.replay = replay
+        self.use_response_cache = use_response_cache
+        self._providers = None
+        self._analyzer = None
+        self._visualization = None
+        self._similarity_prompts: Optional[List[str]] = None
+        self._similarity = None
+        self._security_scanner: Optional[SecurityScanner] = None
+        self._result_store = None
+        self._reused: set = set()
+        self.sink: Optional[ResultSink] = None
+        self.history = None
+        # Paths still to be recorded, in report order, and results that finished ahead of them
+        self._expected: Optional[deque] = None
+        self._held: Dict[str, Optional[Dict[EvaluationCriteria, BenchmarkResult]]] = {}
+        self.memory_profiler: Optional[MemoryProfiler] = None
+    
+    @property
+    def analyzer(self):
+        """PromptAnalyzer, imported and built on first use; the embedding model loads later still."""
+        if self._analyzer is None:
+            from benchmark_analysis import EMBEDDING_MODEL, PromptAnalyzer
+            from embedding_store import EmbeddingStore
+            embeddings = self.config.get("embeddings", {})
+            store = None
+            if embeddings.get("persist", True):
+                store = EmbeddingStore(EMBEDDING_MODEL, embeddings.get("dtype", "float32"))
+            self._analyzer = PromptAnalyzer(store=store)
+        return self._analyzer
+    
+    @property
+    def visualization(self):
+        """VisualizationGenerator, imported only when an HTML report is requested."""
+        if self._visualization is None:
+            from benchmark_analysis import VisualizationGenerator
+            self._visualization = VisualizationGenerator()
+        return self._visualization
+    
+    @property
+    def security_scanner(self) -> SecurityScanner:
+        """Default risk patterns plus the config's security section, compiled once."""
+        if self._security_scanner is None:
+            patterns = load_risk_patterns(self.config)
+            for risk in patterns:
+                SecurityRisk(risk)  # unknown categories fail here rather than mid-run
+            self._security_scanner = get_scanner(patterns)
+        return self._security_scanner
+    
+    @property
+    def result_store(self):
+        """Per-prompt results of earlier runs with this config, for --incremental."""
+        if self._result_store is None:
+            from result_store import ResultStore, config_hash
+            self._result_store = ResultStore(config_hash(self.config, stub=bool(self.provider_url)),
+                                             EVALUATOR_VERSION)
+        return self._result_store
+    
+    def wants(self, criterion: EvaluationCriteria) -> bool:
+        """Whether a criterion was selected for this run."""
+        return criterion in self.criteria
         
     def _load_config(self, config_file: Optional[str]) -> Dict[str, Any]:
         if not config_file:
             return {
-                "models": ["gpt-3.5-turbo"],
+                "models": ["gpt-3.5-turbo-1106"],
+                "providers": {
+                    "openai": {
+                        "base_url": "https://api.openai.com/v1",
+                        "api_key_env": "OPENAI_API_KEY",
+                        "models": ["gpt-3.5-turbo-1106"]
+                    }
+                },
                 "test_cases": [],
                 "evaluation_criteria": {
                     "response_length": (50, 1000),
@@ -120,50 +235,78 @@ class PromptBenchmark:
         with open(config_file, 'r') as f:
             return yaml.safe_load(f)
     
+    @property
+    def providers(self):
+        """Provider pool for model calls, created inside the running event loop on first use."""
+        if self._providers is None:
+            from model_providers import ProviderPool
+            self._providers = ProviderPool.from_config(self.config, base_url=self.provider_url,
+                                                       replay=self.replay, use_cache=self.use_response_cache)
+        return self._providers
+    
+    async def close(self) -> None:
+        """Close pooled provider connections and the result store."""
+        if self._providers is not None:
+            await self._providers.close()
+        if self._result_store is not None:
+            self._result_store.close()
+        if self._analyzer is not None:
+            self._analyzer.token_counter.close()
+        if self.sink is not None:
+            self.sink.close()
+    
+    async def _test_model(self, model_name: str, content: str) -> ModelTestResult:
+        params = self.config.get("evaluation_criteria", {})
+        # Own trace track: a prompt's model calls run concurrently
+        with lane(), span('model', model_name):
+            response = await self.providers.chat(
+                model_name, content,
+                temperature=params.get("temperature", 0.7),
+                max_tokens=params.get("max_tokens", 500)
+            )
+        return ModelTestResult(
+            model=ModelType(model_name),
+            response=response.text,
+            execution_time=response.latency,
+            token_count=response.completion_tokens,
+            error_rate=(response.attempts - 1) / response.attempts
+        )
+    
     async def evaluate_model_performance(self, content: str, metadata: Dict[str, Any]) -> BenchmarkResult:
         score = 0.0
         feedback = []
         suggestions = []
         model_results = []
         
-        # Simulate model testing - replace with actual API calls
-        for model_name in self.config["models"]:
-            try:
-                # Simulated model call
-                import time
-                import random
-                
-                start_time = time.time()
-                time.sleep(0.5)  # Simulate API call
-                
-                model_result = ModelTestResult(
-                    model=ModelType(model_name),
-                    response="Simulated response",
-                    execution_time=time.time() - start_time,
-                    token_count=random.randint(100, 500),
-                    error_rate=random.random()
-                )
-                
-                model_results.append(model_result)
-                score += (1 - model_result.error_rate) * 0.5
-                
-                if model_result.error_rate < 0.2:
-                    feedback.append(f"✓ Good performance on {model_name}")
-                else:
-                    suggestions.append(f"Optimize prompt for better performance on {model_name}")
-                    
-            except Exception as e:
-                suggestions.append(f"Error testing with {model_name}: {str(e)}")
+        # All models are called concurrently; each provider enforces its own limits
+        models = self.config["models"]
+        outcomes = await asyncio.gather(*(self._test_model(name, content) for name in models),
+                                        return_exceptions=True)
         
-        return BenchmarkResult(score / len(self.config["models"]), feedback, suggestions, model_results)
+        for model_name, outcome in zip(models, outcomes):
+            if isinstance(outcome, Exception):
+                suggestions.append(f"Error testing with {model_name}: {str(outcome)}")
+                continue
+            
+            model_results.append(outcome)
+            score += (1 - outcome.error_rate) * 0.5
+            
+            if outcome.error_rate < 0.2:
+                feedback.append(f"✓ Good performance on {model_name}")
+            else:
+                suggestions.append(f"Optimize prompt for better performance on {model_name}")
+        
+        return BenchmarkResult(score / len(models), feedback, suggestions, model_results)
     
-    def evaluate_structure(self, content: str, metadata: Dict[str, Any]) -> BenchmarkResult:
+    def evaluate_structure(self, content: str, metadata: Dict[str, Any],
+                           features: Optional[PromptFeatures] = None) -> BenchmarkResult:
+        features = features or PromptFeatures.from_text(content)
         score = 0.0
         feedback = []
         suggestions = []
         
         # Check for clear sections
-        if "---" in content:
+        if features.has_frontmatter_rule:
             score += 0.2
             feedback.append("✓ Has proper frontmatter separation")
         else:
@@ -177,19 +320,18 @@ class PromptBenchmark:
         if len(present_fields) == len(required_fields):
             feedback.append("✓ Contains all required metadata fields")
         else:
-            missing = set(required_fields) - set(present_fields)
+            missing = [field for field in required_fields if field not in present_fields]
             suggestions.append(f"Add missing metadata fields: {', '.join(missing)}")
             
         # Check content structure
-        sections = content.split('\n\n')
-        if len(sections) > 1:
+        if features.has_sections:
             score += 0.2
             feedback.append("✓ Has clear section separation")
         else:
             suggestions.append("Add clear section separation with blank lines")
             
         # Check for examples
-        if "example" in content.lower() or "```" in content:
+        if features.keyword_hits["example"] or features.has_code_block:
             score += 0.2
             feedback.append("✓ Contains examples or code blocks")
         else:
@@ -197,27 +339,28 @@ class PromptBenchmark:
             
         return BenchmarkResult(score, feedback, suggestions)
     
-    def evaluate_clarity(self, content: str) -> BenchmarkResult:
+    def evaluate_clarity(self, content: str, features: Optional[PromptFeatures] = None) -> BenchmarkResult:
+        features = features or PromptFeatures.from_text(content)
         score = 0.0
         feedback = []
         suggestions = []
         
         # Check for clear instructions
-        if any(keyword in content.lower() for keyword in ["you are", "your task", "your role"]):
+        if features.has_any(["you are", "your task", "your role"]):
             score += 0.3
             feedback.append("✓ Clear role/task definition")
         else:
             suggestions.append("Add clear role or task definition")
             
         # Check for formatting guidelines
-        if "<format>" in content or "format:" in content.lower():
+        if features.has_format_tag or features.keyword_hits["format:"]:
             score += 0.3
             feedback.append("✓ Contains format specifications")
         else:
             suggestions.append("Add output format specifications")
             
         # Check for success criteria
-        if any(keyword in content.lower() for keyword in ["success", "criteria", "expected", "requirements"]):
+        if features.has_any(["success", "criteria", "expected", "requirements"]):
             score += 0.4
             feedback.append("✓ Includes success criteria")
         else:
@@ -225,24 +368,49 @@ class PromptBenchmark:
             
         return BenchmarkResult(score, feedback, suggestions)
     
-    async def evaluate_semantic_similarity(self, content: str, all_prompts: List[str]) -> BenchmarkResult:
-        """Evaluate semantic similarity with other prompts."""
+    def _neighbour_index(self, all_prompts: List[str], prompt_ids: Optional[List[str]]):
+        """Nearest-neighbour index over all_prompts, shared by every task of a run."""
+        if self._similarity_prompts is not all_prompts:
+            options = self.config.get("similarity", {})
+            ids = prompt_ids if prompt_ids is not None else [str(i) for i in range(len(all_prompts))]
+            with span('embedding', 'neighbour-index', prompts=len(all_prompts)):
+                self._similarity = self.analyzer.neighbour_index(
+                    ids, all_prompts,
+                    method=options.get("method", "auto"),
+                    n_probe=options.get("n_probe", 8),
+                    approximate_above=options.get("approximate_above", 20000))
+            self._similarity_prompts = all_prompts
+        return self._similarity
+    
+    async def evaluate_semantic_similarity(self, content: str, all_prompts: List[str],
+                                           prompt_id: Optional[str] = None,
+                                           prompt_ids: Optional[List[str]] = None) -> BenchmarkResult:
+        """Evaluate semantic similarity with the nearest other prompts."""
         score = 0.0
         feedback = []
         suggestions = []
-        semantic_scores = {}
+        options = self.config.get("similarity", {})
+        top_k = options.get("top_k", 5)
+        threshold = options.get("threshold", 0.8)
         
-        for other_prompt in all_prompts:
-            if other_prompt != content:
-                similarity = self.analyzer.compute_semantic_similarity(content, other_prompt)
-                semantic_scores[other_prompt] = similarity
-                
-                if similarity > 0.8:
-                    feedback.append(f"✓ High similarity ({similarity:.2f}) with another prompt")
-                    suggestions.append("Consider consolidating similar prompts")
-                
-        if semantic_scores:
-            score = sum(semantic_scores.values()) / len(semantic_scores)
+        index = self._neighbour_index(all_prompts, prompt_ids)
+        if prompt_id not in index.positions and content in all_prompts:
+            prompt_id = index.ids[all_prompts.index(content)]
+        
+        # Only the top-k neighbours and pairs above the threshold are kept, by prompt ID
+        if prompt_id in index.positions:
+            neighbours = index.neighbours(prompt_id, top_k, threshold)
+            score = index.mean_similarity(prompt_id)
+        else:
+            vector = self.analyzer.encode_prompts([content])[0]
+            neighbours = index.search(vector, top_k, threshold)
+            score = index.mean_similarity_to(vector)
+        semantic_scores = dict(neighbours)
+        
+        for similarity in semantic_scores.values():
+            if similarity > threshold:
+                feedback.append(f"✓ High similarity ({similarity:.2f}) with another prompt")
+                suggestions.append("Consider consolidating similar prompts")
             
         return BenchmarkResult(score, feedback, suggestions, semantic_scores=semantic_scores)
     
@@ -255,7 +423,7 @@ class PromptBenchmark:
         # Analyze token efficiency for each model result
         token_metrics = {}
         for result in model_results:
-            metrics = self.analyzer.analyze_token_efficiency(content, result.token_count)
+            metrics = self.analyzer.analyze_token_efficiency(content, result.token_count, result.model)
             token_metrics[result.model.value] = metrics
             
             if metrics["token_ratio"] > 2.0:
@@ -269,33 +437,18 @@ class PromptBenchmark:
         
         return BenchmarkResult(score, feedback, suggestions, token_metrics=token_metrics)
     
-    def evaluate_complexity(self, content: str) -> BenchmarkResult:
+    def evaluate_complexity(self, content: str, features: Optional[PromptFeatures] = None) -> BenchmarkResult:
         """Analyzes prompt complexity across multiple dimensions."""
+        features = features or PromptFeatures.from_text(content)
         score = 0.0
         feedback = []
         suggestions = []
         
-        # Lexical analysis
-        words = content.lower().split()
-        unique_words = len(set(words))
-        total_words = len(words)
-        lexical_diversity = unique_words / total_words if total_words > 0 else 0
-        avg_word_length = sum(len(word) for word in words) / total_words if total_words > 0 else 0
-        
-        # Structural analysis
-        nested_depth = 0
-        max_depth = 0
-        for char in content:
-            if char in '{[(<':
-                nested_depth += 1
-                max_depth = max(max_depth, nested_depth)
-            elif char in '}])>':
-                nested_depth = max(0, nested_depth - 1)
-                
-        # Count conditionals and variables
-        conditional_count = sum(1 for keyword in ['if', 'when', 'unless', 'else'] 
-                              if keyword in content.lower().split())
-        variable_count = content.count('{{') + content.count('{%')
+        lexical_diversity = features.lexical_diversity
+        avg_word_length = features.avg_word_length
+        max_depth = features.bracket_depth
+        conditional_count = features.conditional_count
+        variable_count = features.variable_count
         
         metrics = ComplexityMetrics(
             lexical_diversity=lexical_diversity,
@@ -332,7 +485,7 @@ class PromptBenchmark:
             
         return BenchmarkResult(score, feedback, suggestions, complexity_metrics=metrics)
     
-    def evaluate_security(self, content: str) -> BenchmarkResult:
+    def evaluate_security(self, content: str, features: Optional[PromptFeatures] = None) -> BenchmarkResult:
         """Analyzes potential security risks in the prompt."""
         score = 1.0
         feedback = []
@@ -340,45 +493,14 @@ class PromptBenchmark:
         identified_risks = []
         sensitive_patterns = []
         
-        # Security patterns to check
-        risk_patterns = {
-            SecurityRisk.INJECTION: [
-                r'system\s*prompt',
-                r'ignore\s*(previous|above)',
-                r'bypass',
-                r'override'
-            ],
-            SecurityRisk.SENSITIVE_DATA: [
-                r'api[_-]?key',
-                r'password',
-                r'secret',
-                r'token',
-                r'credential'
-            ],
-            SecurityRisk.JAILBREAK: [
-                r'ignore\s*ethics',
-                r'ignore\s*rules',
-                r'unlimited\s*power',
-                r'no\s*restrictions'
-            ],
-            SecurityRisk.UNSAFE_EXECUTION: [
-                r'execute\s*command',
-                r'run\s*shell',
-                r'system\s*call',
-                r'eval'
-            ]
-        }
-        
-        content_lower = content.lower()
-        
-        # Check each risk category
-        for risk_type, patterns in risk_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, content_lower):
-                    score -= 0.2
-                    identified_risks.append(risk_type)
-                    sensitive_patterns.append(pattern)
-                    suggestions.append(f"Security risk ({risk_type.value}): Found pattern '{pattern}'")
+        # One pass over the content for every pattern
+        scan = self.security_scanner.scan(content, features.lowered if features else None)
+        for risk, pattern in scan.patterns_found:
+            risk_type = SecurityRisk(risk)
+            score -= 0.2
+            identified_risks.append(risk_type)
+            sensitive_patterns.append(pattern)
+            suggestions.append(f"Security risk ({risk_type.value}): Found pattern '{pattern}'")
         
         if score > 0.8:
             feedback.append("✓ No major security risks detected")
@@ -387,35 +509,24 @@ class PromptBenchmark:
             
         metrics = SecurityMetrics(
             risk_level=1.0 - score,
-            identified_risks=list(set(identified_risks)),
-            sensitive_patterns=list(set(sensitive_patterns))
+            identified_risks=list(dict.fromkeys(identified_risks)),
+            sensitive_patterns=list(dict.fromkeys(sensitive_patterns)),
+            matches=scan.matches,
+            risk_counts=scan.risk_counts
         )
         
         return BenchmarkResult(max(0.0, score), feedback, suggestions, security_metrics=metrics)
     
-    def evaluate_i18n(self, content: str) -> BenchmarkResult:
+    def evaluate_i18n(self, content: str, features: Optional[PromptFeatures] = None) -> BenchmarkResult:
         """Analyzes internationalization aspects of the prompt."""
+        features = features or PromptFeatures.from_text(content)
         score = 0.0
         feedback = []
         suggestions = []
         
-        # Character set analysis
-        has_non_ascii = any(ord(c) > 127 for c in content)
-        unicode_categories = set(unicodedata.category(c) for c in content)
-        
-        # Regional format detection
-        region_patterns = {
-            'date_format': r'\b(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})\b',
-            'time_format': r'\b(\d{1,2}:\d{2})\b',
-            'currency': r'[\$€£¥]',
-            'phone': r'\+\d{1,3}[-\s]?\d{1,14}',
-            'timezone': r'\b[A-Z]{3,4}[-+]\d{1,2}(:?\d{2})?\b'
-        }
-        
-        found_patterns = {
-            key: bool(re.search(pattern, content))
-            for key, pattern in region_patterns.items()
-        }
+        has_non_ascii = features.has_non_ascii
+        unicode_categories = features.category_counts
+        found_patterns = features.region_matches
         
         # Scoring and feedback
         if has_non_ascii:
@@ -438,7 +549,7 @@ class PromptBenchmark:
             feedback.append("✓ No region-specific formats detected")
             
         # Variable interpolation check
-        if '{{' in content and '}}' in content:
+        if features.has_interpolation:
             score += 0.3
             feedback.append("✓ Uses variable interpolation")
         else:
@@ -446,127 +557,585 @@ class PromptBenchmark:
             
         return BenchmarkResult(score, feedback, suggestions)
 
-    async def benchmark_prompt(self, file_path: str, all_prompts: Optional[List[str]] = None) -> Dict[EvaluationCriteria, BenchmarkResult]:
+    def evaluate_static(self, content: str, metadata: Dict[str, Any]) -> Dict[EvaluationCriteria, BenchmarkResult]:
+        """Run the selected CPU-only evaluators on one prompt."""
+        results = {}
+        with span('parse', 'features'):
+            features = PromptFeatures.from_text(content)
+        
+        # Basic evaluations
+        if self.wants(EvaluationCriteria.STRUCTURE):
+            with span('evaluator', EvaluationCriteria.STRUCTURE.value):
+                results[EvaluationCriteria.STRUCTURE] = self.evaluate_structure(content, metadata, features)
+        if self.wants(EvaluationCriteria.CLARITY):
+            with span('evaluator', EvaluationCriteria.CLARITY.value):
+                results[EvaluationCriteria.CLARITY] = self.evaluate_clarity(content, features)
+        
+        # Advanced evaluations
+        if self.wants(EvaluationCriteria.COMPLEXITY):
+            with span('evaluator', EvaluationCriteria.COMPLEXITY.value):
+                results[EvaluationCriteria.COMPLEXITY] = self.evaluate_complexity(content, features)
+        if self.wants(EvaluationCriteria.SECURITY):
+            with span('evaluator', EvaluationCriteria.SECURITY.value):
+                results[EvaluationCriteria.SECURITY] = self.evaluate_security(content, features)
+        if self.wants(EvaluationCriteria.I18N):
+            with span('evaluator', EvaluationCriteria.I18N.value):
+                results[EvaluationCriteria.I18N] = self.evaluate_i18n(content, features)
+        
+        return results
+    
+    def create_static_executor(self, workers: int) -> ProcessPoolExecutor:
+        """Process pool whose workers each hold a benchmark with this run's config and criteria."""
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_static_worker,
+                                   initargs=(self.config, sorted(c.value for c in self.criteria)))
+    
+    def submit_static(self, documents: List[PromptDocument], executor: ProcessPoolExecutor,
+                      workers: int, chunk_size: int = 64) -> 'StaticSubmitter':
+        """
+        Queue the static evaluators for documents in chunks as their prompts
+        are reached, keeping about two chunks per worker in flight.
+        """
+        return StaticSubmitter(documents, executor, chunk_size, 2 * workers)
+    
+    async def benchmark_documents(self, documents: List[PromptDocument], all_prompts: List[str],
+                                  prompt_ids: List[str], static: Optional['StaticSubmitter'] = None,
+                                  concurrency: int = 64) -> None:
+        """
+        Benchmark documents and record their results in document order. Results
+        already taken over by reuse_stored_results are recorded in their place
+        without benchmarking. At most `concurrency` prompts are started but not
+        yet recorded, so the results held in memory stay bounded however large
+        the corpus is.
+        """
+        self.expect([str(doc.path) for doc in documents])
+        running = deque()
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                post = frontmatter.load(f)
-                
-            results = {}
-            
-            # Basic evaluations
-            results[EvaluationCriteria.STRUCTURE] = self.evaluate_structure(post.content, post.metadata)
-            results[EvaluationCriteria.CLARITY] = self.evaluate_clarity(post.content)
-            
-            # Advanced evaluations
-            results[EvaluationCriteria.COMPLEXITY] = self.evaluate_complexity(post.content)
-            results[EvaluationCriteria.SECURITY] = self.evaluate_security(post.content)
-            results[EvaluationCriteria.I18N] = self.evaluate_i18n(post.content)
-            
-            # Model performance evaluation
-            model_results = await self.evaluate_model_performance(post.content, post.metadata)
-            results[EvaluationCriteria.MODEL_PERFORMANCE] = model_results
-            
-            # Semantic analysis
-            if all_prompts:
-                semantic_results = await self.evaluate_semantic_similarity(post.content, all_prompts)
-                results[EvaluationCriteria.SEMANTIC_SIMILARITY] = semantic_results
-            
-            # Token efficiency
-            if model_results.model_results:
-                token_results = self.evaluate_token_efficiency(post.content, model_results.model_results)
-                results[EvaluationCriteria.TOKEN_EFFICIENCY] = token_results
-            
-            self.results[file_path] = results
-            return results
+            for doc in documents:
+                reused = self.results.pop(str(doc.path), None)
+                if reused is not None:
+                    self.record(str(doc.path), reused)
+                    continue
+                if len(running) >= concurrency:
+                    # The oldest prompt finishing means every earlier one has been recorded
+                    await running.popleft()
+                running.append(asyncio.ensure_future(self.benchmark_prompt(
+                    str(doc.path), all_prompts, document=doc, prompt_ids=prompt_ids,
+                    static_future=static.take(str(doc.path)) if static is not None else None)))
+            while running:
+                await running.popleft()
+        finally:
+            for task in running:
+                task.cancel()
+    
+    async def benchmark_prompt(self, file_path: str, all_prompts: Optional[List[str]] = None,
+                               document: Optional[PromptDocument] = None,
+                               prompt_ids: Optional[List[str]] = None,
+                               static_future: Optional[asyncio.Future] = None) -> Dict[EvaluationCriteria, BenchmarkResult]:
+        try:
+            with lane(file_path), span('prompt', 'benchmark'):
+                return await self._benchmark_prompt(file_path, all_prompts, document, prompt_ids, static_future)
             
         except Exception as e:
             print(f"Error benchmarking {file_path}: {str(e)}")
+            if file_path not in self._held:
+                self.record(file_path, None)
             return {}
     
-    def generate_report(self, output_file: Optional[str] = None, html_report: Optional[str] = None) -> None:
-        """Generate both JSON and HTML reports."""
-        report = {
-            "summary": {
-                "total_prompts": len(self.results),
-                "average_scores": {},
-                "model_performance": {},
-                "semantic_analysis": {
-                    "avg_similarity": 0.0,
-                    "similar_prompt_pairs": []
-                },
-                "token_efficiency": {
-                    "avg_ratio": 0.0,
-                    "efficiency_by_model": {}
-                }
-            },
-            "detailed_results": {}
-        }
+    async def _benchmark_prompt(self, file_path: str, all_prompts: Optional[List[str]],
+                                document: Optional[PromptDocument], prompt_ids: Optional[List[str]],
+                                static_future: Optional[asyncio.Future]) -> Dict[EvaluationCriteria, BenchmarkResult]:
+        post = document if document is not None else load_prompt(file_path)
         
-        # Calculate averages and collect metrics
-        for criteria in EvaluationCriteria:
-            scores = [results[criteria].score for results in self.results.values() if criteria in results]
-            if scores:
-                report["summary"]["average_scores"][criteria.value] = sum(scores) / len(scores)
-                
-                # Collect model-specific metrics
-                if criteria == EvaluationCriteria.MODEL_PERFORMANCE:
-                    self._collect_model_metrics(report)
-                
-                # Collect semantic similarity metrics
-                elif criteria == EvaluationCriteria.SEMANTIC_SIMILARITY:
-                    self._collect_semantic_metrics(report)
-                
-                # Collect token efficiency metrics
-                elif criteria == EvaluationCriteria.TOKEN_EFFICIENCY:
-                    self._collect_token_metrics(report)
+        # Static evaluations, either from a worker process or inline
+        if static_future is not None:
+            with span('wait', 'static-worker'):
+                results = dict((await static_future)[0][file_path])
+        else:
+            results = self.evaluate_static(post.content, post.metadata)
+        
+        # Model performance evaluation (token efficiency is derived from it)
+        model_results = None
+        if self.wants(EvaluationCriteria.MODEL_PERFORMANCE) or self.wants(EvaluationCriteria.TOKEN_EFFICIENCY):
+            with span('evaluator', EvaluationCriteria.MODEL_PERFORMANCE.value):
+                model_results = await self.evaluate_model_performance(post.content, post.metadata)
+            if self.wants(EvaluationCriteria.MODEL_PERFORMANCE):
+                results[EvaluationCriteria.MODEL_PERFORMANCE] = model_results
+        
+        # Semantic analysis
+        if all_prompts and self.wants(EvaluationCriteria.SEMANTIC_SIMILARITY):
+            with span('evaluator', EvaluationCriteria.SEMANTIC_SIMILARITY.value):
+                semantic_results = await self.evaluate_semantic_similarity(post.content, all_prompts,
+                                                                           file_path, prompt_ids)
+            results[EvaluationCriteria.SEMANTIC_SIMILARITY] = semantic_results
+        
+        # Token efficiency
+        if model_results and model_results.model_results and self.wants(EvaluationCriteria.TOKEN_EFFICIENCY):
+            with span('evaluator', EvaluationCriteria.TOKEN_EFFICIENCY.value):
+                token_results = self.evaluate_token_efficiency(post.content, model_results.model_results)
+            results[EvaluationCriteria.TOKEN_EFFICIENCY] = token_results
+        
+        self.record(file_path, results)
+        # Streamed results live in the sink; returning them would keep them in memory
+        return results if self.sink is None else {}
+    
+    async def reuse_stored_results(self, documents: List[PromptDocument], all_prompts: List[str],
+                                   prompt_ids: List[str]) -> List[PromptDocument]:
+        """
+        Load stored results of unchanged prompts into self.results, re-evaluate
+        semantic similarity of those whose neighbours may have changed and
+        recompute the mean similarity of the others. benchmark_documents records
+        them in corpus order. Returns the documents that still need a full benchmark.
+        """
+        criteria = sorted(c.value for c in self.criteria)
+        pending = []
+        for doc in documents:
+            stored = self.result_store.load(str(doc.path), doc.sha, criteria)
+            if stored is None:
+                pending.append(doc)
+                continue
+            self.results[str(doc.path)] = {
+                EvaluationCriteria(name): self._deserialize_result(data) for name, data in stored.items()
+            }
+            self._reused.add(str(doc.path))
+        
+        if self._reused and len(all_prompts) > 1 and self.wants(EvaluationCriteria.SEMANTIC_SIMILARITY):
+            contents = {str(doc.path): doc.content for doc in documents}
+            for file_path in self.affected_neighbours([str(doc.path) for doc in pending], all_prompts, prompt_ids):
+                self.results[file_path][EvaluationCriteria.SEMANTIC_SIMILARITY] = \
+                    await self.evaluate_semantic_similarity(contents[file_path], all_prompts, file_path, prompt_ids)
+                self._reused.discard(file_path)
+            # The mean similarity to every other prompt moves with any change; it is cheap to recompute
+            index = self._neighbour_index(all_prompts, prompt_ids)
+            for file_path in self._reused:
+                semantic = self.results[file_path].get(EvaluationCriteria.SEMANTIC_SIMILARITY)
+                if semantic is not None and file_path in index.positions:
+                    semantic.score = index.mean_similarity(file_path)
+        return pending
+    
+    def affected_neighbours(self, changed: List[str], all_prompts: List[str], prompt_ids: List[str]) -> List[str]:
+        """
+        Reused prompts whose stored neighbour list a changed, added or removed prompt
+        could alter: a listed neighbour changed or is gone, or a changed prompt now
+        scores above the weakest stored neighbour or the threshold. The mean
+        similarity of the other prompts is recomputed by reuse_stored_results.
+        """
+        import numpy as np
+        options = self.config.get("similarity", {})
+        top_k = options.get("top_k", 5)
+        threshold = options.get("threshold", 0.8)
+        index = self._neighbour_index(all_prompts, prompt_ids)
+        changed_set = set(changed)
         
-        # Generate detailed results
-        self._generate_detailed_results(report)
+        # Best similarity of every prompt to any changed prompt, one block of changed rows at a time
+        best = None
+        rows = [index.positions[file_path] for file_path in changed if file_path in index.positions]
+        for start in range(0, len(rows), index.block_size):
+            block = (index.embeddings[rows[start:start + index.block_size]] @ index.embeddings.T).max(axis=0)
+            best = block if best is None else np.maximum(best, block)
         
-        # Save JSON report
-        if output_file:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(report, f, indent=2)
+        affected = []
+        for file_path in sorted(self._reused):
+            result = self.results[file_path].get(EvaluationCriteria.SEMANTIC_SIMILARITY)
+            if result is None:
+                continue
+            stored = result.semantic_scores or {}
+            if any(other in changed_set or other not in index.positions for other in stored):
+                affected.append(file_path)
+            elif best is not None:
+                similarity = best[index.positions[file_path]]
+                weakest = min(stored.values()) if len(stored) >= top_k else float('-inf')
+                if similarity > weakest or similarity > threshold:
+                    affected.append(file_path)
+        return affected
+    
+    def save_results(self, documents: List[PromptDocument]) -> None:
+        """Store this run's new results for the next --incremental run."""
+        criteria = sorted(c.value for c in self.criteria)
+        models = self.config.get("models", [])
+        shas = {str(doc.path): doc.sha for doc in documents}
+        for file_path, results in self.records():
+            if not results or file_path in self._reused or file_path not in shas:
+                continue
+            model_result = results.get(EvaluationCriteria.MODEL_PERFORMANCE.value)
+            if model_result is not None and len(model_result.get("model_results") or []) < len(models):
+                continue  # failed model calls are retried next run
+            self.result_store.save(file_path, shas[file_path], criteria, results)
+    
+    def expect(self, file_paths: List[str]) -> None:
+        """
+        Record the results of file_paths in this order, whatever order they
+        finish in, so concurrent and parallel runs write identical reports.
+        """
+        self._expected = deque(file_paths)
+        self._held = {}
+    
+    def record(self, file_path: str, results: Optional[Dict[EvaluationCriteria, BenchmarkResult]]) -> None:
+        """
+        Keep a prompt's results, or append them to the result stream when there is one.
+        None marks a prompt that failed and has no results.
+        """
+        if not self._expected:
+            self._write_record(file_path, results)
+            return
+        self._held[file_path] = results
+        while self._expected and self._expected[0] in self._held:
+            next_path = self._expected.popleft()
+            self._write_record(next_path, self._held.pop(next_path))
+    
+    def _write_record(self, file_path: str, results: Optional[Dict[EvaluationCriteria, BenchmarkResult]]) -> None:
+        if results is None:
+            return
+        if self.sink is not None:
+            self.sink.write(file_path, {
+                criterion.value: self._serialize_result(result) for criterion, result in results.items()
+            })
         else:
-            print(json.dumps(report, indent=2))
+            self.results[file_path] = results
+    
+    def records(self):
+        """Serialized (prompt path, results) pairs, read back from the stream when there is one."""
+        if self.sink is not None:
+            yield from read_records(self.sink.path)
+            return
+        for file_path, results in self.results.items():
+            yield file_path, {criterion.value: self._serialize_result(result) for criterion, result in results.items()}
+    
+    @staticmethod
+    def _serialize_result(result: BenchmarkResult) -> Dict[str, Any]:
+        """JSON-ready form of a BenchmarkResult."""
+        data = {
+            "score": result.score,
+            "feedback": result.feedback,
+            "suggestions": result.suggestions
+        }
+        if result.model_results is not None:
+            data["model_results"] = [
+                {
+                    "model": r.model.value,
+                    "response": r.response,
+                    "execution_time": r.execution_time,
+                    "token_count": r.token_count,
+                    "error_rate": r.error_rate
+                }
+                for r in result.model_results
+            ]
+        if result.semantic_scores is not None:
+            data["semantic_scores"] = result.semantic_scores
+        if result.token_metrics is not None:
+            data["token_metrics"] = result.token_metrics
+        if result.complexity_metrics is not None:
+            data["complexity_metrics"] = asdict(result.complexity_metrics)
+        if result.security_metrics is not None:
+            data["security_metrics"] = {
+                "risk_level": result.security_metrics.risk_level,
+                "identified_risks": [risk.value for risk in result.security_metrics.identified_risks],
+                "sensitive_patterns": result.security_metrics.sensitive_patterns,
+                "risk_counts": result.security_metrics.risk_counts,
+                "matches": [asdict(match) for match in result.security_metrics.matches]
+            }
+        return data
+    
+    @staticmethod
+    def _deserialize_result(data: Dict[str, Any]) -> BenchmarkResult:
+        """BenchmarkResult from its _serialize_result form."""
+        result = BenchmarkResult(data["score"], data["feedback"], data["suggestions"],
+                                 semantic_scores=data.get("semantic_scores"),
+                                 token_metrics=data.get("token_metrics"))
+        if "model_results" in data:
+            result.model_results = [
+                ModelTestResult(ModelType(r["model"]), r["response"], r["execution_time"],
+                                r["token_count"], r["error_rate"])
+                for r in data["model_results"]
+            ]
+        if "complexity_metrics" in data:
+            result.complexity_metrics = ComplexityMetrics(**data["complexity_metrics"])
+        if "security_metrics" in data:
+            security = data["security_metrics"]
+            result.security_metrics = SecurityMetrics(
+                risk_level=security["risk_level"],
+                identified_risks=[SecurityRisk(risk) for risk in security["identified_risks"]],
+                sensitive_patterns=security["sensitive_patterns"],
+                matches=[SecurityMatch(**match) for match in security.get("matches", [])],
+                risk_counts=security.get("risk_counts", {})
+            )
+        return result
+    
+    def generate_report(self, output_file: Optional[str] = None, html_report: Optional[str] = None) -> None:
+        """
+        Generate both JSON and HTML reports. The summary is one aggregation pass
+        over the results and the JSON report is written record by record.
+        """
+        with memory_phase(self.memory_profiler, 'report'):
+            summary = ReportSummary([c.value for c in EvaluationCriteria],
+                                    self.config.get("similarity", {}).get("threshold", 0.8))
+            for file_path, results in self.records():
+                summary.add(file_path, results)
+            summary_data = summary.as_dict()
+            instrumentation = active()
+            if instrumentation is not None:
+                summary_data["timings"] = instrumentation.histograms()
+            
+            # Save JSON report
+            with span('report', 'json'):
+                if output_file:
+                    with open(output_file, 'w', encoding='utf-8') as f:
+                        write_report(summary_data, self.records(), f)
+                else:
+                    write_report(summary_data, self.records(), sys.stdout)
+                    print()
+            
+            # Record this run's scores and timings for trend charts
+            if self.history is not None:
+                with span('report', 'history'):
+                    run_id = self.history.append(self.records())
+                print(f"Recorded run {run_id} in {self.history.directory}", file=sys.stderr)
         
         # Generate HTML report with visualizations
         if html_report:
-            self.visualization.generate_html_report(report, html_report)
+            with memory_phase(self.memory_profiler, 'html'), span('report', 'html'):
+                report = {"summary": summary_data, "detailed_results": dict(self.records())}
+                self.visualization.generate_html_report(report, html_report, self.history)
 
-async def main():
-    if len(sys.argv) < 2:
-        print("Usage: benchmark_prompts.py <prompt_file_or_directory> [output_file] [config_file] [html_report]")
-        sys.exit(1)
-        
-    target = sys.argv[1]
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
-    config_file = sys.argv[3] if len(sys.argv) > 3 else None
-    html_report = sys.argv[4] if len(sys.argv) > 4 else None
-    
-    benchmark = PromptBenchmark(config_file)
-    
-    # Collect all prompts for semantic similarity analysis
-    all_prompts = []
-    if os.path.isdir(target):
-        for prompt_file in Path(target).glob("**/*.md"):
-            if "prompts" in str(prompt_file):
-                with open(prompt_file, 'r', encoding='utf-8') as f:
-                    post = frontmatter.load(f)
-                    all_prompts.append(post.content)
-    
-    # Run benchmarks
-    if os.path.isfile(target):
-        await benchmark.benchmark_prompt(target, all_prompts if len(all_prompts) > 1 else None)
-    else:
-        tasks = []
-        for prompt_file in Path(target).glob("**/*.md"):
-            if "prompts" in str(prompt_file):
-                tasks.append(benchmark.benchmark_prompt(str(prompt_file), all_prompts))
-        await asyncio.gather(*tasks)
+_static_worker: Optional[PromptBenchmark] = None
+
+def _init_static_worker(config: Dict[str, Any], criteria: List[str]) -> None:
+    global _static_worker
+    _static_worker = PromptBenchmark(criteria=[EvaluationCriteria(value) for value in criteria])
+    _static_worker.config = config
+    activate(Instrumentation(trace=True))
+
+class StaticSubmitter:
+    """
+    Static evaluations of documents, submitted to a process pool one chunk at
+    a time as their prompts are reached. At most `ahead` chunks are queued or
+    running with results not yet taken, so neither the pool's queue of
+    pickled work nor the held results grow with the corpus.
+    """
+    
+    def __init__(self, documents: List[PromptDocument], executor: ProcessPoolExecutor,
+                 chunk_size: int = 64, ahead: int = 4):
+        self.documents = documents
+        self.executor = executor
+        self.chunk_size = chunk_size
+        self.ahead = max(1, ahead)
+        self._next = 0
+        self._futures: Dict[str, asyncio.Future] = {}
+        # Submitted chunks: [future, prompts whose future has not been taken]
+        self._open: deque = deque()
+    
+    def _submit(self) -> None:
+        chunk = self.documents[self._next:self._next + self.chunk_size]
+        self._next += len(chunk)
+        items = [(str(doc.path), doc.content, doc.metadata) for doc in chunk]
+        future = asyncio.get_running_loop().run_in_executor(self.executor, _evaluate_static_chunk, items)
+        future.add_done_callback(_merge_worker_spans)
+        for doc in chunk:
+            self._futures[str(doc.path)] = future
+        self._open.append([future, len(chunk)])
+    
+    def take(self, file_path: str) -> Optional[asyncio.Future]:
+        """The future of file_path's chunk, submitting it and the chunks after it as needed."""
+        while file_path not in self._futures and self._next < len(self.documents):
+            self._submit()
+        future = self._futures.pop(file_path, None)
+        if future is not None:
+            for entry in self._open:
+                if entry[0] is future:
+                    entry[1] -= 1
+                    break
+            while self._open and self._open[0][1] == 0:
+                self._open.popleft()
+        while len(self._open) < self.ahead and self._next < len(self.documents):
+            self._submit()
+        return future
+
+def _evaluate_static_chunk(items: List[tuple]) -> Tuple[Dict[str, Dict[EvaluationCriteria, BenchmarkResult]], list]:
+    """Results of a chunk, plus the worker's timing spans for the parent to merge."""
+    results = {}
+    for path, content, metadata in items:
+        with lane(path):
+            results[path] = _static_worker.evaluate_static(content, metadata)
+    return results, active().drain()
+
+def _merge_worker_spans(future: asyncio.Future) -> None:
+    instrumentation = active()
+    if instrumentation is not None and not future.cancelled() and future.exception() is None:
+        instrumentation.merge(future.result()[1])
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Benchmark prompt files')
+    parser.add_argument('target', help='Prompt file or directory')
+    parser.add_argument('output_file', nargs='?', help='JSON report file (stdout if omitted)')
+    parser.add_argument('config_file', nargs='?', help='Benchmark YAML configuration')
+    parser.add_argument('html_report', nargs='?', help='HTML report file name')
+    parser.add_argument('--criteria', type=parse_criteria,
+                        help='Comma-separated criteria to evaluate (default: all). '
+                             'Heavy dependencies load only for the criteria that need them')
+    parser.add_argument('--stub', action='store_true',
+                        help='Send every model call to the bundled local stub server instead of the providers')
+    parser.add_argument('--stub-latency', type=float, default=0.5, help='Response delay of the stub server')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes for the static evaluators (structure, clarity, complexity, security, i18n)')
+    parser.add_argument('--chunk-size', type=int, default=64, help='Prompts per worker task')
+    parser.add_argument('--concurrency', type=int, default=64,
+                        help='Prompts benchmarked at once; bounds the results held before they are recorded')
+    parser.add_argument('--replay', action='store_true',
+                        help='Answer model calls only from the response cache; never contact a provider')
+    parser.add_argument('--no-response-cache', action='store_true', help='Neither read nor write cached responses')
+    parser.add_argument('--stream', metavar='NDJSON_FILE',
+                        help="Append each prompt's results to this file as soon as it finishes; "
+                             "the report is then assembled from the stream")
+    parser.add_argument('--history', metavar='DIR',
+                        help='Append per-prompt scores and model timings to this history store '
+                             '(default: history.directory from the config, except for --stub and --criteria runs)')
+    parser.add_argument('--trace', metavar='TRACE_FILE',
+                        help='Write a Chrome/Perfetto trace of every timed span (evaluators, file I/O, parsing, '
+                             'embeddings, model calls) to this JSON file')
+    parser.add_argument('--memprofile', nargs='?', const=True, metavar='JSON_FILE',
+                        help='Trace Python allocations with tracemalloc and report peak memory and the top '
+                             'allocation sites of each phase (load, similarity, evaluate, report, html); '
+                             'optionally also write them to JSON_FILE')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Reuse stored results of unchanged prompts; re-evaluate changed prompts '
+                             'and the semantic neighbours they affect')
+    return parser
+
+async def run(args: argparse.Namespace, corpus: Optional[PromptCorpus] = None) -> None:
+    """
+    Benchmark from parsed arguments. A corpus already loaded from the target
+    directory is used as-is instead of loading it again. Timings of the run
+    go into the report's summary and, with --trace, into a trace file.
+    """
+    instrumentation = Instrumentation(trace=bool(args.trace))
+    activate(instrumentation)
+    memory = MemoryProfiler() if args.memprofile else None
+    try:
+        await _run(args, corpus, memory)
+    finally:
+        activate(None)
+        if memory is not None:
+            memory.stop()
+    if args.trace:
+        count = instrumentation.write_trace(args.trace)
+        print(f"Wrote {count} trace events to {args.trace}", file=sys.stderr)
+    if memory is not None:
+        memory.print_report()
+        if isinstance(args.memprofile, str):
+            memory.write(args.memprofile)
+            print(f"Memory profile written to {args.memprofile}", file=sys.stderr)
+
+async def _run(args: argparse.Namespace, corpus: Optional[PromptCorpus], memory: Optional[MemoryProfiler] = None) -> None:
+    target = args.target
+    output_file = args.output_file
+    config_file = args.config_file
+    html_report = args.html_report
+    
+    stub_runner = None
+    provider_url = None
+    if args.stub:
+        from stub_llm_server import start_stub_server
+        stub_runner, provider_url = await start_stub_server(latency=args.stub_latency)
+    
+    benchmark = PromptBenchmark(config_file, args.criteria, provider_url,
+                                replay=args.replay, use_response_cache=not args.no_response_cache)
+    if benchmark.wants(EvaluationCriteria.SECURITY):
+        # A bad pattern in the security section stops the run before any prompt is benchmarked
+        try:
+            benchmark.security_scanner
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            if stub_runner is not None:
+                await stub_runner.cleanup()
+            return
+    if args.stream:
+        benchmark.sink = ResultSink(args.stream)
+    history_dir = args.history
+    if not history_dir:
+        history_dir = (benchmark.config.get("history") or {}).get("directory")
+        if history_dir and (args.stub or args.criteria):
+            # Stub latencies and partial criteria would skew the trend and regression charts
+            print("Not recording history for a --stub or --criteria run; pass --history to record it",
+                  file=sys.stderr)
+            history_dir = None
+    if history_dir:
+        from history_store import HistoryStore
+        benchmark.history = HistoryStore(history_dir)
+    benchmark.memory_profiler = memory
+    
+    # Load every prompt once; the same documents feed semantic similarity and the benchmarks
+    documents = []
+    with memory_phase(memory, 'load'):
+        if os.path.isdir(target):
+            if corpus is None or Path(corpus.root).resolve() != Path(target).resolve():
+                corpus = load_corpus(target)
+            for file_path, error in corpus.errors.items():
+                print(f"Error benchmarking {file_path}: {error}")
+            documents = [doc for doc in corpus if "prompts" in str(doc.path)]
+        all_prompts = [doc.content for doc in documents]
+        prompt_ids = [str(doc.path) for doc in documents]
+        
+        # Unchanged prompts are taken from the result store
+        pending = documents
+        if args.incremental and documents:
+            pending = await benchmark.reuse_stored_results(documents, all_prompts, prompt_ids)
+            print(f"Incremental: {len(documents) - len(pending)} unchanged, {len(pending)} to benchmark",
+                  file=sys.stderr)
+    
+    # When profiling, the embeddings and neighbour index are built up front as their own phase
+    # instead of inside the first prompt's evaluation
+    if (memory is not None and pending and len(all_prompts) > 1
+            and benchmark.wants(EvaluationCriteria.SEMANTIC_SIMILARITY)):
+        with memory.phase('similarity'):
+            try:
+                benchmark._neighbour_index(all_prompts, prompt_ids)
+            except Exception as e:
+                print(f"Error building the similarity index: {e}", file=sys.stderr)
+    
+    with memory_phase(memory, 'evaluate'):
+        try:
+            # Token counts for the whole corpus in one batch per model family
+            if pending and benchmark.wants(EvaluationCriteria.TOKEN_EFFICIENCY):
+                for model in benchmark.config["models"]:
+                    with span('tokens', 'count-batch', model=model, prompts=len(pending)):
+                        benchmark.analyzer.token_counter.count_batch([doc.content for doc in pending], model)
+        
+            # Run benchmarks
+            if os.path.isfile(target):
+                await benchmark.benchmark_prompt(target, all_prompts if len(all_prompts) > 1 else None)
+            else:
+                executor = None
+                static = None
+                try:
+                    if args.workers > 1 and pending and benchmark.criteria.intersection(STATIC_CRITERIA):
+                        executor = benchmark.create_static_executor(args.workers)
+                        static = benchmark.submit_static(pending, executor, args.workers, args.chunk_size)
+                    
+                    await benchmark.benchmark_documents(documents, all_prompts, prompt_ids, static,
+                                                        args.concurrency)
+                    if args.incremental:
+                        benchmark.save_results(documents)
+                    
+                    # After encoding, so embeddings added by this run are marked as used by this corpus;
+                    # stored embeddings no longer used by this or any other corpus are dropped
+                    if (documents and benchmark.wants(EvaluationCriteria.SEMANTIC_SIMILARITY)
+                            and benchmark.analyzer.store is not None):
+                        from embedding_store import text_key
+                        with span('io', 'embedding-store-prune'):
+                            benchmark.analyzer.store.retain(str(Path(target).resolve()),
+                                                            [text_key(p) for p in all_prompts])
+                finally:
+                    if executor is not None:
+                        executor.shutdown()
+        finally:
+            await benchmark.close()
+            if stub_runner is not None:
+                await stub_runner.cleanup()
     
     # Generate reports
     benchmark.generate_report(output_file, html_report)
 
+async def main():
+    await run(build_parser().parse_args())
+
 if __name__ == '__main__':
     asyncio.run(main()) 
\ No newline at end of file
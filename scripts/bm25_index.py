@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import math
+import heapq
+import pickle
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Tuple
+import numpy as np
+from prompt_corpus import PromptCorpus, PromptDocument, cache_path
+from text_index import FIELD_BOOSTS, tokenize
+
+INDEX_VERSION = 1
+FIELDS = list(FIELD_BOOSTS)
+
+def document_fields(doc: PromptDocument) -> Dict[str, str]:
+    metadata = doc.metadata or {}
+    tags = metadata.get('tags', [])
+    return {
+        'title': str(metadata.get('title', doc.path.stem)),
+        'tags': ' '.join(str(tag) for tag in tags) if isinstance(tags, list) else str(tags or ''),
+        'description': str(metadata.get('description', '')),
+        'content': doc.content
+    }
+
+def field_frequencies(doc: PromptDocument) -> Dict[str, Tuple[int, ...]]:
+    """Term -> per-field frequencies, in FIELDS order."""
+    frequencies: Dict[str, List[int]] = {}
+    for f, text in enumerate(document_fields(doc).values()):
+        for term in tokenize(text):
+            counts = frequencies.get(term)
+            if counts is None:
+                counts = frequencies[term] = [0] * len(FIELDS)
+            counts[f] += 1
+    return {term: tuple(counts) for term, counts in frequencies.items()}
+
+class BM25Index:
+    """
+    BM25F over title, tags, description and body. The postings are kept as
+    flat arrays (document numbers and per-field term frequencies, grouped by
+    term) with per-field document lengths, and persisted next to the other
+    caches. After an edit only the changed prompts are tokenized again; the
+    postings of the others are carried over.
+    """
+
+    # Persisted alongside paths, shas and terms
+    ARRAYS = ('offsets', 'numbers', 'counts', 'lengths')
+
+    def __init__(self, prompts_dir: Path, index_path: Optional[Path] = None,
+                 k1: float = 1.2, b: float = 0.75, weights: Optional[Dict[str, float]] = None):
+        self.prompts_dir = Path(prompts_dir)
+        self.index_path = Path(index_path) if index_path else cache_path(self.prompts_dir, 'bm25', '.pickle')
+        self.k1 = k1
+        self.b = b
+        self.weights = np.array([(weights or FIELD_BOOSTS)[field] for field in FIELDS], dtype=np.float32)
+        self.paths: List[str] = []
+        self.shas: List[str] = []
+        self.terms: List[str] = []
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.numbers = np.zeros(0, dtype=np.int32)
+        self.counts = np.zeros((0, len(FIELDS)), dtype=np.float32)
+        self.lengths = np.zeros((0, len(FIELDS)), dtype=np.float32)
+        self._positions: Optional[Dict[str, int]] = None
+
+    def _read(self) -> bool:
+        try:
+            with open(self.index_path, 'rb') as f:
+                data = pickle.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"Warning: ignoring unreadable search index {self.index_path}: {e}", file=sys.stderr)
+            return False
+        if data.get('version') != INDEX_VERSION or data.get('fields') != FIELDS:
+            return False
+        self.paths, self.shas, self.terms = data['paths'], data['shas'], data['terms']
+        for name in self.ARRAYS:
+            setattr(self, name, data[name])
+        self._positions = None
+        return True
+
+    def _write(self) -> None:
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+            data = {'version': INDEX_VERSION, 'fields': FIELDS, 'paths': self.paths, 'shas': self.shas,
+                    'terms': self.terms}
+            data.update({name: getattr(self, name) for name in self.ARRAYS})
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, self.index_path)
+        except OSError as e:
+            print(f"Warning: could not write search index {self.index_path}: {e}", file=sys.stderr)
+
+    @property
+    def positions(self) -> Dict[str, int]:
+        """Term -> its slot in offsets."""
+        if self._positions is None:
+            self._positions = {term: i for i, term in enumerate(self.terms)}
+        return self._positions
+
+    def refresh(self, corpus: PromptCorpus) -> Dict[str, int]:
+        """Bring the index in line with the corpus, re-tokenizing only prompts whose content hash changed."""
+        documents = list(corpus)
+        current = [(str(doc.path.relative_to(self.prompts_dir)), doc.sha) for doc in documents]
+        loaded = self._read()
+        if loaded and current == list(zip(self.paths, self.shas)):
+            return {'tokenized': 0, 'reused': len(documents)}
+
+        # Old document number -> new one, for prompts whose path and content are unchanged
+        previous = {key: number for number, key in enumerate(zip(self.paths, self.shas))} if loaded else {}
+        renumber = np.full(len(self.paths) if loaded else 0, -1, dtype=np.int64)
+        term_ids = dict(self.positions) if loaded else {}
+        terms = list(self.terms) if loaded else []
+        lengths = np.zeros((len(documents), len(FIELDS)), dtype=np.float32)
+        new_terms: List[int] = []
+        new_numbers: List[int] = []
+        new_counts: List[Tuple[int, ...]] = []
+        for number, (key, doc) in enumerate(zip(current, documents)):
+            old = previous.get(key)
+            if old is not None:
+                renumber[old] = number
+                lengths[number] = self.lengths[old]
+                continue
+            for term, counts in field_frequencies(doc).items():
+                term_id = term_ids.get(term)
+                if term_id is None:
+                    term_id = term_ids[term] = len(terms)
+                    terms.append(term)
+                new_terms.append(term_id)
+                new_numbers.append(number)
+                new_counts.append(counts)
+                lengths[number] += counts
+
+        # Carry over the postings of unchanged prompts and merge in the new ones
+        old_terms = np.repeat(np.arange(len(self.offsets) - 1), np.diff(self.offsets)) if loaded else np.zeros(0, np.int64)
+        kept = renumber[self.numbers] >= 0 if loaded else np.zeros(0, dtype=bool)
+        all_terms = np.concatenate([old_terms[kept], np.array(new_terms, dtype=np.int64)])
+        all_numbers = np.concatenate([renumber[self.numbers[kept]] if loaded else np.zeros(0, np.int64),
+                                      np.array(new_numbers, dtype=np.int64)])
+        all_counts = np.concatenate([self.counts[kept] if loaded else np.zeros((0, len(FIELDS)), np.float32),
+                                     np.array(new_counts, dtype=np.float32).reshape(-1, len(FIELDS))])
+        order = np.lexsort((all_numbers, all_terms))
+        all_terms, all_numbers, all_counts = all_terms[order], all_numbers[order], all_counts[order]
+
+        # Drop terms no prompt uses any more
+        used = np.unique(all_terms)
+        compact = np.full(len(terms), -1, dtype=np.int64)
+        compact[used] = np.arange(len(used))
+        self.terms = [terms[i] for i in used]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(compact[all_terms], minlength=len(used)))])
+        self.numbers = all_numbers.astype(np.int32)
+        self.counts = all_counts
+        self.lengths = lengths
+        self.paths = [path for path, _ in current]
+        self.shas = [sha for _, sha in current]
+        self._positions = None
+        tokenized = len(documents) - int((renumber >= 0).sum())
+        self._write()
+        return {'tokenized': tokenized, 'reused': len(documents) - tokenized}
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25F score of every prompt for the query; 0 where no term matches."""
+        scores = np.zeros(len(self.paths), dtype=np.float32)
+        if not len(self.paths):
+            return scores
+        average = self.lengths.mean(axis=0)
+        average[average == 0] = 1.0
+        positions = self.positions
+        for term in dict.fromkeys(tokenize(query)):
+            slot = positions.get(term)
+            if slot is None:
+                continue
+            start, end = self.offsets[slot], self.offsets[slot + 1]
+            numbers, counts = self.numbers[start:end], self.counts[start:end]
+            # Per-field length normalization of the matching prompts only
+            norms = (1 - self.b) + self.b * self.lengths[numbers] / average
+            tf = (counts * self.weights / norms).sum(axis=1)
+            frequency = end - start
+            idf = math.log(1 + (len(self.paths) - frequency + 0.5) / (frequency + 0.5))
+            scores[numbers] += idf * tf * (self.k1 + 1) / (tf + self.k1)
+        return scores
+
+    def top(self, query: str, k: int = 10, allowed: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """The k best (path, score) pairs, optionally only among allowed paths, via a heap."""
+        scores = self.scores(query)
+        matched = np.flatnonzero(scores > 0)
+        if allowed is not None:
+            allowed = set(allowed)
+            matched = [i for i in matched if self.paths[i] in allowed]
+        best = heapq.nlargest(k, ((float(scores[i]), -int(i)) for i in matched))
+        return [(self.paths[-negated], score) for score, negated in best]
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import hashlib
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple, Iterable
+import numpy as np
+from prompt_corpus import CACHE_DIR
+
+def text_key(text: str) -> str:
+    """Content hash used to key an embedding."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+# Spare rows allocated whenever the matrix file has to grow, so most adds write in place
+MIN_CAPACITY = 1024
+
+class EmbeddingStore:
+    """
+    Persistent embeddings for one model: a memory-mapped .npy matrix with
+    spare rows plus a JSON index mapping content hashes to rows. New rows are
+    written into the spare capacity and become visible when the index is
+    replaced, so the index is the single commit point; the matrix file is
+    only rewritten when it is full or rows are dropped.
+    """
+
+    def __init__(self, model_name: str, dtype: str = 'float32', directory: Optional[Path] = None):
+        if dtype not in ('float32', 'float16'):
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        slug = model_name.replace('/', '_')
+        self.directory = Path(directory) if directory else CACHE_DIR / 'embeddings' / f"{slug}-{dtype}"
+        self.index_file = self.directory / 'index.json'
+        self._matrix: Optional[np.ndarray] = None
+        self._rows: Optional[Dict[str, int]] = None
+        self._keys: List[str] = []
+        # Per row, a bit for each corpus (scope) whose documents use the embedding
+        self._refs: List[int] = []
+        self._scopes: List[Optional[str]] = []
+        self._file = 'matrix.npy'
+        self._generation = 0
+
+    def _load(self) -> None:
+        self._rows = {}
+        self._matrix = None
+        self._keys, self._refs, self._scopes = [], [], []
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            matrix = np.load(self.directory / index.get('matrix', 'matrix.npy'), mmap_mode='r')
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Warning: ignoring unreadable embedding store {self.directory}: {e}", file=sys.stderr)
+            return
+        count = len(index['keys'])
+        if index.get('model') != self.model_name or matrix.dtype != self.dtype or matrix.shape[0] < count:
+            print(f"Warning: embedding store {self.directory} is inconsistent, rebuilding", file=sys.stderr)
+            return
+        self._matrix = matrix
+        self._keys = index['keys']
+        self._refs = index.get('refs', [0] * count)
+        self._scopes = index.get('scopes', [])
+        self._file = index.get('matrix', 'matrix.npy')
+        self._generation = index.get('generation', 0)
+        self._rows = {key: row for row, key in enumerate(self._keys)}
+
+    @property
+    def matrix(self) -> Optional[np.ndarray]:
+        """The mapped embedding matrix without its spare rows; rows follow the index order."""
+        if self._rows is None:
+            self._load()
+        return self._matrix[:len(self._keys)] if self._matrix is not None else None
+
+    @property
+    def rows(self) -> Dict[str, int]:
+        """Content hash to matrix row."""
+        if self._rows is None:
+            self._load()
+        return self._rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.rows
+
+    def lookup(self, keys: List[str]) -> Tuple[np.ndarray, List[str]]:
+        """Row numbers for the stored keys (-1 when absent) and the keys still missing."""
+        rows = self.rows
+        positions = np.array([rows.get(key, -1) for key in keys], dtype=np.int64)
+        missing = list(dict.fromkeys(key for key, row in zip(keys, positions) if row < 0))
+        return positions, missing
+
+    def get(self, keys: List[str]) -> np.ndarray:
+        """Embeddings for keys as float32; every key must be stored."""
+        positions, missing = self.lookup(keys)
+        if missing:
+            raise KeyError(f"{len(missing)} embeddings not in store")
+        return np.asarray(self.matrix[positions], dtype=np.float32)
+
+    def _new_matrix(self, rows: np.ndarray, capacity: int) -> None:
+        """Write rows into a fresh matrix file with room for capacity rows; committed by the next index write."""
+        self._generation += 1
+        self._file = f"matrix-{self._generation}.npy"
+        out = np.lib.format.open_memmap(self.directory / self._file, mode='w+', dtype=self.dtype,
+                                        shape=(max(capacity, MIN_CAPACITY), rows.shape[1]))
+        out[:len(rows)] = rows
+        out.flush()
+        del out
+        self._matrix = np.load(self.directory / self._file, mmap_mode='r')
+
+    def _commit(self, replaced: Optional[str] = None) -> None:
+        """Atomically replace the index, then delete the matrix file it no longer refers to."""
+        tmp_index = self.directory / f"index.{os.getpid()}.tmp"
+        with open(tmp_index, 'w', encoding='utf-8') as f:
+            json.dump({'model': self.model_name, 'dtype': self.dtype.name, 'dim': self._matrix.shape[1],
+                       'matrix': self._file, 'generation': self._generation, 'keys': self._keys,
+                       'refs': self._refs, 'scopes': self._scopes}, f)
+        os.replace(tmp_index, self.index_file)
+        self._rows = {key: row for row, key in enumerate(self._keys)}
+        if replaced is not None and replaced != self._file:
+            try:
+                os.remove(self.directory / replaced)
+            except OSError:
+                pass
+
+    def add(self, keys: List[str], vectors: np.ndarray) -> None:
+        """Append new embeddings and persist the store."""
+        rows = self.rows
+        new = {}
+        for key, vector in zip(keys, vectors):
+            if key not in rows:
+                new.setdefault(key, vector)
+        if not new:
+            return
+        dim = vectors.shape[1]
+        if self._matrix is not None and self._matrix.shape[1] != dim:
+            raise ValueError(f"Embedding dimension {dim} does not match store dimension {self._matrix.shape[1]}")
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        count = len(self._keys)
+        block = np.stack(list(new.values())).astype(self.dtype)
+        replaced = None
+        if self._matrix is None or self._matrix.shape[0] < count + len(new):
+            # Full: copy into a file with twice the room, so growing is amortised O(1) per row
+            replaced = self._file if self._matrix is not None else None
+            old = self._matrix[:count] if self._matrix is not None else np.empty((0, dim), dtype=self.dtype)
+            self._new_matrix(old, 2 * (count + len(new)))
+        # Rows past the committed count are invisible to readers until the index names them
+        out = np.load(self.directory / self._file, mmap_mode='r+')
+        out[count:count + len(new)] = block
+        out.flush()
+        del out
+        self._keys = self._keys + list(new)
+        self._refs = self._refs + [0] * len(new)
+        self._commit(replaced)
+
+    def retain(self, scope: str, keys: Iterable[str]) -> int:
+        """
+        Record keys as the embeddings the corpus identified by scope (its
+        resolved directory) uses, and drop every row that no corpus uses any
+        more; corpora whose directory is gone no longer count. Returns the
+        number of rows dropped.
+        """
+        if not self.rows:
+            return 0
+        scopes = list(self._scopes)
+        dead = 0
+        for slot, other in enumerate(scopes):
+            if other is not None and other != scope and not os.path.isdir(other):
+                scopes[slot] = None
+                dead |= 1 << slot
+        if scope not in scopes:
+            slot = scopes.index(None) if None in scopes else len(scopes)
+            scopes[slot:slot + 1] = [scope]
+        bit = 1 << scopes.index(scope)
+        wanted = set(keys)
+        refs = [((ref & ~dead) | bit) if key in wanted else (ref & ~dead & ~bit)
+                for key, ref in zip(self._keys, self._refs)]
+        if refs == self._refs and scopes == self._scopes:
+            return 0
+        keep = [row for row, ref in enumerate(refs) if ref]
+        dropped = len(refs) - len(keep)
+        replaced = None
+        if dropped:
+            replaced = self._file
+            self._new_matrix(np.asarray(self._matrix[keep]), 2 * len(keep))
+            self._keys = [self._keys[row] for row in keep]
+            refs = [refs[row] for row in keep]
+        self._refs, self._scopes = refs, scopes
+        self._commit(replaced)
+        return dropped
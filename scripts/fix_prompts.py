@@ -3,11 +3,11 @@
 
 import os
 import sys
-import glob
 from pathlib import Path
 import frontmatter
 import re
 from typing import Dict, Any, Optional
+from prompt_corpus import PromptCorpus, PromptDocument, load_corpus, load_prompt
 
 def extract_title_from_content(content: str) -> Optional[str]:
     """Extract title from the first heading in content."""
@@ -52,12 +52,17 @@ def fix_version_type(version: Any) -> str:
 def fix_prompt_file(file_path: str) -> bool:
     """Fix a single prompt file format."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # Try to load existing frontmatter
-        post = frontmatter.loads(content)
-        metadata = post.metadata if post.metadata else {}
+        post = load_prompt(file_path)
+    except Exception as e:
+        print(f"Erro ao processar {file_path}: {str(e)}")
+        return False
+    return fix_prompt_document(post)
+
+def fix_prompt_document(post: PromptDocument) -> bool:
+    """Fix the format of an already loaded prompt and write it back."""
+    file_path = str(post.path)
+    try:
+        metadata = dict(post.metadata) if post.metadata else {}
         
         # Fix or add required fields
         if 'title' not in metadata or not metadata['title']:
@@ -97,27 +102,33 @@ def fix_prompt_file(file_path: str) -> bool:
         print(f"Erro ao processar {file_path}: {str(e)}")
         return False
 
-def main():
-    """Main function to fix all prompts."""
+def run(corpus: Optional[PromptCorpus] = None) -> int:
+    """Fix all prompts, or those of an already loaded corpus; returns the exit code."""
     try:
-        prompts_dir = Path('prompts')
-        if not prompts_dir.exists():
-            print(f"❌ Erro: Diretório {prompts_dir} não encontrado")
-            sys.exit(1)
+        if corpus is None:
+            prompts_dir = Path('prompts')
+            if not prompts_dir.exists():
+                print(f"❌ Erro: Diretório {prompts_dir} não encontrado")
+                return 1
+            corpus = load_corpus(str(prompts_dir))
 
-        files = glob.glob(str(prompts_dir / '**/*.md'), recursive=True)
+        files = corpus.paths
         if not files:
             print("❌ Erro: Nenhum arquivo de prompt encontrado")
-            sys.exit(1)
+            return 1
 
         print(f"\n🔧 Corrigindo {len(files)} arquivos de prompt...\n")
         
         success_count = 0
         error_count = 0
         
-        for file_path in files:
-            print(f"Processando: {os.path.relpath(file_path)}")
-            if fix_prompt_file(file_path):
+        for file_path, error in corpus.errors.items():
+            print(f"Erro ao processar {file_path}: {error}")
+            error_count += 1
+        
+        for post in corpus:
+            print(f"Processando: {os.path.relpath(post.path)}")
+            if fix_prompt_document(post):
                 success_count += 1
             else:
                 error_count += 1
@@ -129,14 +140,18 @@ def main():
         print(f"❌ Erros: {error_count}")
         
         if error_count > 0:
-            sys.exit(1)
+            return 1
         
         print("\n✅ Todos os prompts foram processados!")
-        sys.exit(0)
+        return 0
     
     except Exception as e:
         print(f"\n❌ Erro durante o processo: {str(e)}")
-        sys.exit(1)
+        return 1
+
+def main():
+    """Main function to fix all prompts."""
+    sys.exit(run())
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
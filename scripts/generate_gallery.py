@@ -2,16 +2,27 @@
 # -*- coding: utf-8 -*-
 
 import os
+import re
 import sys
 import json
-import frontmatter
-import glob
+import gzip
+import unicodedata
 from pathlib import Path
 import html
 from datetime import datetime
+from typing import List, Dict, Any, Optional
+from prompt_corpus import PromptCorpus, PromptDocument, load_corpus, load_prompt
+from text_index import build_client_index
 
-def find_prompt_files():
-    """Find all prompt markdown files in the prompts directory."""
+OUTPUT_DIR = Path('docs/assets/data')
+INDEX_FILE = 'gallery-index.json'
+SEARCH_INDEX_FILE = 'search-index.json'
+CONTENT_DIR = 'content'
+# Content shards are split per category and kept under this many bytes where possible
+SHARD_BYTES = 64 * 1024
+
+def find_prompt_files() -> PromptCorpus:
+    """Find and load all prompt markdown files in the prompts directory."""
     print("Starting to find prompt files...")
     prompts_dir = Path('prompts')
     if not prompts_dir.exists():
@@ -19,51 +30,68 @@ def find_prompt_files():
         sys.exit(1)
     
     print(f"Searching in {prompts_dir.absolute()}")
-    files = glob.glob(str(prompts_dir / '**/*.md'), recursive=True)
-    print(f"Found {len(files)} prompt files")
-    for file in files:
+    corpus = load_corpus(str(prompts_dir))
+    print(f"Found {len(corpus.paths)} prompt files")
+    for file in corpus.paths:
         print(f"Found file: {file}")
-    return files
+    for file, error in corpus.errors.items():
+        print(f"Error processing file {file}: {error}", file=sys.stderr)
+    return corpus
+
+def prompt_id(file_path) -> str:
+    """Stable gallery id of a prompt: its path under prompts/ without the suffix."""
+    path = Path(file_path)
+    try:
+        path = path.relative_to('prompts')
+    except ValueError:
+        pass
+    return path.with_suffix('').as_posix()
 
 def process_prompt_file(file_path):
     """Extract metadata and content from a prompt file."""
+    try:
+        return process_prompt_document(load_prompt(file_path))
+    except Exception as e:
+        print(f"Error processing file {file_path}: {str(e)}", file=sys.stderr)
+        return None
+
+def process_prompt_document(post: PromptDocument):
+    """Extract gallery data from an already loaded prompt."""
+    file_path = str(post.path)
     try:
         print(f"\nProcessing file: {file_path}")
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            print(f"File content length: {len(content)} bytes")
-            if not content.strip():
-                print(f"Warning: Empty file {file_path}")
-                return None
+        print(f"File content length: {post.size} bytes")
+        if not post.metadata and not post.content.strip():
+            print(f"Warning: Empty file {file_path}")
+            return None
+        
+        if not post.has_frontmatter:
+            print(f"Warning: File {file_path} does not have frontmatter")
+            return None
             
-            if not content.startswith('---'):
-                print(f"Warning: File {file_path} does not have frontmatter")
-                return None
-                
-            post = frontmatter.loads(content)
-            if not post.metadata:
-                print(f"Warning: No metadata found in {file_path}")
-                return None
+        if not post.metadata:
+            print(f"Warning: No metadata found in {file_path}")
+            return None
         
         # Get file modification time for the date
-        mtime = os.path.getmtime(file_path)
-        date = datetime.fromtimestamp(mtime).strftime('%d/%m/%Y')
+        date = datetime.fromtimestamp(post.mtime).strftime('%d/%m/%Y')
         
         # Validate required fields
         required_fields = ['title', 'description', 'category', 'model']
-        missing_fields = [field for field in required_fields if not post.get(field)]
+        missing_fields = [field for field in required_fields if not post.metadata.get(field)]
         if missing_fields:
             print(f"Warning: Missing required fields in {file_path}: {missing_fields}")
             return None
         
         prompt_data = {
-            'title': str(post.get('title', 'Untitled')),
-            'description': str(post.get('description', '')),
-            'tags': post.get('tags', []),
-            'model': str(post.get('model', 'GPT-4')),
-            'category': str(post.get('category', 'Geral')),
-            'type': str(post.get('type', 'General')),
-            'version': str(post.get('version', '1.0')),
+            'id': prompt_id(file_path),
+            'title': str(post.metadata.get('title', 'Untitled')),
+            'description': str(post.metadata.get('description', '')),
+            'tags': post.metadata.get('tags', []),
+            'model': str(post.metadata.get('model', 'GPT-4')),
+            'category': str(post.metadata.get('category', 'Geral')),
+            'type': str(post.metadata.get('type', 'General')),
+            'version': str(post.metadata.get('version', '1.0')),
             'date': date,
             'content': post.content.strip()
         }
@@ -75,22 +103,23 @@ def process_prompt_file(file_path):
         print(f"Error processing file {file_path}: {str(e)}", file=sys.stderr)
         return None
 
-def generate_gallery_data():
-    """Generate JSON data for the gallery."""
+def generate_gallery_data(corpus: Optional[PromptCorpus] = None):
+    """Generate JSON data for the gallery from all prompts or an already loaded corpus."""
     print("\nStarting gallery data generation...")
-    prompt_files = find_prompt_files()
+    if corpus is None:
+        corpus = find_prompt_files()
     
-    if not prompt_files:
+    if not corpus.paths:
         print("No prompt files found!")
         return
     
     prompts = []
-    for file in prompt_files:
-        result = process_prompt_file(file)
+    for post in corpus:
+        result = process_prompt_document(post)
         if result:
             prompts.append(result)
     
-    print(f"\nSuccessfully processed {len(prompts)} out of {len(prompt_files)} files")
+    print(f"\nSuccessfully processed {len(prompts)} out of {len(corpus.paths)} files")
     
     if not prompts:
         print("Warning: No valid prompts found!")
@@ -103,33 +132,93 @@ def generate_gallery_data():
     print(f"\nFound categories: {categories}")
     print(f"Found models: {models}")
     
-    gallery_data = {
+    write_gallery_files(prompts, categories, models)
+
+def slugify(text: str) -> str:
+    """ASCII file-name slug of a category."""
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-') or 'geral'
+
+def shard_prompts(prompts: List[Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+    """Group prompt contents into per-category shards of at most SHARD_BYTES each."""
+    shards: Dict[str, Dict[str, str]] = {}
+    sizes: Dict[str, int] = {}
+    counters: Dict[str, int] = {}
+    for prompt in sorted(prompts, key=lambda p: (p['category'], p['id'])):
+        category = slugify(prompt['category'])
+        name = f"{category}-{counters.get(category, 0)}"
+        size = len(prompt['content'].encode('utf-8'))
+        if name in shards and sizes[name] + size > SHARD_BYTES:
+            counters[category] = counters.get(category, 0) + 1
+            name = f"{category}-{counters[category]}"
+        shards.setdefault(name, {})[prompt['id']] = prompt['content']
+        sizes[name] = sizes.get(name, 0) + size
+        prompt['shard'] = name
+    return shards
+
+def write_compressed(path: Path, data: bytes) -> None:
+    """Write a file plus precompressed .gz and, when brotli is installed, .br copies."""
+    path.write_bytes(data)
+    with open(str(path) + '.gz', 'wb') as f:
+        # mtime=0 keeps the output byte-identical between builds
+        with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=9, mtime=0) as gz:
+            gz.write(data)
+    try:
+        import brotli
+    except ImportError:
+        return
+    Path(str(path) + '.br').write_bytes(brotli.compress(data, quality=11))
+
+def write_gallery_files(prompts: List[Dict[str, Any]], categories: List[str], models: List[str]) -> None:
+    """
+    Write the metadata-only index the gallery renders from, and the content
+    shards it fetches on demand, each with precompressed copies.
+    """
+    shards = shard_prompts(prompts)
+    content_dir = OUTPUT_DIR / CONTENT_DIR
+    content_dir.mkdir(parents=True, exist_ok=True)
+    for stale in content_dir.glob('*.json*'):
+        stale.unlink()
+    
+    for name, contents in shards.items():
+        data = json.dumps(contents, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        write_compressed(content_dir / f"{name}.json", data)
+    
+    index = {
         'categories': categories,
         'models': models,
-        'prompts': prompts
+        'prompts': [{key: value for key, value in prompt.items() if key != 'content'} for prompt in prompts]
     }
+    index_file = OUTPUT_DIR / INDEX_FILE
+    data = json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    write_compressed(index_file, data)
     
-    # Save to JSON file
-    output_file = Path('docs/assets/data/gallery.json')
-    output_file.parent.mkdir(parents=True, exist_ok=True)
-    
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(gallery_data, f, ensure_ascii=False, indent=2)
+    # Document numbers in the search index are positions in index['prompts']
+    search_index = build_client_index(prompts)
+    search_file = OUTPUT_DIR / SEARCH_INDEX_FILE
+    search_data = json.dumps(search_index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    write_compressed(search_file, search_data)
     
-    print(f"\nSuccessfully generated gallery data with {len(prompts)} prompts")
-    print(f"Output file: {output_file.absolute()}")
+    print(f"\nSuccessfully generated gallery data with {len(prompts)} prompts in {len(shards)} content shards")
+    print(f"Index file: {index_file.absolute()} ({len(data)} bytes)")
+    print(f"Search index: {search_file.absolute()} ({len(search_index['terms'])} terms, {len(search_data)} bytes)")
 
-def main():
-    """Main function to generate the gallery data."""
+def run(corpus: Optional[PromptCorpus] = None) -> int:
+    """Generate the gallery data; returns the exit code."""
     try:
         print("Starting gallery data generation process...")
         print(f"Current working directory: {os.getcwd()}")
         print(f"Python version: {sys.version}")
-        generate_gallery_data()
+        generate_gallery_data(corpus)
         print("Gallery data generation completed successfully!")
+        return 0
     except Exception as e:
         print(f"Error during gallery data generation: {str(e)}", file=sys.stderr)
-        sys.exit(1)
+        return 1
+
+def main():
+    """Main function to generate the gallery data."""
+    sys.exit(run())
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
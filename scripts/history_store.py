@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+from pathlib import Path
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+import numpy as np
+
+SCORE_COLUMNS = {'prompt': np.uint32, 'criterion': np.uint16, 'score': np.float32}
+TIMING_COLUMNS = {'prompt': np.uint32, 'model': np.uint16, 'execution_time': np.float32,
+                  'error_rate': np.float32, 'token_count': np.uint32}
+
+def _save_npz(path: Path, **columns) -> None:
+    tmp = path.with_name(path.stem + '.tmp.npz')
+    np.savez_compressed(tmp, **columns)
+    os.replace(tmp, path)
+
+class HistoryStore:
+    """
+    Columnar history of benchmark runs. Prompts, criteria and models are
+    dictionary-encoded as small integers in dictionary.json; each run is
+    appended as a compressed .npz segment of parallel columns, and segments of
+    past months are compacted into one partition per month. Rows are grouped
+    by run, so the run column is stored as (run id, row count) pairs.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.dictionary_file = self.directory / 'dictionary.json'
+        self._dictionary: Optional[Dict[str, Any]] = None
+
+    @property
+    def dictionary(self) -> Dict[str, Any]:
+        if self._dictionary is None:
+            try:
+                with open(self.dictionary_file, 'r', encoding='utf-8') as f:
+                    self._dictionary = json.load(f)
+            except FileNotFoundError:
+                self._dictionary = {'runs': [], 'prompts': [], 'criteria': [], 'models': []}
+        return self._dictionary
+
+    @property
+    def runs(self) -> List[Dict[str, Any]]:
+        """Every recorded run: id, ISO timestamp and label, oldest first."""
+        return self.dictionary['runs']
+
+    def _code(self, kind: str, value: str, codes: Dict[str, int]) -> int:
+        if value not in codes:
+            codes[value] = len(self.dictionary[kind])
+            self.dictionary[kind].append(value)
+        return codes[value]
+
+    def _save_dictionary(self) -> None:
+        tmp = self.dictionary_file.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.dictionary, f, ensure_ascii=False)
+        os.replace(tmp, self.dictionary_file)
+
+    def append(self, records: Iterable[Tuple[str, Dict[str, Dict[str, Any]]]],
+               timestamp: Optional[datetime] = None, label: Optional[str] = None) -> int:
+        """Append one run's serialized per-prompt results; returns its run id."""
+        timestamp = timestamp or datetime.now()
+        codes = {kind: {value: i for i, value in enumerate(self.dictionary[kind])}
+                 for kind in ('prompts', 'criteria', 'models')}
+        scores = {name: [] for name in SCORE_COLUMNS}
+        timings = {name: [] for name in TIMING_COLUMNS}
+
+        for file_path, results in records:
+            prompt = self._code('prompts', file_path, codes['prompts'])
+            for criterion, result in results.items():
+                scores['prompt'].append(prompt)
+                scores['criterion'].append(self._code('criteria', criterion, codes['criteria']))
+                scores['score'].append(result['score'])
+                for model_result in result.get('model_results') or []:
+                    timings['prompt'].append(prompt)
+                    timings['model'].append(self._code('models', model_result['model'], codes['models']))
+                    timings['execution_time'].append(model_result['execution_time'])
+                    timings['error_rate'].append(model_result['error_rate'])
+                    timings['token_count'].append(model_result['token_count'])
+
+        run_id = self.runs[-1]['id'] + 1 if self.runs else 0
+        segments = self.directory / 'segments'
+        segments.mkdir(parents=True, exist_ok=True)
+        # A segment already carrying this id was left by an append that crashed before listing its run
+        for stale in segments.glob(f"*-run{run_id:06d}.npz"):
+            stale.unlink()
+        # New codes are saved before the segment that uses them; the run itself is listed once its segment exists
+        self._save_dictionary()
+        columns = {f"scores_{name}": np.asarray(values, dtype=SCORE_COLUMNS[name]) for name, values in scores.items()}
+        columns.update({f"timings_{name}": np.asarray(values, dtype=TIMING_COLUMNS[name])
+                        for name, values in timings.items()})
+        _save_npz(segments / f"{timestamp:%Y-%m}-run{run_id:06d}.npz",
+                  runs=np.array([run_id], dtype=np.uint32),
+                  score_counts=np.array([len(scores['score'])], dtype=np.uint32),
+                  timing_counts=np.array([len(timings['prompt'])], dtype=np.uint32),
+                  **columns)
+        self.runs.append({'id': run_id, 'timestamp': timestamp.isoformat(timespec='seconds'), 'label': label})
+        self._save_dictionary()
+        self.compact(before=f"{timestamp:%Y-%m}")
+        return run_id
+
+    def compact(self, before: str) -> None:
+        """Merge the segments of every month earlier than `before` (YYYY-MM) into monthly partitions."""
+        segments = self.directory / 'segments'
+        months: Dict[str, List[Path]] = {}
+        for path in sorted(segments.glob('*-run*.npz')) if segments.exists() else []:
+            month = path.name[:7]
+            if month < before:
+                months.setdefault(month, []).append(path)
+        for month, paths in months.items():
+            partition = self.directory / f"part-{month}.npz"
+            parts = ([partition] if partition.exists() else []) + paths
+            _save_npz(partition, **self._concatenate([self._read(path) for path in parts]))
+            for path in paths:
+                path.unlink()
+
+    @staticmethod
+    def _read(path: Path) -> Dict[str, np.ndarray]:
+        with np.load(path) as data:
+            return dict(data)
+
+    @staticmethod
+    def _concatenate(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]} if parts else {}
+
+    def _files(self) -> List[Path]:
+        return sorted(self.directory.glob('part-*.npz')) + sorted((self.directory / 'segments').glob('*-run*.npz'))
+
+    def load(self, table: str = 'scores') -> Dict[str, np.ndarray]:
+        """
+        All rows of the 'scores' or 'timings' table as encoded columns, with the
+        run column expanded from its (run, count) pairs. Rows of runs missing
+        from the dictionary, left by an interrupted append, are skipped.
+        """
+        columns = SCORE_COLUMNS if table == 'scores' else TIMING_COLUMNS
+        known = np.array([run['id'] for run in self.runs], dtype=np.int64)
+        parts = []
+        for path in self._files():
+            try:
+                with np.load(path) as data:
+                    part = {name: data[f"{table}_{name}"] for name in columns}
+                    part['run'] = np.repeat(data['runs'], data[f"{table[:-1]}_counts"])
+            except Exception as e:
+                print(f"Warning: skipping unreadable history file {path}: {e}", file=sys.stderr)
+                continue
+            listed = np.isin(part['run'], known)
+            if not listed.all():
+                unknown = sorted(set(part['run'][~listed].tolist()))
+                print(f"Warning: skipping rows of unrecorded runs {unknown} in {path}", file=sys.stderr)
+                part = {name: values[listed] for name, values in part.items()}
+            parts.append(part)
+        if not parts:
+            empty = {name: np.zeros(0, dtype=dtype) for name, dtype in columns.items()}
+            empty['run'] = np.zeros(0, dtype=np.uint32)
+            return empty
+        return self._concatenate(parts)
+
+    def frame(self, table: str = 'scores'):
+        """pandas DataFrame of a table with decoded prompt, criterion/model and run timestamps."""
+        import pandas as pd
+        columns = self.load(table)
+        df = pd.DataFrame(columns)
+        timestamps = np.array([run['timestamp'] for run in self.runs], dtype='datetime64[s]')
+        run_positions = np.zeros(self.runs[-1]['id'] + 1 if self.runs else 0, dtype=np.int64)
+        run_positions[[run['id'] for run in self.runs]] = np.arange(len(self.runs))
+        df['timestamp'] = timestamps[run_positions[columns['run']]]
+        df['prompt'] = pd.Categorical.from_codes(columns['prompt'].astype(np.int64), self.dictionary['prompts'])
+        key, kind = ('criterion', 'criteria') if table == 'scores' else ('model', 'models')
+        df[key] = pd.Categorical.from_codes(columns[key].astype(np.int64), self.dictionary[kind])
+        return df
+
+    def regressions(self, table: str = 'scores', window: int = 7,
+                    tolerance: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Prompts whose latest value moved the wrong way against the median of their
+        previous `window` runs by more than `tolerance`: an absolute score drop
+        (default 0.1) or a relative execution time increase (default 0.5).
+        """
+        if tolerance is None:
+            tolerance = 0.1 if table == 'scores' else 0.5
+        columns = self.load(table)
+        if not len(columns['run']):
+            return []
+        key, kind, value = (('criterion', 'criteria', 'score') if table == 'scores'
+                            else ('model', 'models', 'execution_time'))
+        names = self.dictionary[kind]
+        latest = columns['run'].max()
+        order = np.lexsort((columns['run'], columns[key], columns['prompt']))
+        prompt, group, run, values = (columns['prompt'][order], columns[key][order],
+                                      columns['run'][order], columns[value][order])
+        boundaries = np.flatnonzero((np.diff(prompt) != 0) | (np.diff(group) != 0)) + 1
+        found = []
+        for start, end in zip(np.r_[0, boundaries], np.r_[boundaries, len(run)]):
+            if run[end - 1] != latest or end - start < 2:
+                continue
+            baseline = float(np.median(values[max(start, end - 1 - window):end - 1]))
+            current = float(values[end - 1])
+            change = baseline - current if table == 'scores' else (current - baseline) / baseline if baseline else 0.0
+            if change > tolerance:
+                found.append({'prompt': self.dictionary['prompts'][prompt[start]], key: names[group[start]],
+                              'baseline': baseline, 'latest': current})
+        return found
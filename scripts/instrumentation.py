@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import json
+import time
+import heapq
+import contextlib
+import contextvars
+from typing import List, Dict, Any, Optional, Tuple
+
+# Upper bounds of the histogram buckets in milliseconds; a last bucket holds everything slower
+BUCKETS_MS = [0.01, 0.03, 0.1, 0.3, 1, 3, 10, 30, 100, 300, 1000, 3000, 10000, 30000]
+SLOWEST = 5
+
+# (category, name, start, duration, prompt, pid, lane, args)
+Span = Tuple[str, str, float, float, Optional[str], int, int, Optional[Dict[str, Any]]]
+
+_prompt: contextvars.ContextVar = contextvars.ContextVar('instrumentation_prompt', default=None)
+_lane: contextvars.ContextVar = contextvars.ContextVar('instrumentation_lane', default=0)
+_active: Optional['Instrumentation'] = None
+_disabled = contextlib.nullcontext()
+
+class Instrumentation:
+    """
+    Durations of named spans (category/name), kept per span for histograms
+    and, when tracing, as individual events for a Chrome/Perfetto trace.
+    The prompt a span belongs to comes from the enclosing lane(), so
+    evaluators do not need to pass it around.
+    """
+
+    def __init__(self, trace: bool = False):
+        self.trace = trace
+        self.origin = time.perf_counter()
+        self.durations: Dict[Tuple[str, str], List[float]] = {}
+        self.slowest: Dict[Tuple[str, str], List[Tuple[float, str]]] = {}
+        self.prompt_totals: Dict[str, float] = {}
+        self.events: List[Span] = []
+        self._free_lanes: List[int] = []
+        self._lanes = 0
+
+    def record(self, category: str, name: str, start: float, duration: float, prompt: Optional[str] = None,
+               pid: Optional[int] = None, lane: Optional[int] = None, args: Optional[Dict[str, Any]] = None) -> None:
+        key = (category, name)
+        durations = self.durations.get(key)
+        if durations is None:
+            durations = self.durations[key] = []
+        durations.append(duration)
+        if prompt is not None:
+            heap = self.slowest.setdefault(key, [])
+            if len(heap) < SLOWEST:
+                heapq.heappush(heap, (duration, prompt))
+            elif duration > heap[0][0]:
+                heapq.heapreplace(heap, (duration, prompt))
+            if category == 'evaluator':
+                self.prompt_totals[prompt] = self.prompt_totals.get(prompt, 0.0) + duration
+        if self.trace:
+            self.events.append((category, name, start, duration, prompt, pid or os.getpid(),
+                                _lane.get() if lane is None else lane, args))
+
+    @contextlib.contextmanager
+    def span(self, category: str, name: str, prompt: Optional[str] = None, **args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(category, name, start, time.perf_counter() - start,
+                        prompt if prompt is not None else _prompt.get(), args=args or None)
+
+    @contextlib.contextmanager
+    def lane(self, prompt: Optional[str] = None):
+        """
+        A trace track for one concurrent task, reused once the task is done so
+        the trace has as many tracks as tasks ever ran at once. Spans inside
+        are attributed to prompt.
+        """
+        if self._free_lanes:
+            lane = heapq.heappop(self._free_lanes)
+        else:
+            self._lanes += 1
+            lane = self._lanes
+        lane_token = _lane.set(lane)
+        prompt_token = _prompt.set(prompt) if prompt is not None else None
+        try:
+            yield
+        finally:
+            if prompt_token is not None:
+                _prompt.reset(prompt_token)
+            _lane.reset(lane_token)
+            heapq.heappush(self._free_lanes, lane)
+
+    def merge(self, spans: List[Span]) -> None:
+        """Add spans recorded by another process, e.g. a static-evaluator worker."""
+        for category, name, start, duration, prompt, pid, lane, args in spans:
+            self.record(category, name, start, duration, prompt, pid, lane, args)
+
+    def drain(self) -> List[Span]:
+        """Recorded events, removed from this instance; workers send them back with their results."""
+        events, self.events = self.events, []
+        return events
+
+    def histograms(self, slowest_prompts: int = 10) -> Dict[str, Any]:
+        """Per-span counts, totals, percentiles, bucket counts and slowest prompts, for the JSON report."""
+        import numpy as np
+        spans = {}
+        for (category, name), durations in sorted(self.durations.items()):
+            values = np.array(durations) * 1000
+            p50, p90, p99 = np.percentile(values, [50, 90, 99])
+            spans[f"{category}/{name}"] = {
+                "count": len(values),
+                "total_s": float(values.sum()) / 1000,
+                "mean_ms": float(values.mean()),
+                "p50_ms": float(p50),
+                "p90_ms": float(p90),
+                "p99_ms": float(p99),
+                "max_ms": float(values.max()),
+                "histogram": np.bincount(np.searchsorted(BUCKETS_MS, values), minlength=len(BUCKETS_MS) + 1).tolist(),
+                "slowest": [{"prompt": prompt, "ms": duration * 1000}
+                            for duration, prompt in sorted(self.slowest.get((category, name), []), reverse=True)]
+            }
+        return {
+            "bucket_bounds_ms": BUCKETS_MS,
+            "spans": spans,
+            "slowest_prompts": [
+                {"prompt": prompt, "evaluator_ms": total * 1000}
+                for prompt, total in heapq.nlargest(slowest_prompts, self.prompt_totals.items(), key=lambda item: item[1])
+            ]
+        }
+
+    def write_trace(self, path: str) -> int:
+        """Write the events in Chrome's trace event format (chrome://tracing, ui.perfetto.dev); returns the count."""
+        main_pid = os.getpid()
+        events = []
+        pids = {}
+        for category, name, start, duration, prompt, pid, lane, args in self.events:
+            event = {"name": name, "cat": category, "ph": "X", "ts": (start - self.origin) * 1e6,
+                     "dur": duration * 1e6, "pid": pid, "tid": lane}
+            if prompt is not None or args:
+                event["args"] = dict(args or {}, **({"prompt": prompt} if prompt is not None else {}))
+            events.append(event)
+            pids.setdefault(pid, set()).add(lane)
+        for pid, lanes in pids.items():
+            events.append({"name": "process_name", "ph": "M", "pid": pid,
+                           "args": {"name": "benchmark" if pid == main_pid else f"static worker {pid}"}})
+            for lane in lanes:
+                events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": lane,
+                               "args": {"name": "main" if lane == 0 else f"task {lane}"}})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(self.events)
+
+def activate(instrumentation: Optional[Instrumentation]) -> None:
+    """Make instrumentation the one span() and lane() record into; None turns recording off."""
+    global _active
+    _active = instrumentation
+
+def active() -> Optional[Instrumentation]:
+    return _active
+
+def span(category: str, name: str, prompt: Optional[str] = None, **args):
+    """Time the enclosed block as category/name; a shared no-op when nothing is active."""
+    if _active is None:
+        return _disabled
+    return _active.span(category, name, prompt, **args)
+
+def lane(prompt: Optional[str] = None):
+    if _active is None:
+        return _disabled
+    return _active.lane(prompt)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import json
+import contextlib
+import tracemalloc
+from typing import List, Dict, Any, Optional, TextIO
+
+MB = 1024 * 1024
+
+# Allocations of the import machinery and of tracemalloc itself are noise here
+_IGNORED = (
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+class MemoryProfiler:
+    """
+    tracemalloc snapshots at phase boundaries. For each phase: the peak of
+    traced memory while it ran, what it left allocated, and the source lines
+    whose allocations grew the most between its first and last snapshot.
+    Only Python-level allocations (including numpy arrays) are traced, and
+    only in this process.
+    """
+
+    def __init__(self, top: int = 10, frames: int = 1):
+        self.top = top
+        self.phases: List[Dict[str, Any]] = []
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        before = self._snapshot()
+        start_current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            after = self._snapshot()
+            growth = [stat for stat in after.compare_to(before, 'lineno') if stat.size_diff > 0][:self.top]
+            self.phases.append({
+                'phase': name,
+                'start_mb': start_current / MB,
+                'peak_mb': peak / MB,
+                'end_mb': current / MB,
+                'top_allocations': [
+                    {
+                        'site': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                        'size_mb': stat.size / MB,
+                        'growth_mb': stat.size_diff / MB,
+                        'blocks': stat.count
+                    }
+                    for stat in growth
+                ]
+            })
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+
+    def as_dict(self) -> Dict[str, Any]:
+        peak = max(self.phases, key=lambda phase: phase['peak_mb'], default=None)
+        return {
+            'peak_mb': peak['peak_mb'] if peak else 0.0,
+            'peak_phase': peak['phase'] if peak else None,
+            'phases': self.phases
+        }
+
+    def print_report(self, out: TextIO = sys.stderr, sites: int = 5) -> None:
+        print("\nMemory profile (tracemalloc, Python allocations only)", file=out)
+        print(f"  {'phase':<12} {'start':>10} {'peak':>10} {'end':>10}", file=out)
+        for phase in self.phases:
+            print(f"  {phase['phase']:<12} {phase['start_mb']:8.1f}MB {phase['peak_mb']:8.1f}MB "
+                  f"{phase['end_mb']:8.1f}MB", file=out)
+            for site in phase['top_allocations'][:sites]:
+                print(f"      +{site['growth_mb']:8.2f}MB  {site['site']}", file=out)
+
+    def write(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+def memory_phase(profiler: Optional[MemoryProfiler], name: str):
+    """profiler.phase(name), or a no-op without a profiler."""
+    return profiler.phase(name) if profiler is not None else contextlib.nullcontext()
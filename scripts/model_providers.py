@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import random
+import asyncio
+from dataclasses import dataclass, field, asdict
+from typing import List, Dict, Any, Optional
+import aiohttp
+from response_cache import ResponseCache, response_key
+
+class ProviderError(Exception):
+    """A model call that failed and should not be retried further."""
+
+@dataclass
+class ProviderConfig:
+    """Connection, concurrency and rate settings for one provider."""
+    name: str
+    base_url: str
+    models: List[str] = field(default_factory=list)
+    api_key_env: Optional[str] = None
+    max_concurrency: int = 4
+    requests_per_second: float = 2.0
+    burst: int = 4
+    timeout: float = 60.0
+    max_retries: int = 3
+    backoff: float = 0.5
+
+    @classmethod
+    def from_dict(cls, name: str, data: Dict[str, Any]) -> 'ProviderConfig':
+        known = {key: value for key, value in data.items() if key in cls.__dataclass_fields__}
+        return cls(name=name, **known)
+
+@dataclass
+class ChatResponse:
+    """Result of one chat completion, including retry bookkeeping."""
+    model: str
+    text: str
+    prompt_tokens: int
+    completion_tokens: int
+    latency: float
+    attempts: int
+    cached: bool = False
+
+class TokenBucket:
+    """Async token bucket: `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+class ProviderClient:
+    """OpenAI-style chat client with a pooled keep-alive session for one provider."""
+
+    def __init__(self, config: ProviderConfig):
+        self.config = config
+        self._semaphore = asyncio.Semaphore(config.max_concurrency)
+        self._bucket = TokenBucket(config.requests_per_second, config.burst)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _headers(self) -> Dict[str, str]:
+        headers = {'Content-Type': 'application/json'}
+        if self.config.api_key_env:
+            api_key = os.environ.get(self.config.api_key_env)
+            if not api_key:
+                raise ProviderError(f"{self.config.api_key_env} is not set for provider {self.config.name}")
+            headers['Authorization'] = f"Bearer {api_key}"
+        return headers
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.config.max_concurrency, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.config.timeout),
+                headers=self._headers()
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return self.config.backoff * (2 ** attempt) * (0.5 + random.random())
+
+    async def chat(self, model: str, prompt: str, temperature: float = 0.7, max_tokens: int = 500) -> ChatResponse:
+        """Send one chat completion, retrying timeouts, 429s and 5xx with exponential backoff."""
+        payload = {
+            'model': model,
+            'messages': [{'role': 'user', 'content': prompt}],
+            'temperature': temperature,
+            'max_tokens': max_tokens
+        }
+        url = self.config.base_url.rstrip('/') + '/chat/completions'
+        async with self._semaphore:
+            last_error = None
+            for attempt in range(self.config.max_retries + 1):
+                await self._bucket.acquire()
+                start_time = time.perf_counter()
+                try:
+                    async with self.session.post(url, json=payload) as response:
+                        if response.status in RETRY_STATUSES:
+                            last_error = ProviderError(f"HTTP {response.status} from {self.config.name}")
+                            await asyncio.sleep(self._retry_delay(attempt, response.headers.get('Retry-After')))
+                            continue
+                        if response.status >= 400:
+                            raise ProviderError(f"HTTP {response.status} from {self.config.name}: {await response.text()}")
+                        data = await response.json()
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    last_error = e
+                    await asyncio.sleep(self._retry_delay(attempt))
+                    continue
+
+                usage = data.get('usage', {})
+                return ChatResponse(
+                    model=model,
+                    text=data['choices'][0]['message']['content'],
+                    prompt_tokens=usage.get('prompt_tokens', 0),
+                    completion_tokens=usage.get('completion_tokens', 0),
+                    latency=time.perf_counter() - start_time,
+                    attempts=attempt + 1
+                )
+            raise ProviderError(f"{self.config.name} failed after {self.config.max_retries + 1} attempts: {last_error}")
+
+class ProviderPool:
+    """
+    Routes each model to its provider's client, answering from the response
+    cache when possible. In replay mode a cache miss is an error, never a request.
+    """
+
+    def __init__(self, providers: List[ProviderConfig], cache: Optional[ResponseCache] = None, replay: bool = False):
+        if replay and cache is None:
+            raise ValueError("Replay mode needs a response cache")
+        self.clients = {config.name: ProviderClient(config) for config in providers}
+        self._by_model = {model: self.clients[config.name] for config in providers for model in config.models}
+        self.cache = cache
+        self.replay = replay
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], base_url: Optional[str] = None, replay: bool = False,
+                    use_cache: bool = True) -> 'ProviderPool':
+        """Build from the `providers` section; base_url sends every provider to one server."""
+        providers = []
+        for name, data in (config.get('providers') or {}).items():
+            provider = ProviderConfig.from_dict(name, data)
+            if base_url:
+                # A separate name keeps stub responses apart from real ones in the cache
+                provider.name = f"stub-{name}"
+                provider.base_url = base_url
+                provider.api_key_env = None
+            providers.append(provider)
+        cache = ResponseCache.from_config(config) if use_cache or replay else None
+        if replay and cache is None:
+            cache = ResponseCache()
+        return cls(providers, cache, replay)
+
+    def client_for(self, model: str) -> ProviderClient:
+        client = self._by_model.get(model)
+        if client is None:
+            raise ProviderError(f"No provider configured for model {model}")
+        return client
+
+    async def chat(self, model: str, prompt: str, temperature: float = 0.7, max_tokens: int = 500) -> ChatResponse:
+        client = self.client_for(model)
+        key = None
+        if self.cache is not None:
+            params = {'temperature': temperature, 'max_tokens': max_tokens}
+            key = response_key(client.config.name, model, prompt, params)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return ChatResponse(cached=True, **cached)
+        if self.replay:
+            raise ProviderError(f"No cached response for {model} (replay mode)")
+
+        response = await client.chat(model, prompt, temperature, max_tokens)
+        if key is not None:
+            data = asdict(response)
+            del data['cached']
+            self.cache.put(key, data)
+        return response
+
+    async def close(self) -> None:
+        await asyncio.gather(*(client.close() for client in self.clients.values()))
+        if self.cache is not None:
+            self.cache.close()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, without sorting everything."""
+    if k <= 0 or len(scores) == 0:
+        return np.zeros(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+class NeighbourIndex:
+    """
+    Nearest neighbours by cosine similarity over unit-length embeddings.
+    'exact' scores every prompt in row blocks; 'ivf' clusters the embeddings
+    and only scores the clusters closest to the query.
+    """
+
+    def __init__(self, ids: List[str], embeddings: np.ndarray, method: str = 'auto',
+                 block_size: int = 1024, n_lists: Optional[int] = None, n_probe: int = 8,
+                 approximate_above: int = 20000, seed: int = 0):
+        if method not in ('auto', 'exact', 'ivf'):
+            raise ValueError(f"Unknown neighbour search method: {method}")
+        self.ids = list(ids)
+        self.embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.positions: Dict[str, int] = {prompt_id: i for i, prompt_id in enumerate(self.ids)}
+        self.block_size = block_size
+        self.n_probe = n_probe
+        if method == 'auto':
+            method = 'ivf' if len(self.ids) >= approximate_above else 'exact'
+        self.method = method
+        self._total = self.embeddings.sum(axis=0)
+        # Selected neighbours of every row of each computed block, by (block start, k, threshold)
+        self._blocks: Dict[tuple, List[Tuple[np.ndarray, np.ndarray]]] = {}
+        if method == 'ivf':
+            self._build_ivf(n_lists or max(1, int(np.sqrt(len(self.ids)))), seed)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _build_ivf(self, n_lists: int, seed: int, iterations: int = 10) -> None:
+        """Spherical k-means into n_lists inverted lists."""
+        rng = np.random.default_rng(seed)
+        n_lists = min(n_lists, len(self.ids))
+        centroids = self.embeddings[rng.choice(len(self.ids), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assign = self._assign(centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, self.embeddings)
+            norms = np.linalg.norm(sums, axis=1)
+            filled = norms > 0
+            centroids[filled] = sums[filled] / norms[filled, None]
+        assign = self._assign(centroids)
+        order = np.argsort(assign, kind='stable')
+        bounds = np.searchsorted(assign[order], np.arange(n_lists + 1))
+        self._centroids = centroids
+        self._lists = [order[bounds[c]:bounds[c + 1]] for c in range(n_lists)]
+
+    def _assign(self, centroids: np.ndarray) -> np.ndarray:
+        assign = np.empty(len(self.ids), dtype=np.int64)
+        for start in range(0, len(self.ids), self.block_size):
+            block = self.embeddings[start:start + self.block_size] @ centroids.T
+            assign[start:start + self.block_size] = block.argmax(axis=1)
+        return assign
+
+    @staticmethod
+    def _select(scores: np.ndarray, candidates: Optional[np.ndarray], k: int, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        # Top-k plus everything above the threshold, best first
+        best = top_k(scores, k)
+        above = np.flatnonzero(scores > threshold)
+        if len(above) > len(best):
+            best = above[np.argsort(-scores[above], kind='stable')]
+        elif len(above):
+            best = np.union1d(best, above)
+            best = best[np.argsort(-scores[best], kind='stable')]
+        best = best[np.isfinite(scores[best])]
+        indices = best if candidates is None else candidates[best]
+        return indices, scores[best]
+
+    def _search_ivf(self, query: np.ndarray, k: int, threshold: float, exclude: int = -1) -> Tuple[np.ndarray, np.ndarray]:
+        probe = top_k(self._centroids @ query, self.n_probe)
+        candidates = np.concatenate([self._lists[c] for c in probe])
+        scores = self.embeddings[candidates] @ query
+        scores[candidates == exclude] = -np.inf
+        return self._select(scores, candidates, k, threshold)
+
+    def search(self, query: np.ndarray, k: int = 5, threshold: float = 1.0) -> List[Tuple[str, float]]:
+        """Neighbours of an arbitrary unit-length vector."""
+        query = np.asarray(query, dtype=np.float32)
+        if self.method == 'ivf':
+            indices, scores = self._search_ivf(query, k, threshold)
+        else:
+            indices, scores = self._select(self.embeddings @ query, None, k, threshold)
+        return [(self.ids[i], float(s)) for i, s in zip(indices, scores)]
+
+    def neighbours(self, prompt_id: str, k: int = 5, threshold: float = 1.0) -> List[Tuple[str, float]]:
+        """
+        The k most similar other prompts, plus every other prompt above threshold.
+        Exact search computes a whole block of rows with one matmul and keeps only
+        the selected neighbours of each row, so each block is multiplied once
+        however out of order the prompts are looked up.
+        """
+        i = self.positions[prompt_id]
+        if self.method == 'ivf':
+            indices, scores = self._search_ivf(self.embeddings[i], k, threshold, exclude=i)
+        else:
+            start = i - i % self.block_size
+            key = (start, k, threshold)
+            results = self._blocks.get(key)
+            if results is None:
+                block = self.embeddings[start:start + self.block_size] @ self.embeddings.T
+                rows = np.arange(block.shape[0])
+                block[rows, start + rows] = -np.inf
+                results = self._blocks[key] = [self._select(row, None, k, threshold) for row in block]
+            indices, scores = results[i - start]
+        return [(self.ids[j], float(s)) for j, s in zip(indices, scores)]
+
+    def mean_similarity(self, prompt_id: str) -> float:
+        """Exact mean similarity to every other prompt, from the sum of all embeddings."""
+        if len(self.ids) < 2:
+            return 0.0
+        vector = self.embeddings[self.positions[prompt_id]]
+        return float((vector @ self._total - vector @ vector) / (len(self.ids) - 1))
+
+    def mean_similarity_to(self, vector: np.ndarray) -> float:
+        """Mean similarity of an outside vector to every indexed prompt."""
+        if not self.ids:
+            return 0.0
+        return float(np.asarray(vector, dtype=np.float32) @ self._total / len(self.ids))
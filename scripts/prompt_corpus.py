@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import hashlib
+import pickle
+from pathlib import Path
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from prompt_frontmatter import parse_frontmatter
+from instrumentation import span
+
+CACHE_DIR = Path(os.environ.get('PROMPT_CACHE_DIR', '.prompt_cache'))
+# Bump whenever parse_frontmatter output changes so stale cached parses are discarded
+CACHE_VERSION = 2
+
+@dataclass
+class PromptDocument:
+    """A prompt file with its parsed frontmatter and body."""
+    path: Path
+    metadata: Dict[str, Any]
+    content: str
+    has_frontmatter: bool
+    mtime: float
+    size: int
+    sha: str
+
+class PromptCorpus:
+    """All prompt files under a directory, loaded through the parse cache."""
+
+    def __init__(self, root: Path, documents: List[PromptDocument], errors: Dict[str, str]):
+        self.root = root
+        self.documents = documents
+        self.errors = errors
+        self._by_path = {str(doc.path): doc for doc in documents}
+
+    def __iter__(self) -> Iterator[PromptDocument]:
+        return iter(self.documents)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def get(self, path: str) -> Optional[PromptDocument]:
+        """Return the document for a path, if it was loaded."""
+        return self._by_path.get(str(path))
+
+    @property
+    def paths(self) -> List[str]:
+        """Every discovered prompt file, including those that failed to parse."""
+        return sorted(list(self._by_path) + list(self.errors))
+
+def content_hash(data: bytes) -> str:
+    """Hash raw file bytes for cache validation."""
+    return hashlib.sha256(data).hexdigest()
+
+def parse_prompt_text(text: str) -> Tuple[Dict[str, Any], str, bool]:
+    """Split a prompt file into metadata, body and whether it had frontmatter."""
+    metadata, content = parse_frontmatter(text)
+    return metadata, content, text.startswith('---')
+
+def _decode(data: bytes) -> str:
+    # Match text-mode reads: universal newlines.
+    return data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+
+def find_prompt_files(root: Path) -> List[Tuple[str, os.stat_result]]:
+    """Find all markdown files under root together with their stat results."""
+    found = []
+    stack = [str(root)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith('.md') and entry.is_file():
+                        found.append((entry.path, entry.stat()))
+        except OSError as e:
+            print(f"Error scanning {current}: {e}", file=sys.stderr)
+    found.sort(key=lambda item: item[0])
+    return found
+
+def load_prompt(file_path: str) -> PromptDocument:
+    """Load and parse a single prompt file without going through the cache."""
+    with span('io', 'read', file_path):
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    stat = os.stat(file_path)
+    with span('parse', 'frontmatter', file_path):
+        metadata, content, has_frontmatter = parse_prompt_text(_decode(data))
+    return PromptDocument(Path(file_path), metadata, content, has_frontmatter,
+                          stat.st_mtime, stat.st_size, content_hash(data))
+
+def cache_path(root: Path, name: str, suffix: str) -> Path:
+    """Path of a cache file that belongs to one prompts directory."""
+    key = hashlib.sha1(str(Path(root).resolve()).encode('utf-8')).hexdigest()[:12]
+    return CACHE_DIR / f"{name}-{key}{suffix}"
+
+def _read_cache(cache_file: Path) -> Dict[str, tuple]:
+    try:
+        with open(cache_file, 'rb') as f:
+            cached = pickle.load(f)
+        if cached.get('version') == CACHE_VERSION:
+            return cached['entries']
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Warning: ignoring unreadable cache {cache_file}: {e}", file=sys.stderr)
+    return {}
+
+def _write_cache(cache_file: Path, entries: Dict[str, tuple]) -> None:
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, 'wb') as f:
+            pickle.dump({'version': CACHE_VERSION, 'entries': entries}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        print(f"Warning: could not write cache {cache_file}: {e}", file=sys.stderr)
+
+def load_corpus(root: str = 'prompts', use_cache: bool = True) -> PromptCorpus:
+    """
+    Load every prompt under root.
+    Files whose mtime and size match the cache are reused as-is; otherwise the
+    file is read and only re-parsed when its content hash changed.
+    """
+    root_path = Path(root)
+    cache_file = cache_path(root_path, 'corpus', '.pickle')
+    with span('io', 'corpus-cache-read'):
+        cached = _read_cache(cache_file) if use_cache else {}
+    entries: Dict[str, tuple] = {}
+    documents: List[PromptDocument] = []
+    errors: Dict[str, str] = {}
+    dirty = len(cached) == 0
+
+    with span('io', 'scan'):
+        files = find_prompt_files(root_path)
+    for file_path, stat in files:
+        entry = cached.get(file_path)
+        if entry is None or entry[0] != stat.st_mtime_ns or entry[1] != stat.st_size:
+            try:
+                with span('io', 'read', file_path):
+                    with open(file_path, 'rb') as f:
+                        data = f.read()
+                sha = content_hash(data)
+                if entry is not None and entry[2] == sha:
+                    entry = (stat.st_mtime_ns, stat.st_size) + entry[2:]
+                else:
+                    with span('parse', 'frontmatter', file_path):
+                        metadata, content, has_frontmatter = parse_prompt_text(_decode(data))
+                    entry = (stat.st_mtime_ns, stat.st_size, sha, metadata, content, has_frontmatter)
+            except Exception as e:
+                errors[file_path] = str(e)
+                dirty = True
+                continue
+            dirty = True
+
+        entries[file_path] = entry
+        _, size, sha, metadata, content, has_frontmatter = entry
+        documents.append(PromptDocument(Path(file_path), metadata, content, has_frontmatter,
+                                        stat.st_mtime, size, sha))
+
+    if use_cache and (dirty or len(entries) != len(cached)):
+        with span('io', 'corpus-cache-write'):
+            _write_cache(cache_file, entries)
+
+    return PromptCorpus(root_path, documents, errors)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from typing import List, Dict, Set
+
+KEYWORDS = [
+    "you are", "your task", "your role", "format:",
+    "success", "criteria", "expected", "requirements", "example"
+]
+
+CONDITIONALS = ['if', 'when', 'unless', 'else']
+
+# Written to start with a character class (a leading \b is checked as a lookbehind
+# after the first character) so the regex engine can skip ahead to candidates
+REGION_PATTERNS = {
+    'date_format': re.compile(r'\d(?<!\w\d)\d?[/-]\d{1,2}[/-]\d{2,4}\b'),
+    'time_format': re.compile(r'\d(?<!\w\d)\d?:\d{2}\b'),
+    'currency': re.compile(r'[\$€£¥]'),
+    'phone': re.compile(r'\+\d{1,3}[-\s]?\d{1,14}'),
+    'timezone': re.compile(r'[A-Z](?<!\w[A-Z])[A-Z]{2,3}[-+]\d{1,2}(?::?\d{2})?\b')
+}
+
+BRACKETS = re.compile(r'[{\[(<}\])>]')
+OPENING = frozenset('{[(<')
+
+NON_ASCII = re.compile(r'[^\x00-\x7f]+')
+_ASCII_CATEGORIES = sorted({unicodedata.category(chr(i)) for i in range(128)})
+_CATEGORY_CODES = {category: chr(ord('A') + i) for i, category in enumerate(_ASCII_CATEGORIES)}
+_ASCII_TABLE = {i: _CATEGORY_CODES[unicodedata.category(chr(i))] for i in range(128)}
+
+def category_histogram(content: str) -> Dict[str, int]:
+    """
+    Unicode category counts. ASCII characters are mapped to one code letter per
+    category and counted with str.count; only non-ASCII runs are looked up.
+    """
+    is_ascii = content.isascii()
+    coded = (content if is_ascii else NON_ASCII.sub('', content)).translate(_ASCII_TABLE)
+    counts = {}
+    for category, code in _CATEGORY_CODES.items():
+        count = coded.count(code)
+        if count:
+            counts[category] = count
+    if not is_ascii:
+        for char, count in Counter(''.join(NON_ASCII.findall(content))).items():
+            category = unicodedata.category(char)
+            counts[category] = counts.get(category, 0) + count
+    return counts
+
+@dataclass
+class PromptFeatures:
+    """Text features shared by the static evaluators, computed once per prompt."""
+    lowered: str
+    word_count: int
+    vocabulary: Set[str]
+    total_word_length: int
+    bracket_depth: int
+    keyword_hits: Dict[str, bool]
+    category_counts: Dict[str, int]
+    region_matches: Dict[str, bool]
+    has_non_ascii: bool
+    variable_count: int
+    has_frontmatter_rule: bool
+    has_sections: bool
+    has_code_block: bool
+    has_interpolation: bool
+    has_format_tag: bool
+
+    @property
+    def lexical_diversity(self) -> float:
+        return len(self.vocabulary) / self.word_count if self.word_count > 0 else 0
+
+    @property
+    def avg_word_length(self) -> float:
+        return self.total_word_length / self.word_count if self.word_count > 0 else 0
+
+    @property
+    def conditional_count(self) -> int:
+        return sum(1 for keyword in CONDITIONALS if keyword in self.vocabulary)
+
+    def has_any(self, keywords: List[str]) -> bool:
+        return any(self.keyword_hits[keyword] for keyword in keywords)
+
+    @classmethod
+    def from_text(cls, content: str) -> 'PromptFeatures':
+        lowered = content.lower()
+        words = lowered.split()
+
+        # Only bracket characters are visited in Python; the regex skips the rest
+        depth = max_depth = 0
+        for found in BRACKETS.finditer(content):
+            if found.group() in OPENING:
+                depth += 1
+                if depth > max_depth:
+                    max_depth = depth
+            elif depth:
+                depth -= 1
+
+        return cls(
+            lowered=lowered,
+            word_count=len(words),
+            vocabulary=set(words),
+            total_word_length=sum(map(len, words)),
+            bracket_depth=max_depth,
+            keyword_hits={keyword: keyword in lowered for keyword in KEYWORDS},
+            category_counts=category_histogram(content),
+            region_matches={key: pattern.search(content) is not None for key, pattern in REGION_PATTERNS.items()},
+            has_non_ascii=not content.isascii(),
+            variable_count=content.count('{{') + content.count('{%'),
+            has_frontmatter_rule="---" in content,
+            has_sections='\n\n' in content,
+            has_code_block="```" in content,
+            has_interpolation='{{' in content and '}}' in content,
+            has_format_tag="<format>" in content
+        )
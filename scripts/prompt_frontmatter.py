@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import sys
+import time
+import argparse
+from typing import List, Dict, Any, Tuple
+import yaml
+from yaml.reader import Reader
+from yaml.resolver import Resolver
+from yaml.constructor import SafeConstructor
+
+try:
+    from yaml import CSafeLoader as YAMLLoader
+except ImportError:
+    from yaml import SafeLoader as YAMLLoader
+
+# The same boundary python-frontmatter's YAML handler splits on
+FM_BOUNDARY = re.compile(r'^-{3,}\s*$', re.MULTILINE)
+
+KEY_LINE = re.compile(r'([A-Za-z_][A-Za-z0-9_]*(?:-[A-Za-z0-9_]+)*):(?:[ ]+(.*))?$')
+ITEM_LINE = re.compile(r'( *)-(?:[ ]+(.*))?$')
+# Characters that start something other than a plain scalar
+INDICATORS = frozenset('-?:,[]{}#&*!|>%@`')
+# Anything the fast path does not handle: tabs, a BOM, YAML-only line breaks, non-printables
+UNSUPPORTED = re.compile('[\t\ufeff\x85\u2028\u2029\r]|' + Reader.NON_PRINTABLE.pattern)
+STR_TAG = 'tag:yaml.org,2002:str'
+
+_resolver = Resolver()
+_constructor = SafeConstructor()
+# Plain scalars starting with any other character always resolve to str
+IMPLICIT_FIRST = frozenset(ch for ch in Resolver.yaml_implicit_resolvers if ch is not None)
+# Resolved keys and short values; tags, models and categories repeat across the catalog
+_resolved: Dict[str, Any] = {}
+
+class Unsupported(Exception):
+    """Raised by the fast path for frontmatter it leaves to the YAML loader."""
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip(' '))
+
+def _plain(text: str) -> Any:
+    """Resolve a plain scalar the way SafeLoader does: str, int, float, bool, null or timestamp."""
+    if text[0] not in IMPLICIT_FIRST:
+        return text
+    if text in _resolved:
+        return _resolved[text]
+    tag = _resolver.resolve(yaml.ScalarNode, text, (True, False))
+    if tag == STR_TAG:
+        value = text
+    else:
+        construct = SafeConstructor.yaml_constructors.get(tag)
+        if construct is None:
+            raise Unsupported(tag)
+        value = construct(_constructor, yaml.ScalarNode(tag, text))
+    if len(text) <= 64:
+        _resolved[text] = value
+    return value
+
+def _quoted(text: str) -> str:
+    quote = text[0]
+    inner = text[1:-1]
+    if len(text) < 2 or text[-1] != quote:
+        raise Unsupported(text)
+    if quote == "'":
+        if "'" in inner.replace("''", ''):
+            raise Unsupported(text)
+        return inner.replace("''", "'")
+    if '"' in inner or '\\' in inner:
+        raise Unsupported(text)
+    return inner
+
+def _scalar(pieces: List[str], flow: bool = False) -> Any:
+    """
+    Value of a scalar written over one or more stripped lines. Continuation
+    lines fold into single spaces, as in both plain and quoted YAML scalars.
+    """
+    text = ' '.join(pieces) if len(pieces) > 1 else pieces[0]
+    if not text:
+        raise Unsupported(text)
+    if text[0] in '\'"':
+        return _quoted(text)
+    if text[0] in INDICATORS or text.endswith(':') or ' #' in text:
+        raise Unsupported(text)
+    if ': ' in text:
+        raise Unsupported(text)
+    if flow and (':' in text or any(char in text for char in ',[]{}')):
+        raise Unsupported(text)
+    return _plain(text)
+
+def _flow_sequence(text: str) -> List[Any]:
+    if not text.endswith(']'):
+        raise Unsupported(text)
+    inner = text[1:-1].strip()
+    if not inner:
+        return []
+    return [_scalar([item.strip()], flow=True) for item in inner.split(',')]
+
+def _continuation(lines: List[str], i: int, indent: int) -> Tuple[List[str], int]:
+    """Lines after i indented deeper than `indent`, stripped; and the index after them."""
+    pieces = []
+    prefix = ' ' * (indent + 1)
+    while i < len(lines) and lines[i].startswith(prefix) and lines[i].strip():
+        piece = lines[i].strip()
+        if piece[0] in INDICATORS:
+            # May start a comment, directive or nested node rather than continue the scalar
+            raise Unsupported(piece)
+        pieces.append(piece)
+        i += 1
+    if i < len(lines) and not lines[i].strip() and pieces:
+        # A blank line inside a folded scalar becomes a newline; rare enough to delegate
+        j = i
+        while j < len(lines) and not lines[j].strip():
+            j += 1
+        if j < len(lines) and _indent(lines[j]) > indent:
+            raise Unsupported('blank line in scalar')
+    return pieces, i
+
+def fast_load(fm: str) -> Dict[str, Any]:
+    """
+    Parse flat frontmatter: `key: scalar`, `key: [a, b]` and `key:` followed by
+    a block list of scalars. Raises Unsupported for anything else.
+    """
+    if UNSUPPORTED.search(fm):
+        raise Unsupported('character')
+    lines = fm.split('\n')
+    data: Dict[str, Any] = {}
+    i = 0
+    while i < len(lines):
+        line = lines[i].rstrip(' ')
+        if not line or line.startswith('#'):
+            i += 1
+            continue
+        match = KEY_LINE.match(line)
+        if match is None:
+            raise Unsupported(line)
+        key, rest = match.group(1), (match.group(2) or '').strip()
+        if not isinstance(_plain(key), str):
+            raise Unsupported(key)
+        i += 1
+
+        if rest.startswith('['):
+            if i < len(lines) and lines[i].strip() and _indent(lines[i]) > 0:
+                raise Unsupported('multi-line flow sequence')
+            data[key] = _flow_sequence(rest)
+        elif rest:
+            pieces, i = _continuation(lines, i, 0)
+            data[key] = _scalar([rest] + pieces)
+        else:
+            items = []
+            item_indent = None
+            while i < len(lines):
+                item = ITEM_LINE.match(lines[i].rstrip(' '))
+                if item is None:
+                    break
+                indent = len(item.group(1))
+                if item_indent is None:
+                    item_indent = indent
+                elif indent != item_indent:
+                    raise Unsupported('list indentation')
+                text = (item.group(2) or '').strip()
+                if not text:
+                    # An empty item, or one whose value starts on the next line
+                    raise Unsupported('empty list item')
+                pieces, i = _continuation(lines, i + 1, indent)
+                items.append(_scalar([text] + pieces))
+            if item_indent is None:
+                if i < len(lines) and lines[i].strip() and _indent(lines[i]) > 0:
+                    raise Unsupported('nested value')
+                data[key] = None
+            else:
+                data[key] = items
+    return data
+
+def load_metadata(fm: str) -> Any:
+    """Frontmatter data: the fast path, else libyaml's CSafeLoader, else PyYAML's SafeLoader."""
+    try:
+        return fast_load(fm)
+    except Unsupported:
+        return yaml.load(fm, Loader=YAMLLoader)
+
+def parse_frontmatter(text: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Metadata and body of a prompt, identical to python-frontmatter's loads()
+    with its default handlers.
+    """
+    text = text.replace('\r\n', '\n')
+    if not FM_BOUNDARY.match(text):
+        # JSON/TOML frontmatter or none at all
+        import frontmatter
+        post = frontmatter.loads(text)
+        return dict(post.metadata), post.content
+
+    text = text.strip()
+    try:
+        _, fm, content = FM_BOUNDARY.split(text, 2)
+    except ValueError:
+        return {}, text
+    data = load_metadata(fm)
+    if not isinstance(data, dict):
+        return {}, content.strip()
+    if not all(isinstance(key, str) for key in data):
+        # python-frontmatter passes metadata as keyword arguments
+        raise TypeError('keywords must be strings')
+    return dict(data), content.strip()
+
+def benchmark(root: str, repeat: int) -> bool:
+    """Parse every prompt with python-frontmatter and with parse_frontmatter; report speed and differences."""
+    import frontmatter
+    from prompt_corpus import find_prompt_files, _decode
+
+    texts = []
+    for file_path, _ in find_prompt_files(root):
+        with open(file_path, 'rb') as f:
+            texts.append((file_path, _decode(f.read())))
+
+    class PureYAMLHandler(frontmatter.YAMLHandler):
+        def load(self, fm, **kwargs):
+            return yaml.load(fm, Loader=yaml.SafeLoader)
+
+    def reference(text):
+        post = frontmatter.loads(text)
+        return dict(post.metadata), post.content
+
+    def pure_reference(text):
+        # python-frontmatter as it runs when PyYAML was built without libyaml
+        handler = PureYAMLHandler() if FM_BOUNDARY.match(text) else None
+        post = frontmatter.loads(text, handler=handler)
+        return dict(post.metadata), post.content
+
+    fallbacks = 0
+    for _, text in texts:
+        stripped = text.replace('\r\n', '\n').strip()
+        parts = FM_BOUNDARY.split(stripped, 2) if FM_BOUNDARY.match(stripped) else []
+        if len(parts) == 3:
+            try:
+                fast_load(parts[1])
+            except Unsupported:
+                fallbacks += 1
+
+    timings = {}
+    outputs = {}
+    parsers = [('python-frontmatter', reference), ('pure SafeLoader', pure_reference), ('fast path', parse_frontmatter)]
+    for name, parse in parsers:
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = []
+            for _, text in texts:
+                try:
+                    results.append(parse(text))
+                except Exception as e:
+                    results.append(repr(e))
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+        outputs[name] = results
+
+    mismatches = [path for (path, _), expected, pure, actual in
+                  zip(texts, outputs['python-frontmatter'], outputs['pure SafeLoader'], outputs['fast path'])
+                  if not expected == pure == actual]
+    print(f"Files: {len(texts)} ({fallbacks} delegated to {YAMLLoader.__name__}, "
+          f"python-frontmatter uses {frontmatter.default_handlers.SafeLoader.__name__})")
+    for name, seconds in timings.items():
+        rate = len(texts) / seconds if seconds else float('inf')
+        print(f"{name:>30}: {seconds * 1000:8.1f} ms  ({rate:,.0f} files/s)")
+    for name in ('python-frontmatter', 'pure SafeLoader'):
+        print(f"{'speedup vs ' + name:>30}: {timings[name] / timings['fast path']:.1f}x")
+    for path in mismatches:
+        print(f"Mismatch: {path}", file=sys.stderr)
+    return not mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description='Micro-benchmark the fast frontmatter parser against python-frontmatter')
+    parser.add_argument('root', nargs='?', default='prompts', help='Prompts directory')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Runs per parser; the best is reported')
+    args = parser.parse_args()
+    if not benchmark(args.root, args.repeat):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import json
+import sqlite3
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator
+from prompt_corpus import PromptDocument, cache_path, find_prompt_files, load_corpus
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS prompt_types (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS models (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS tags (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS prompts (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    prompt_type_id INTEGER REFERENCES prompt_types(id),
+    model_id INTEGER REFERENCES models(id),
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS prompt_tags (
+    prompt_id INTEGER NOT NULL REFERENCES prompts(id) ON DELETE CASCADE,
+    tag_id INTEGER NOT NULL REFERENCES tags(id),
+    PRIMARY KEY (tag_id, prompt_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS prompts_type_idx ON prompts(prompt_type_id);
+CREATE INDEX IF NOT EXISTS prompts_model_idx ON prompts(model_id);
+CREATE INDEX IF NOT EXISTS prompt_tags_prompt_idx ON prompt_tags(prompt_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS prompts_fts USING fts5(
+    title, description, body, tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+def fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query that matches all of its words."""
+    words = re.findall(r'\w+', text, re.UNICODE)
+    return ' '.join(f'"{word}"' for word in words)
+
+class PromptIndex:
+    """SQLite catalog of prompt metadata with FTS5 over title, description and body."""
+
+    def __init__(self, prompts_dir: Path, db_path: Optional[Path] = None):
+        self.prompts_dir = Path(prompts_dir)
+        self.db_path = Path(db_path) if db_path else cache_path(self.prompts_dir, 'catalog', '.sqlite')
+
+    def exists(self) -> bool:
+        """Whether a catalog has been built for this prompts directory."""
+        if not self.db_path.exists():
+            return False
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        return row is not None and int(row[0]) == SCHEMA_VERSION
+
+    def is_current(self) -> bool:
+        """Whether the catalog lists exactly the files on disk with their current mtime and size."""
+        with self._connect() as conn:
+            catalog = {path: (mtime_ns, size) for path, mtime_ns, size in
+                       conn.execute("SELECT path, mtime_ns, size FROM prompts")}
+        files = find_prompt_files(self.prompts_dir)
+        if len(files) != len(catalog):
+            return False
+        for file_path, stat in files:
+            rel_path = str(Path(file_path).relative_to(self.prompts_dir))
+            if catalog.get(rel_path) != (int(stat.st_mtime * 1e9), stat.st_size):
+                return False
+        return True
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.executescript(SCHEMA)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _lookup_id(self, conn: sqlite3.Connection, table: str, name: str) -> Optional[int]:
+        if not name:
+            return None
+        conn.execute(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", (name,))
+        return conn.execute(f"SELECT id FROM {table} WHERE name = ?", (name,)).fetchone()[0]
+
+    def _write_prompt(self, conn: sqlite3.Connection, prompt_id: Optional[int], doc: PromptDocument, mtime_ns: int) -> None:
+        metadata = doc.metadata if doc.metadata else {}
+        tags = metadata.get('tags', []) or []
+        if not isinstance(tags, list):
+            tags = []
+        title = str(metadata.get('title', doc.path.stem))
+        description = str(metadata.get('description', ''))
+        row = (
+            str(doc.path.relative_to(self.prompts_dir)),
+            doc.path.name.lower(),
+            title,
+            description,
+            json.dumps(tags, ensure_ascii=False),
+            self._lookup_id(conn, 'prompt_types', str(metadata.get('prompt_type', '') or '')),
+            self._lookup_id(conn, 'models', str(metadata.get('model', '') or '')),
+            mtime_ns,
+            doc.size,
+            doc.sha,
+        )
+        if prompt_id is None:
+            prompt_id = conn.execute(
+                "INSERT INTO prompts (path, name, title, description, tags, prompt_type_id, model_id, mtime_ns, size, sha) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row).lastrowid
+        else:
+            conn.execute(
+                "UPDATE prompts SET path = ?, name = ?, title = ?, description = ?, tags = ?, prompt_type_id = ?, "
+                "model_id = ?, mtime_ns = ?, size = ?, sha = ? WHERE id = ?", row + (prompt_id,))
+            conn.execute("DELETE FROM prompt_tags WHERE prompt_id = ?", (prompt_id,))
+            conn.execute("DELETE FROM prompts_fts WHERE rowid = ?", (prompt_id,))
+
+        tag_ids = {self._lookup_id(conn, 'tags', str(tag).lower()) for tag in tags if str(tag).strip()}
+        conn.executemany("INSERT INTO prompt_tags (prompt_id, tag_id) VALUES (?, ?)",
+                         [(prompt_id, tag_id) for tag_id in tag_ids])
+        conn.execute("INSERT INTO prompts_fts (rowid, title, description, body) VALUES (?, ?, ?, ?)",
+                     (prompt_id, title, description, doc.content))
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        Bring the catalog in line with the prompts directory.
+        Rows are only rewritten when a file's content hash changed.
+        """
+        corpus = load_corpus(str(self.prompts_dir))
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        stats = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0}
+
+        with self._connect() as conn:
+            existing = {path: (prompt_id, mtime_ns, sha) for prompt_id, path, mtime_ns, sha in
+                        conn.execute("SELECT id, path, mtime_ns, sha FROM prompts")}
+            seen = set()
+            for doc in corpus:
+                rel_path = str(doc.path.relative_to(self.prompts_dir))
+                mtime_ns = int(doc.mtime * 1e9)
+                seen.add(rel_path)
+                current = existing.get(rel_path)
+                if current is None:
+                    self._write_prompt(conn, None, doc, mtime_ns)
+                    stats['added'] += 1
+                elif current[2] != doc.sha:
+                    self._write_prompt(conn, current[0], doc, mtime_ns)
+                    stats['updated'] += 1
+                else:
+                    if current[1] != mtime_ns:
+                        conn.execute("UPDATE prompts SET mtime_ns = ? WHERE id = ?", (mtime_ns, current[0]))
+                    stats['unchanged'] += 1
+
+            for rel_path, (prompt_id, _, _) in existing.items():
+                if rel_path not in seen:
+                    conn.execute("DELETE FROM prompts_fts WHERE rowid = ?", (prompt_id,))
+                    conn.execute("DELETE FROM prompts WHERE id = ?", (prompt_id,))
+                    stats['removed'] += 1
+
+            # Drop lookup rows no prompt refers to any more
+            conn.execute("DELETE FROM tags WHERE id NOT IN (SELECT tag_id FROM prompt_tags)")
+            conn.execute("DELETE FROM prompt_types WHERE id NOT IN "
+                         "(SELECT prompt_type_id FROM prompts WHERE prompt_type_id IS NOT NULL)")
+            conn.execute("DELETE FROM models WHERE id NOT IN "
+                         "(SELECT model_id FROM prompts WHERE model_id IS NOT NULL)")
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+                         (str(SCHEMA_VERSION),))
+
+        return stats
+
+    def search(self,
+               filename: Optional[str] = None,
+               tags: Optional[List[str]] = None,
+               prompt_type: Optional[str] = None,
+               model: Optional[str] = None,
+               text: Optional[str] = None) -> List[Dict]:
+        """Run the same filters as PromptSearcher.search_prompts against the catalog."""
+        clauses: List[str] = []
+        params: List[Any] = []
+
+        if filename:
+            clauses.append("p.name GLOB ?")
+            params.append(f"*{filename.lower()}*")
+        if tags:
+            wanted = sorted({tag.lower() for tag in tags})
+            placeholders = ', '.join('?' for _ in wanted)
+            clauses.append(
+                f"p.id IN (SELECT pt.prompt_id FROM prompt_tags pt JOIN tags t ON t.id = pt.tag_id "
+                f"WHERE t.name IN ({placeholders}) GROUP BY pt.prompt_id HAVING COUNT(*) = ?)")
+            params.extend(wanted)
+            params.append(len(wanted))
+        if prompt_type:
+            clauses.append("p.prompt_type_id IN (SELECT id FROM prompt_types WHERE instr(lower(name), ?) > 0)")
+            params.append(prompt_type.lower())
+        if model:
+            clauses.append("p.model_id IN (SELECT id FROM models WHERE instr(lower(name), ?) > 0)")
+            params.append(model.lower())
+        if text:
+            query = fts_query(text)
+            if not query:
+                return []
+            clauses.append("p.id IN (SELECT rowid FROM prompts_fts WHERE prompts_fts MATCH ?)")
+            params.append(query)
+
+        sql = ("SELECT p.path, p.title, p.description, p.tags, COALESCE(pt.name, ''), COALESCE(m.name, '') "
+               "FROM prompts p LEFT JOIN prompt_types pt ON pt.id = p.prompt_type_id "
+               "LEFT JOIN models m ON m.id = p.model_id")
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY p.path"
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        return [
+            {
+                'path': path,
+                'title': title,
+                'description': description,
+                'tags': json.loads(tags_json),
+                'prompt_type': type_name,
+                'model': model_name
+            }
+            for path, title, description, tags_json, type_name, model_name in rows
+        ]
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import time
+import shlex
+import argparse
+from typing import List, Callable, Optional
+from prompt_corpus import PromptCorpus, load_corpus
+
+PROMPTS_DIR = 'prompts'
+
+def run_validate(argv: List[str], corpus: PromptCorpus) -> int:
+    argparse.ArgumentParser(prog='prompts validate', description='Validate prompt frontmatter').parse_args(argv)
+    import validate_prompts
+    return validate_prompts.run(corpus)
+
+def run_analyze(argv: List[str], corpus: PromptCorpus) -> int:
+    parser = argparse.ArgumentParser(prog='prompts analyze', description='Summarize directories, models, types and tags')
+    parser.add_argument('-o', '--output', default='prompt_analysis.json', help='Report file')
+    args = parser.parse_args(argv)
+    import analyze_prompts
+    return analyze_prompts.run(corpus, args.output)
+
+def run_gallery(argv: List[str], corpus: PromptCorpus) -> int:
+    argparse.ArgumentParser(prog='prompts gallery', description='Generate the docs gallery data').parse_args(argv)
+    import generate_gallery
+    return generate_gallery.run(corpus)
+
+def run_search(argv: List[str], corpus: PromptCorpus) -> int:
+    import search_prompts
+    parser = search_prompts.build_parser()
+    parser.prog = 'prompts search'
+    return search_prompts.run(parser.parse_args(argv), corpus)
+
+def run_fix(argv: List[str], corpus: PromptCorpus) -> int:
+    argparse.ArgumentParser(prog='prompts fix', description='Fill in and normalize prompt frontmatter').parse_args(argv)
+    import fix_prompts
+    return fix_prompts.run(corpus)
+
+def run_benchmark(argv: List[str], corpus: PromptCorpus) -> int:
+    import asyncio
+    import benchmark_prompts
+    parser = benchmark_prompts.build_parser()
+    parser.prog = 'prompts benchmark'
+    asyncio.run(benchmark_prompts.run(parser.parse_args(argv), corpus))
+    return 0
+
+def run_serve(argv: List[str], corpus: PromptCorpus) -> int:
+    import search_prompts
+    parser = search_prompts.build_parser()
+    parser.prog = 'prompts serve'
+    return search_prompts.run(parser.parse_args(argv + ['--serve']), corpus)
+
+COMMANDS = {
+    'validate': run_validate,
+    'analyze': run_analyze,
+    'gallery': run_gallery,
+    'search': run_search,
+    'fix': run_fix,
+    'benchmark': run_benchmark,
+    'serve': run_serve,
+}
+
+COMMAND_HELP = {
+    'validate': 'check required frontmatter fields',
+    'analyze': 'write the directories/models/types/tags report',
+    'gallery': 'generate the docs gallery data',
+    'search': 'search prompts by name, tags, type, model or text',
+    'fix': 'fill in and normalize frontmatter in place',
+    'benchmark': 'benchmark prompts against the configured models',
+    'serve': 'serve search over HTTP with hot reload (search --serve)',
+}
+
+# Stages that rewrite prompt files; the corpus is reloaded after them
+WRITING_COMMANDS = {'fix'}
+
+def run_command(name: str, argv: List[str], corpus: PromptCorpus) -> int:
+    """Run one subcommand; argparse exits are turned into exit codes."""
+    try:
+        return COMMANDS[name](argv, corpus) or 0
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+
+def run_pipeline(stages: List[str], corpus: PromptCorpus, keep_going: bool = False,
+                 reload: Optional[Callable[[], PromptCorpus]] = None) -> int:
+    """
+    Run several subcommands over the same loaded corpus. Each stage is a
+    command line such as "search -t python"; the first failing stage stops the
+    pipeline unless keep_going is set.
+    """
+    parsed = []
+    for stage in stages:
+        argv = shlex.split(stage)
+        if not argv or argv[0] not in COMMANDS:
+            print(f"Unknown pipeline stage: {stage!r} (expected one of {', '.join(COMMANDS)})", file=sys.stderr)
+            return 2
+        parsed.append(argv)
+
+    status = 0
+    timings = []
+    for name, *argv in parsed:
+        print(f"\n[pipeline] {name} {' '.join(argv)}".rstrip(), file=sys.stderr)
+        start = time.perf_counter()
+        code = run_command(name, argv, corpus)
+        timings.append((name, time.perf_counter() - start, code))
+        if name in WRITING_COMMANDS and reload is not None:
+            corpus = reload()
+        if code:
+            status = code
+            if not keep_going:
+                break
+
+    print("\n[pipeline] summary", file=sys.stderr)
+    for name, seconds, code in timings:
+        print(f"  {name:<10} {seconds:8.2f}s  exit {code}", file=sys.stderr)
+    return status
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='prompts',
+        description='Prompt catalog tools. The corpus is discovered and parsed once per invocation.')
+    subparsers = parser.add_subparsers(dest='command', metavar='command')
+    for name in COMMANDS:
+        # Options are left unparsed here and handed to the command, so `prompts <command> -h` shows its own help
+        subparsers.add_parser(name, add_help=False, help=COMMAND_HELP[name])
+    pipeline = subparsers.add_parser(
+        'pipeline', help='run several commands over one loaded corpus',
+        description='Run several commands in order over one loaded corpus, e.g. '
+                    'prompts pipeline validate analyze gallery "search -t python"')
+    pipeline.add_argument('stages', nargs='+', help='Commands with their options, one quoted argument each')
+    pipeline.add_argument('-k', '--keep-going', action='store_true', help='Run the remaining stages after a failure')
+    return parser
+
+def main():
+    parser = build_parser()
+    args, argv = parser.parse_known_args()
+    if args.command == 'pipeline' and argv:
+        parser.error(f"unrecognized arguments: {' '.join(argv)}")
+    if args.command is None:
+        parser.print_help()
+        sys.exit(1)
+
+    # Load errors stay in corpus.errors; every command reports them itself
+    reload = lambda: load_corpus(PROMPTS_DIR)
+    corpus = reload()
+    if args.command == 'pipeline':
+        sys.exit(run_pipeline(args.stages, corpus, args.keep_going, reload))
+    sys.exit(run_command(args.command, argv, corpus))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+import json
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Dict, Any, Optional
+from prompt_corpus import CACHE_DIR
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used_idx ON responses(last_used);
+"""
+
+def response_key(provider: str, model: str, prompt: str, params: Dict[str, Any]) -> str:
+    """Hash of everything that determines a model response."""
+    material = json.dumps([provider, model, prompt, params], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    """
+    SQLite cache of model responses with least-recently-used eviction by entry
+    count and total size, and an optional time to live.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, max_entries: int = 100000,
+                 max_bytes: int = 512 * 1024 * 1024, ttl: Optional[float] = None):
+        self.db_path = Path(db_path) if db_path else CACHE_DIR / 'responses.sqlite'
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.executescript(SCHEMA)
+        self._count, self._bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional['ResponseCache']:
+        """Build from the `response_cache` section, or None when disabled."""
+        options = config.get('response_cache') or {}
+        if not options.get('enabled', True):
+            return None
+        return cls(max_entries=options.get('max_entries', 100000),
+                   max_bytes=int(options.get('max_mb', 512) * 1024 * 1024),
+                   ttl=options.get('ttl'))
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached response data, refreshing its recency; None on a miss or expiry."""
+        row = self._conn.execute("SELECT data, created FROM responses WHERE key = ?", (key,)).fetchone()
+        now = time.time()
+        if row is None or (self.ttl is not None and now - row[1] > self.ttl):
+            self.misses += 1
+            return None
+        with self._conn:
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, data: Dict[str, Any]) -> None:
+        """Store a response and evict the least recently used entries over the limits."""
+        encoded = json.dumps(data, ensure_ascii=False)
+        size = len(encoded.encode('utf-8'))
+        now = time.time()
+        with self._conn:
+            old = self._conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            if old:
+                self._count -= 1
+                self._bytes -= old[0]
+            self._conn.execute("INSERT OR REPLACE INTO responses (key, data, size, created, last_used) "
+                               "VALUES (?, ?, ?, ?, ?)", (key, encoded, size, now, now))
+            self._count += 1
+            self._bytes += size
+            if self._count > self.max_entries or self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+        # Evict down to 90% of the limits so eviction is not paid on every insert
+        target_count = int(self.max_entries * 0.9)
+        target_bytes = int(self.max_bytes * 0.9)
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall()
+        doomed = []
+        for key, size in rows:
+            if count <= target_count and total <= target_bytes:
+                break
+            doomed.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+        self._count, self._bytes = count, total
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+from prompt_corpus import CACHE_DIR
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    path TEXT PRIMARY KEY,
+    sha TEXT NOT NULL,
+    config_hash TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    criteria TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+def config_hash(config: Dict[str, Any], **extra) -> str:
+    """Hash of a benchmark configuration plus any run options that change results."""
+    material = json.dumps([config, extra], sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+class ResultStore:
+    """
+    SQLite store of serialized per-prompt benchmark results. A stored result is
+    only returned for the same content hash, config hash and evaluator version.
+    """
+
+    def __init__(self, config_hash: str, version: int, db_path: Optional[Path] = None):
+        self.config_hash = config_hash
+        self.version = version
+        self.db_path = Path(db_path) if db_path else CACHE_DIR / 'results.sqlite'
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.executescript(SCHEMA)
+
+    def _row(self, path: str, sha: str) -> Optional[tuple]:
+        row = self._conn.execute("SELECT sha, config_hash, version, criteria, data FROM results WHERE path = ?",
+                                 (path,)).fetchone()
+        if row is None or row[:3] != (sha, self.config_hash, self.version):
+            return None
+        return json.loads(row[3]), json.loads(row[4])
+
+    def load(self, path: str, sha: str, criteria: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        """Stored results for the given criteria, or None unless all of them were evaluated."""
+        row = self._row(path, sha)
+        if row is None:
+            return None
+        stored_criteria, data = row
+        if not set(criteria) <= set(stored_criteria):
+            return None
+        return {name: result for name, result in data.items() if name in criteria}
+
+    def save(self, path: str, sha: str, criteria: List[str], data: Dict[str, Dict[str, Any]]) -> None:
+        """Store results, keeping other criteria already stored for the same content and config."""
+        row = self._row(path, sha)
+        if row is not None:
+            stored_criteria, stored = row
+            criteria = sorted(set(stored_criteria) | set(criteria))
+            data = {**stored, **data}
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO results (path, sha, config_hash, version, criteria, data) "
+                               "VALUES (?, ?, ?, ?, ?, ?)",
+                               (path, sha, self.config_hash, self.version,
+                                json.dumps(sorted(criteria)), json.dumps(data, ensure_ascii=False)))
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import json
+from typing import List, Dict, Any, Iterable, Iterator, Tuple, TextIO
+
+Record = Tuple[str, Dict[str, Dict[str, Any]]]
+
+class ResultSink:
+    """
+    NDJSON file with one line per benchmarked prompt, flushed as each prompt
+    finishes so an interrupted run keeps everything written so far.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def write(self, file_path: str, results: Dict[str, Dict[str, Any]]) -> None:
+        self._file.write(json.dumps({"path": file_path, "results": results}, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.count += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+def read_records(path: str) -> Iterator[Record]:
+    """(prompt path, serialized results) pairs from an NDJSON result stream."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # The last line of an interrupted run may be cut short
+                print(f"Skipping malformed record at {path}:{line_number}", file=sys.stderr)
+                continue
+            yield record["path"], record["results"]
+
+class ReportSummary:
+    """Report summary aggregated one record at a time with running totals."""
+
+    def __init__(self, criteria_order: List[str], similarity_threshold: float = 0.8):
+        self.criteria_order = criteria_order
+        self.threshold = similarity_threshold
+        self.total_prompts = 0
+        self.scores: Dict[str, List[float]] = {}
+        self.models: Dict[str, List[float]] = {}
+        self.similarity = [0.0, 0]
+        self.pairs: Dict[tuple, float] = {}
+        self.token_ratios: Dict[str, List[float]] = {}
+
+    def add(self, file_path: str, results: Dict[str, Dict[str, Any]]) -> None:
+        self.total_prompts += 1
+        for criterion, result in results.items():
+            totals = self.scores.setdefault(criterion, [0.0, 0])
+            totals[0] += result["score"]
+            totals[1] += 1
+
+        for model_result in results.get("model_performance", {}).get("model_results") or []:
+            totals = self.models.setdefault(model_result["model"], [0.0, 0.0, 0.0, 0])
+            totals[0] += model_result["execution_time"]
+            totals[1] += model_result["error_rate"]
+            totals[2] += model_result["token_count"]
+            totals[3] += 1
+
+        semantic = results.get("semantic_similarity")
+        if semantic:
+            self.similarity[0] += semantic["score"]
+            self.similarity[1] += 1
+            for other, similarity in (semantic.get("semantic_scores") or {}).items():
+                if similarity > self.threshold:
+                    self.pairs[tuple(sorted((file_path, other)))] = similarity
+
+        tokens = results.get("token_efficiency")
+        for model, metrics in ((tokens.get("token_metrics") or {}).items() if tokens else []):
+            totals = self.token_ratios.setdefault(model, [0.0, 0])
+            totals[0] += metrics["token_ratio"]
+            totals[1] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        ratio_total = sum(total for total, _ in self.token_ratios.values())
+        ratio_count = sum(count for _, count in self.token_ratios.values())
+        return {
+            "total_prompts": self.total_prompts,
+            "average_scores": {
+                criterion: self.scores[criterion][0] / self.scores[criterion][1]
+                for criterion in self.criteria_order if criterion in self.scores
+            },
+            "model_performance": {
+                model: {
+                    "avg_execution_time": time / count,
+                    "avg_error_rate": errors / count,
+                    "avg_token_count": tokens / count
+                }
+                for model, (time, errors, tokens, count) in self.models.items()
+            },
+            "semantic_analysis": {
+                "avg_similarity": self.similarity[0] / self.similarity[1] if self.similarity[1] else 0.0,
+                "similar_prompt_pairs": [
+                    {"prompts": list(pair), "similarity": similarity}
+                    for pair, similarity in sorted(self.pairs.items(), key=lambda item: -item[1])
+                ]
+            },
+            "token_efficiency": {
+                "avg_ratio": ratio_total / ratio_count if ratio_count else 0.0,
+                "efficiency_by_model": {
+                    model: total / count for model, (total, count) in self.token_ratios.items()
+                }
+            }
+        }
+
+def _indent(text: str, spaces: int) -> str:
+    return text.replace("\n", "\n" + " " * spaces)
+
+def write_report(summary: Dict[str, Any], records: Iterable[Record], out: TextIO) -> None:
+    """
+    Write {"summary": ..., "detailed_results": ...} with the layout of
+    json.dump(indent=2), one record at a time instead of from one nested dict.
+    """
+    out.write('{\n  "summary": ' + _indent(json.dumps(summary, indent=2), 2) + ',\n  "detailed_results": {')
+    first = True
+    for file_path, results in records:
+        out.write(('' if first else ',') + '\n    ' + json.dumps(file_path) + ': '
+                  + _indent(json.dumps(results, indent=2), 4))
+        first = False
+    out.write('}\n}' if first else '\n  }\n}')
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import contextlib
+import subprocess
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Callable
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+BASELINE_VERSION = 1
+DEFAULT_SIZES = [1000, 10000]
+TOOLS = ['corpus', 'validate', 'search', 'gallery', 'benchmark']
+QUERIES = ['python api testing', 'análise de dados', 'docker deployment guide', 'write blog seo',
+           'team process quality']
+
+def _read_hwm() -> Optional[float]:
+    """Peak resident set size of this process in MB, from /proc; None elsewhere."""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def _reset_peak() -> bool:
+    """Reset the kernel's peak RSS counter so the next reading covers one phase only (Linux)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb() -> float:
+    value = _read_hwm()
+    if value is not None:
+        return value
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+class PhaseRecorder:
+    """Wall time, item count and peak RSS of each phase of one tool run."""
+
+    def __init__(self):
+        self.phases: List[Dict[str, Any]] = []
+        # Without a resettable counter the peak is the process's high-water mark so far
+        self.per_phase_rss = _reset_peak()
+
+    @contextlib.contextmanager
+    def phase(self, name: str, items: int):
+        if self.per_phase_rss:
+            _reset_peak()
+        start = time.perf_counter()
+        yield
+        wall = time.perf_counter() - start
+        self.phases.append({'phase': name, 'wall': wall, 'items': items,
+                            'throughput': items / wall if wall > 0 else None, 'peak_rss_mb': peak_rss_mb()})
+
+def bench_corpus(prompts_dir: Path, recorder: PhaseRecorder) -> None:
+    from prompt_corpus import find_prompt_files, load_corpus
+    count = len(find_prompt_files(str(prompts_dir)))
+    with recorder.phase('load-cold', count):
+        load_corpus(str(prompts_dir))
+    with recorder.phase('load-warm', count):
+        load_corpus(str(prompts_dir))
+
+def bench_validate(prompts_dir: Path, recorder: PhaseRecorder) -> None:
+    from prompt_corpus import load_corpus
+    from validate_prompts import PromptValidator
+    with recorder.phase('load', 0):
+        corpus = load_corpus(str(prompts_dir))
+    recorder.phases[-1]['items'] = len(corpus.paths)
+    validator = PromptValidator()
+    with recorder.phase('validate', len(corpus.paths)):
+        validator.find_and_validate_prompts(corpus)
+    with recorder.phase('report', len(corpus.paths)):
+        validator.print_report()
+
+def bench_search(prompts_dir: Path, recorder: PhaseRecorder) -> None:
+    from prompt_corpus import load_corpus
+    from prompt_index import PromptIndex
+    from bm25_index import BM25Index
+    from search_prompts import PromptSearcher
+    with recorder.phase('load', 0):
+        corpus = load_corpus(str(prompts_dir))
+    count = len(corpus.paths)
+    recorder.phases[-1]['items'] = count
+    searcher = PromptSearcher(corpus)
+    with recorder.phase('scan', len(QUERIES)):
+        for query in QUERIES:
+            searcher.search_prompts(tags=[query.split()[0]])
+            searcher.search_prompts(content=query)
+    index = PromptIndex(prompts_dir)
+    with recorder.phase('catalog-build', count):
+        index.refresh()
+    with recorder.phase('catalog-query', len(QUERIES)):
+        for query in QUERIES:
+            index.search(text=query)
+    with recorder.phase('bm25-build', count):
+        BM25Index(prompts_dir).refresh(corpus)
+    bm25 = BM25Index(prompts_dir)
+    with recorder.phase('bm25-load', count):
+        bm25.refresh(corpus)
+    with recorder.phase('bm25-query', len(QUERIES)):
+        for query in QUERIES:
+            bm25.top(query, 10)
+
+def bench_gallery(prompts_dir: Path, recorder: PhaseRecorder) -> None:
+    from prompt_corpus import load_corpus
+    from generate_gallery import process_prompt_document, write_gallery_files
+    with recorder.phase('load', 0):
+        corpus = load_corpus(str(prompts_dir))
+    count = len(corpus.paths)
+    recorder.phases[-1]['items'] = count
+    with recorder.phase('process', count):
+        prompts = [prompt for prompt in (process_prompt_document(doc) for doc in corpus) if prompt]
+    with recorder.phase('write', count):
+        write_gallery_files(prompts, sorted(set(p['category'] for p in prompts)),
+                            sorted(set(p['model'] for p in prompts)))
+
+def bench_benchmark(prompts_dir: Path, recorder: PhaseRecorder) -> None:
+    """The CPU-only evaluators; model calls, embeddings and token counts need services or downloads."""
+    from prompt_corpus import load_corpus
+    from benchmark_prompts import PromptBenchmark, STATIC_CRITERIA
+    with recorder.phase('load', 0):
+        corpus = load_corpus(str(prompts_dir))
+    count = len(corpus.paths)
+    recorder.phases[-1]['items'] = count
+    benchmark = PromptBenchmark(criteria=STATIC_CRITERIA)
+    with recorder.phase('evaluate', count):
+        for doc in corpus:
+            benchmark.results[str(doc.path)] = benchmark.evaluate_static(doc.content, doc.metadata or {})
+    with recorder.phase('report', count):
+        benchmark.generate_report('benchmark_report.json')
+
+BENCHMARKS: Dict[str, Callable[[Path, PhaseRecorder], None]] = {
+    'corpus': bench_corpus,
+    'validate': bench_validate,
+    'search': bench_search,
+    'gallery': bench_gallery,
+    'benchmark': bench_benchmark,
+}
+
+def worker(tool: str, prompts_dir: str) -> None:
+    """Run one tool's phases in this process and print them as JSON on the last line of stdout."""
+    recorder = PhaseRecorder()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        BENCHMARKS[tool](Path(prompts_dir), recorder)
+    print(json.dumps({'phases': recorder.phases, 'per_phase_rss': recorder.per_phase_rss}))
+
+def run_tool(tool: str, prompts_dir: Path, work_dir: Path, cache_dir: Path) -> Dict[str, Any]:
+    """One tool in a fresh interpreter, so its peak RSS is its own."""
+    env = dict(os.environ, PROMPT_CACHE_DIR=str(cache_dir), PYTHONPATH=os.pathsep.join(
+        filter(None, [str(SCRIPTS_DIR), os.environ.get('PYTHONPATH')])))
+    process = subprocess.run([sys.executable, str(SCRIPTS_DIR / 'scale_benchmark.py'), '--worker', tool,
+                              str(prompts_dir)], cwd=work_dir, env=env, capture_output=True, text=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"{tool} failed:\n{process.stderr.strip()}")
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+def run_suite(sizes: List[int], tools: List[str], seed: int = 0, repeat: int = 1) -> List[Dict[str, Any]]:
+    """
+    Every tool over a synthetic corpus of each size. Each repetition starts
+    from empty caches; the best wall time and the highest peak RSS are kept.
+    """
+    from synthetic_corpus import ensure_corpus
+    results = []
+    for size in sizes:
+        start = time.perf_counter()
+        prompts_dir = ensure_corpus(size, seed).resolve()
+        print(f"Corpus of {size} prompts ready in {time.perf_counter() - start:.1f}s: {prompts_dir}", file=sys.stderr)
+        best: Dict[tuple, Dict[str, Any]] = {}
+        for _ in range(repeat):
+            with tempfile.TemporaryDirectory(prefix='scale-benchmark-') as tmp:
+                work_dir = Path(tmp)
+                cache_dir = work_dir / 'cache'
+                # The corpus tool runs first and leaves the parse cache warm for the others
+                for tool in [tool for tool in TOOLS if tool in tools]:
+                    output = run_tool(tool, prompts_dir, work_dir, cache_dir)
+                    for phase in output['phases']:
+                        key = (tool, phase['phase'])
+                        entry = dict(phase, size=size, tool=tool, per_phase_rss=output['per_phase_rss'])
+                        if key not in best:
+                            best[key] = entry
+                        else:
+                            peak = max(best[key]['peak_rss_mb'], entry['peak_rss_mb'])
+                            if entry['wall'] < best[key]['wall']:
+                                best[key] = entry
+                            best[key]['peak_rss_mb'] = peak
+        for entry in best.values():
+            print(f"  {size:>7} {entry['tool']:<10} {entry['phase']:<14} {entry['wall'] * 1000:10.1f} ms"
+                  f"  {_rate(entry):>14}  {entry['peak_rss_mb']:8.1f} MB", file=sys.stderr)
+            results.append(entry)
+    return results
+
+def _rate(entry: Dict[str, Any]) -> str:
+    return f"{entry['throughput']:,.0f}/s" if entry.get('throughput') else '-'
+
+def result_key(entry: Dict[str, Any]) -> str:
+    return f"{entry['size']}/{entry['tool']}/{entry['phase']}"
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], tolerance: float, rss_tolerance: float,
+            min_wall: float = 0.05, min_rss: float = 10.0) -> List[str]:
+    """
+    Regressions against a baseline: wall time or peak RSS above the baseline by
+    more than the relative tolerance and by more than an absolute floor, so
+    millisecond phases and allocator noise do not trip the check.
+    """
+    regressions = []
+    stored = baseline.get('results', {})
+    for entry in results:
+        base = stored.get(result_key(entry))
+        if base is None:
+            continue
+        wall, base_wall = entry['wall'], base['wall']
+        if wall > base_wall * (1 + tolerance) and wall - base_wall > min_wall:
+            regressions.append(f"{result_key(entry)}: wall {base_wall * 1000:.1f} ms -> {wall * 1000:.1f} ms "
+                               f"(+{(wall / base_wall - 1) * 100:.0f}%)")
+        rss, base_rss = entry['peak_rss_mb'], base['peak_rss_mb']
+        if rss > base_rss * (1 + rss_tolerance) and rss - base_rss > min_rss:
+            regressions.append(f"{result_key(entry)}: peak RSS {base_rss:.1f} MB -> {rss:.1f} MB "
+                               f"(+{(rss / base_rss - 1) * 100:.0f}%)")
+    return regressions
+
+def make_baseline(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        'version': BASELINE_VERSION,
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'processor': platform.processor() or platform.machine(), 'cpus': os.cpu_count()},
+        'results': {result_key(entry): {'wall': entry['wall'], 'peak_rss_mb': entry['peak_rss_mb'],
+                                        'throughput': entry['throughput']} for entry in results}
+    }
+
+def parse_list(value: str, kind: Callable = str) -> List:
+    return [kind(item.strip()) for item in value.split(',') if item.strip()]
+
+def parse_sizes(value: str) -> List[int]:
+    sizes = []
+    for item in parse_list(value):
+        item = item.lower()
+        multiplier = 1000 if item.endswith('k') else 1
+        sizes.append(int(item.rstrip('k')) * multiplier)
+    return sizes
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--worker':
+        worker(sys.argv[2], sys.argv[3])
+        return
+
+    parser = argparse.ArgumentParser(
+        description='Measure the prompt tooling on synthetic corpora: wall time, throughput and peak RSS '
+                    'per tool and phase, optionally against a stored baseline')
+    parser.add_argument('--sizes', type=parse_sizes, default=DEFAULT_SIZES,
+                        help='Comma-separated corpus sizes, e.g. 1k,10k,100k (default: 1k,10k)')
+    parser.add_argument('--tools', type=parse_list, default=TOOLS, help=f"Comma-separated tools ({', '.join(TOOLS)})")
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic corpus')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='Runs per size; the best wall time is kept, which keeps the regression check stable')
+    parser.add_argument('-o', '--output', help='Write the measurements to this JSON file')
+    parser.add_argument('--baseline', help='Baseline JSON to compare against (or to write with --update-baseline)')
+    parser.add_argument('--update-baseline', action='store_true', help='Store these measurements as the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative wall-time increase')
+    parser.add_argument('--rss-tolerance', type=float, default=0.25, help='Allowed relative peak-RSS increase')
+    args = parser.parse_args()
+
+    unknown = [tool for tool in args.tools if tool not in TOOLS]
+    if unknown:
+        parser.error(f"unknown tools: {', '.join(unknown)} (choose from {', '.join(TOOLS)})")
+
+    try:
+        results = run_suite(args.sizes, args.tools, args.seed, args.repeat)
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'seed': args.seed, 'results': results}, f, indent=2)
+
+    if not args.baseline:
+        return
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        updated = make_baseline(results)
+        if baseline.get('version') == BASELINE_VERSION:
+            # Sizes and tools not measured this time keep their stored values
+            updated['results'] = {**baseline.get('results', {}), **updated['results']}
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(updated, f, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        return
+
+    try:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"Error: baseline {args.baseline} not found; create it with --update-baseline", file=sys.stderr)
+        sys.exit(2)
+    regressions = compare(results, baseline, args.tolerance, args.rss_tolerance)
+    missing = [result_key(entry) for entry in results if result_key(entry) not in baseline.get('results', {})]
+    if missing:
+        print(f"{len(missing)} measurements have no baseline yet", file=sys.stderr)
+    if regressions:
+        print("\nPerformance regressions:", file=sys.stderr)
+        for regression in regressions:
+            print(f"  {regression}", file=sys.stderr)
+        sys.exit(1)
+    print(f"No regressions against {args.baseline}", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
@@ -4,21 +4,30 @@
 import os
 import sys
 from pathlib import Path
-import frontmatter
 from typing import List, Dict, Optional, Set
 import argparse
 import fnmatch
+from prompt_corpus import PromptCorpus, PromptDocument, load_corpus
+from prompt_index import PromptIndex
+from text_index import WORD, fold
 
 class PromptSearcher:
-    def __init__(self):
-        self.prompts_dir = Path('prompts')
+    def __init__(self, corpus: Optional[PromptCorpus] = None):
+        self.prompts_dir = Path(corpus.root) if corpus is not None else Path('prompts')
         if not self.prompts_dir.exists():
             print(f"Error: Directory {self.prompts_dir} does not exist")
             sys.exit(1)
+        self.index = PromptIndex(self.prompts_dir)
+        # An already loaded corpus is filtered in memory instead of through the catalog
+        self.corpus = corpus
+
+    def reindex(self) -> Dict[str, int]:
+        """Build or incrementally refresh the SQLite catalog."""
+        return self.index.refresh()
 
     def find_prompt_files(self) -> List[Path]:
         """Find all prompt markdown files."""
-        return list(self.prompts_dir.glob('**/*.md'))
+        return [doc.path for doc in load_corpus(str(self.prompts_dir))]
 
     def matches_filename(self, filename: str, pattern: Optional[str]) -> bool:
         """Check if filename matches the search pattern."""
@@ -50,28 +59,102 @@ class PromptSearcher:
             return False
         return search_model.lower() in file_model.lower()
 
+    def matches_content(self, doc: PromptDocument, text: Optional[str]) -> bool:
+        """Check if every word of text occurs in the title, description or body, ignoring case and accents."""
+        if not text:
+            return True
+        metadata = doc.metadata or {}
+        words = set(WORD.findall(fold(' '.join([str(metadata.get('title', '')),
+                                                 str(metadata.get('description', '')), doc.content]))))
+        wanted = WORD.findall(fold(text))
+        return bool(wanted) and all(word in words for word in wanted)
+
+    def result(self, doc: PromptDocument) -> Dict:
+        """Search result entry of a prompt."""
+        metadata = doc.metadata if doc.metadata else {}
+        return {
+            'path': str(doc.path.relative_to(self.prompts_dir)),
+            'title': metadata.get('title', doc.path.stem),
+            'description': metadata.get('description', ''),
+            'tags': metadata.get('tags', []),
+            'prompt_type': metadata.get('prompt_type', ''),
+            'model': metadata.get('model', '')
+        }
+
+    def rank_prompts(self, query: str, limit: int = 10, **filters) -> List[Dict]:
+        """
+        The `limit` prompts most relevant to a free-text query by BM25 over
+        title, tags, description and body, among those passing the filters of
+        search_prompts. Each result carries its score.
+        """
+        from bm25_index import BM25Index
+        corpus = self.corpus if self.corpus is not None else load_corpus(str(self.prompts_dir))
+        index = BM25Index(self.prompts_dir)
+        index.refresh(corpus)
+        allowed = None
+        if any(filters.values()):
+            allowed = [result['path'] for result in self.search_prompts(**filters)]
+        results = []
+        for path, score in index.top(query, limit, allowed):
+            result = self.result(corpus.get(str(self.prompts_dir / path)))
+            result['score'] = round(score, 4)
+            results.append(result)
+        return results
+
+    def semantic_search(self, query: str, limit: int = 10, dtype: str = 'float32', **filters) -> List[Dict]:
+        """
+        The `limit` prompts closest in meaning to a free-text query, among
+        those passing the filters of search_prompts. Only the query goes
+        through the embedding model; each result carries its cosine similarity.
+        """
+        from semantic_index import SemanticIndex
+        corpus = self.corpus if self.corpus is not None else load_corpus(str(self.prompts_dir))
+        index = SemanticIndex(self.prompts_dir, dtype)
+        stats = index.refresh(corpus)
+        if stats['embedded']:
+            print(f"Embedded {stats['embedded']} prompts ({stats['reused']} unchanged)", file=sys.stderr)
+        allowed = None
+        if any(filters.values()):
+            allowed = [result['path'] for result in self.search_prompts(**filters)]
+        results = []
+        for path, score in index.search(index.embed(query), limit, allowed):
+            result = self.result(corpus.get(str(self.prompts_dir / path)))
+            result['score'] = round(score, 4)
+            results.append(result)
+        return results
+
     def search_prompts(self, 
                       filename: Optional[str] = None,
                       tags: Optional[List[str]] = None,
                       prompt_type: Optional[str] = None,
-                      model: Optional[str] = None) -> List[Dict]:
+                      model: Optional[str] = None,
+                      content: Optional[str] = None) -> List[Dict]:
         """
         Search prompts with the given filters.
+        Uses the catalog built by --reindex when available, refreshing it first
+        if any file was added, removed or modified; otherwise scans the files.
+        A searcher created with a loaded corpus filters it in memory instead.
         Returns list of matching prompts with their metadata and paths.
         """
+        if self.corpus is None and self.index.exists():
+            if not self.index.is_current():
+                self.reindex()
+            return self.index.search(filename=filename, tags=tags, prompt_type=prompt_type,
+                                     model=model, text=content)
+
         results = []
+        corpus = self.corpus if self.corpus is not None else load_corpus(str(self.prompts_dir))
+        for file_path, error in corpus.errors.items():
+            print(f"Error processing {file_path}: {error}", file=sys.stderr)
         
-        for file_path in self.find_prompt_files():
+        for doc in corpus:
+            file_path = doc.path
             try:
                 # Check filename first (fastest check)
                 if not self.matches_filename(file_path.name, filename):
                     continue
 
-                # Read and check metadata
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    post = frontmatter.load(f)
-                
-                metadata = post.metadata if post.metadata else {}
+                metadata = doc.metadata if doc.metadata else {}
                 
                 # Apply all filters
                 if not self.matches_tags(metadata.get('tags', []), tags):
@@ -83,16 +166,11 @@ class PromptSearcher:
                 if not self.matches_model(metadata.get('model', ''), model):
                     continue
 
+                if not self.matches_content(doc, content):
+                    continue
+
                 # If all filters pass, add to results
-                result = {
-                    'path': str(file_path.relative_to(self.prompts_dir)),
-                    'title': metadata.get('title', file_path.stem),
-                    'description': metadata.get('description', ''),
-                    'tags': metadata.get('tags', []),
-                    'prompt_type': metadata.get('prompt_type', ''),
-                    'model': metadata.get('model', '')
-                }
-                results.append(result)
+                results.append(self.result(doc))
 
             except Exception as e:
                 print(f"Error processing {file_path}: {e}", file=sys.stderr)
@@ -100,28 +178,63 @@ class PromptSearcher:
 
         return results
 
-def main():
+def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description='Search prompts with various filters')
     parser.add_argument('-n', '--name', help='Search by filename pattern')
     parser.add_argument('-t', '--tags', help='Search by tags (comma-separated)', type=lambda s: [t.strip() for t in s.split(',')])
     parser.add_argument('-p', '--prompt-type', help='Search by prompt type')
     parser.add_argument('-m', '--model', help='Search by model')
+    parser.add_argument('-c', '--content', help='Full-text search over title, description and body')
+    parser.add_argument('-q', '--query', help='Rank prompts by BM25 relevance to free text; combines with the filters')
+    parser.add_argument('-s', '--semantic', metavar='QUERY',
+                        help='Rank prompts by embedding similarity to free text; combines with the filters')
+    parser.add_argument('-l', '--limit', type=int, default=10, help='Number of ranked results for --query and --semantic')
     parser.add_argument('-j', '--json', action='store_true', help='Output in JSON format')
+    parser.add_argument('--reindex', action='store_true',
+                        help='Build or refresh the SQLite catalog; later searches run against it and keep it up to date')
+    serve = parser.add_argument_group('serve mode')
+    serve.add_argument('--serve', action='store_true',
+                       help='Keep the catalog in memory and answer JSON queries over HTTP, reloading on changes')
+    serve.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    serve.add_argument('--port', type=int, default=8766, help='Port to listen on')
+    serve.add_argument('--poll', type=float, default=1.0,
+                       help='Seconds between checks of the prompts directory for changes (0 disables reloading)')
+    serve.add_argument('--embeddings', metavar='MODEL',
+                       help='Load stored embeddings of this sentence-transformers model for /similar')
+    serve.add_argument('--embedding-dtype', choices=['float32', 'float16'], default='float32',
+                       help='Storage type of the embedding store (also used by --semantic)')
+    return parser
+
+def run(args: argparse.Namespace, corpus: Optional[PromptCorpus] = None) -> int:
+    """Run a search from parsed arguments and print the results; returns the exit code."""
+    if args.serve:
+        from search_server import serve
+        serve(args, corpus)
+        return 0
+    searcher = PromptSearcher(corpus)
+    if args.reindex:
+        stats = searcher.reindex()
+        print(f"Catalog updated: {stats['added']} added, {stats['updated']} updated, "
+              f"{stats['removed']} removed, {stats['unchanged']} unchanged", file=sys.stderr)
+        if not any([args.name, args.tags, args.prompt_type, args.model, args.content, args.query, args.semantic]):
+            return 0
     
-    args = parser.parse_args()
-    
-    # If no arguments provided, show help
-    if len(sys.argv) == 1:
-        parser.print_help()
-        sys.exit(1)
-    
-    searcher = PromptSearcher()
-    results = searcher.search_prompts(
+    filters = dict(
         filename=args.name,
         tags=args.tags,
         prompt_type=args.prompt_type,
-        model=args.model
+        model=args.model,
+        content=args.content
     )
+    if args.query and args.semantic:
+        print("Error: --query and --semantic are alternative rankings; give only one", file=sys.stderr)
+        return 2
+    if args.semantic:
+        results = searcher.semantic_search(args.semantic, args.limit, args.embedding_dtype, **filters)
+    elif args.query:
+        results = searcher.rank_prompts(args.query, args.limit, **filters)
+    else:
+        results = searcher.search_prompts(**filters)
     
     # Print results
     if args.json:
@@ -130,12 +243,24 @@ def main():
     else:
         print(f"\nFound {len(results)} matching prompts:\n")
         for result in results:
-            print(f"📄 {result['path']}")
+            print(f"📄 {result['path']}" + (f"  (score {result['score']:.2f})" if 'score' in result else ''))
             print(f"   Title: {result['title']}")
             print(f"   Type: {result['prompt_type']}")
             print(f"   Model: {result['model']}")
             print(f"   Tags: {', '.join(result['tags'])}")
             print()
+    return 0
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    
+    # If no arguments provided, show help
+    if len(sys.argv) == 1:
+        parser.print_help()
+        sys.exit(1)
+    
+    sys.exit(run(args))
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
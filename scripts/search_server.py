@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import json
+import time
+import fnmatch
+import asyncio
+import argparse
+from pathlib import Path
+from functools import partial
+from typing import List, Dict, Any, Optional, Set, Tuple
+from aiohttp import web
+from prompt_corpus import PromptCorpus, find_prompt_files, load_corpus
+from text_index import WORD, fold
+
+_dumps = partial(json.dumps, ensure_ascii=False, default=str)
+
+def directory_signature(root: Path) -> Tuple[tuple, ...]:
+    """(path, mtime_ns, size) of every prompt file; any edit, add or delete changes it."""
+    return tuple((path, stat.st_mtime_ns, stat.st_size) for path, stat in find_prompt_files(root))
+
+class CatalogSnapshot:
+    """
+    Read-only in-memory indexes over one load of the prompts directory. A new
+    snapshot is built for every change and swapped in whole, so a request
+    always sees one consistent catalog.
+    """
+
+    def __init__(self, corpus: PromptCorpus, generation: int = 0,
+                 embedding_model: Optional[str] = None, embedding_dtype: str = 'float32'):
+        self.root = Path(corpus.root)
+        self.generation = generation
+        self.loaded_at = time.time()
+        self.errors = dict(corpus.errors)
+        self.entries: List[Dict[str, Any]] = []
+        self.contents: List[str] = []
+        self.names: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.tags: Dict[str, Set[int]] = {}
+        self.types: Dict[str, Set[int]] = {}
+        self.models: Dict[str, Set[int]] = {}
+        self.words: Dict[str, Set[int]] = {}
+
+        for doc in corpus:
+            metadata = doc.metadata or {}
+            tags = metadata.get('tags', [])
+            entry = {
+                'path': str(doc.path.relative_to(self.root)),
+                'title': metadata.get('title', doc.path.stem),
+                'description': metadata.get('description', ''),
+                'tags': tags,
+                'prompt_type': metadata.get('prompt_type', ''),
+                'model': metadata.get('model', '')
+            }
+            i = len(self.entries)
+            self.entries.append(entry)
+            self.contents.append(doc.content)
+            self.names.append(doc.path.name.lower())
+            self.positions[entry['path']] = i
+            for tag in tags if isinstance(tags, list) else []:
+                self.tags.setdefault(str(tag).lower(), set()).add(i)
+            if entry['prompt_type']:
+                self.types.setdefault(str(entry['prompt_type']).lower(), set()).add(i)
+            if entry['model']:
+                self.models.setdefault(str(entry['model']).lower(), set()).add(i)
+            text = ' '.join([str(entry['title']), str(entry['description']), doc.content])
+            for word in set(WORD.findall(fold(text))):
+                self.words.setdefault(word, set()).add(i)
+
+        self.neighbours = self._load_neighbours(embedding_model, embedding_dtype) if embedding_model else None
+
+    def _load_neighbours(self, model_name: str, dtype: str):
+        """Nearest-neighbour index over the stored embeddings of the catalog's prompts, if any."""
+        from embedding_store import EmbeddingStore, text_key
+        from neighbour_index import NeighbourIndex
+        store = EmbeddingStore(model_name, dtype)
+        positions, _ = store.lookup([text_key(content) for content in self.contents])
+        present = [i for i, row in enumerate(positions) if row >= 0]
+        if not present:
+            print(f"No stored embeddings for {model_name}; /similar is disabled", file=sys.stderr)
+            return None
+        vectors = store.get([text_key(self.contents[i]) for i in present])
+        return NeighbourIndex([self.entries[i]['path'] for i in present], vectors)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def _substring(index: Dict[str, Set[int]], value: str) -> Set[int]:
+        # Few distinct types and models; a scan of the keys matches the CLI's substring filter
+        matched: Set[int] = set()
+        for key, ids in index.items():
+            if value in key:
+                matched |= ids
+        return matched
+
+    def search(self, name: Optional[str] = None, tags: Optional[List[str]] = None,
+               prompt_type: Optional[str] = None, model: Optional[str] = None,
+               content: Optional[str] = None) -> List[Dict[str, Any]]:
+        """The filters of PromptSearcher.search_prompts, answered from the in-memory indexes."""
+        sets = []
+        for tag in tags or []:
+            sets.append(self.tags.get(tag.lower(), set()))
+        if prompt_type:
+            sets.append(self._substring(self.types, prompt_type.lower()))
+        if model:
+            sets.append(self._substring(self.models, model.lower()))
+        if content:
+            words = WORD.findall(fold(content))
+            if not words:
+                return []
+            sets.extend(self.words.get(word, set()) for word in words)
+
+        if sets:
+            sets.sort(key=len)
+            candidates = set(sets[0]).intersection(*sets[1:])
+        else:
+            candidates = range(len(self.entries))
+        if name:
+            pattern = f'*{name.lower()}*'
+            candidates = [i for i in candidates if fnmatch.fnmatch(self.names[i], pattern)]
+        return [self.entries[i] for i in sorted(candidates)]
+
+    def facets(self) -> Dict[str, Dict[str, int]]:
+        return {
+            'tags': {tag: len(ids) for tag, ids in sorted(self.tags.items())},
+            'prompt_types': {name: len(ids) for name, ids in sorted(self.types.items())},
+            'models': {name: len(ids) for name, ids in sorted(self.models.items())}
+        }
+
+class CatalogService:
+    """Holds the current snapshot and rebuilds it when the prompts directory changes."""
+
+    def __init__(self, root: Path, corpus: Optional[PromptCorpus] = None, poll_interval: float = 1.0,
+                 embedding_model: Optional[str] = None, embedding_dtype: str = 'float32'):
+        self.root = Path(root)
+        self.poll_interval = poll_interval
+        self.embedding_model = embedding_model
+        self.embedding_dtype = embedding_dtype
+        self.signature = directory_signature(self.root)
+        self.snapshot = self._build(corpus if corpus is not None else load_corpus(str(self.root)), 0)
+        self._watcher: Optional[asyncio.Task] = None
+
+    def _build(self, corpus: PromptCorpus, generation: int) -> CatalogSnapshot:
+        return CatalogSnapshot(corpus, generation, self.embedding_model, self.embedding_dtype)
+
+    def _reload(self, generation: int) -> CatalogSnapshot:
+        # Only files whose mtime or size changed are re-read, through the corpus cache
+        return self._build(load_corpus(str(self.root)), generation)
+
+    async def watch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                signature = await loop.run_in_executor(None, directory_signature, self.root)
+                if signature == self.signature:
+                    continue
+                start = time.perf_counter()
+                snapshot = await loop.run_in_executor(None, self._reload, self.snapshot.generation + 1)
+                # One reference assignment: requests see the old or the new catalog, never a mix
+                self.snapshot = snapshot
+                self.signature = signature
+                print(f"Reloaded {len(snapshot)} prompts in {time.perf_counter() - start:.2f}s "
+                      f"(generation {snapshot.generation})", file=sys.stderr)
+            except Exception as e:
+                print(f"Error reloading prompts: {e}", file=sys.stderr)
+
+    async def on_startup(self, app: web.Application) -> None:
+        if self.poll_interval > 0:
+            self._watcher = asyncio.create_task(self.watch())
+
+    async def on_cleanup(self, app: web.Application) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+            try:
+                await self._watcher
+            except asyncio.CancelledError:
+                pass
+
+def _json(data: Any, status: int = 200) -> web.Response:
+    return web.json_response(data, status=status, dumps=_dumps)
+
+def build_app(service: CatalogService) -> web.Application:
+    """JSON endpoints mirroring search_prompts.py's filters."""
+
+    async def search(request: web.Request) -> web.Response:
+        snapshot = service.snapshot
+        query = request.query
+        start = time.perf_counter()
+        tags = [tag.strip() for tag in query['tags'].split(',')] if query.get('tags') else None
+        results = snapshot.search(name=query.get('name'), tags=tags, prompt_type=query.get('type'),
+                                  model=query.get('model'), content=query.get('content'))
+        count = len(results)
+        if query.get('limit'):
+            try:
+                limit = int(query['limit'])
+            except ValueError:
+                return _json({'error': 'limit must be an integer'}, status=400)
+            if limit < 1:
+                return _json({'error': 'limit must be at least 1'}, status=400)
+            results = results[:limit]
+        return _json({'count': count, 'results': results, 'generation': snapshot.generation,
+                      'took_ms': (time.perf_counter() - start) * 1000})
+
+    async def prompt(request: web.Request) -> web.Response:
+        snapshot = service.snapshot
+        i = snapshot.positions.get(request.match_info['path'])
+        if i is None:
+            return _json({'error': 'prompt not found'}, status=404)
+        return _json({**snapshot.entries[i], 'content': snapshot.contents[i]})
+
+    async def similar(request: web.Request) -> web.Response:
+        snapshot = service.snapshot
+        if snapshot.neighbours is None:
+            return _json({'error': 'embeddings not loaded; start the server with --embeddings MODEL'}, status=404)
+        path = request.query.get('path', '')
+        if path not in snapshot.neighbours.positions:
+            return _json({'error': 'no embedding for this prompt'}, status=404)
+        try:
+            k = int(request.query.get('k', 5))
+        except ValueError:
+            return _json({'error': 'k must be an integer'}, status=400)
+        if k < 1:
+            return _json({'error': 'k must be at least 1'}, status=400)
+        results = [{**snapshot.entries[snapshot.positions[other]], 'similarity': score}
+                   for other, score in snapshot.neighbours.neighbours(path, k)]
+        return _json({'path': path, 'results': results})
+
+    async def facets(request: web.Request) -> web.Response:
+        return _json(service.snapshot.facets())
+
+    async def health(request: web.Request) -> web.Response:
+        snapshot = service.snapshot
+        return _json({'prompts': len(snapshot), 'errors': snapshot.errors, 'generation': snapshot.generation,
+                      'loaded_at': snapshot.loaded_at, 'embeddings': snapshot.neighbours is not None})
+
+    app = web.Application()
+    app.router.add_get('/search', search)
+    app.router.add_get('/prompts/{path:.+}', prompt)
+    app.router.add_get('/similar', similar)
+    app.router.add_get('/facets', facets)
+    app.router.add_get('/health', health)
+    app.on_startup.append(service.on_startup)
+    app.on_cleanup.append(service.on_cleanup)
+    return app
+
+def serve(args: argparse.Namespace, corpus: Optional[PromptCorpus] = None, root: str = 'prompts') -> None:
+    """Run the search service until interrupted; args are search_prompts.py's serve-mode options."""
+    service = CatalogService(Path(corpus.root) if corpus is not None else Path(root), corpus, args.poll,
+                             args.embeddings, args.embedding_dtype)
+    print(f"Serving {len(service.snapshot)} prompts on http://{args.host}:{args.port} "
+          f"(/search, /prompts/<path>, /similar, /facets, /health)", file=sys.stderr)
+    web.run_app(build_app(service), host=args.host, port=args.port, print=None)
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import sys
+import argparse
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
+import yaml
+
+# Risk category (a SecurityRisk value) -> regular expressions
+DEFAULT_RISK_PATTERNS: Dict[str, List[str]] = {
+    'injection': [
+        r'system\s*prompt',
+        r'ignore\s*(previous|above)',
+        r'bypass',
+        r'override'
+    ],
+    'sensitive_data': [
+        r'api[_-]?key',
+        r'password',
+        r'secret',
+        r'token',
+        r'credential'
+    ],
+    'jailbreak': [
+        r'ignore\s*ethics',
+        r'ignore\s*rules',
+        r'unlimited\s*power',
+        r'no\s*restrictions'
+    ],
+    'unsafe_execution': [
+        r'execute\s*command',
+        r'run\s*shell',
+        r'system\s*call',
+        r'eval'
+    ]
+}
+
+@dataclass
+class SecurityMatch:
+    """One occurrence of a risk pattern."""
+    risk: str
+    pattern: str
+    start: int
+    end: int
+    line: int
+
+@dataclass
+class ScanResult:
+    """Every risk pattern occurrence in a text, in order of position."""
+    matches: List[SecurityMatch] = field(default_factory=list)
+    # Distinct (risk, pattern) pairs found, in pattern-definition order
+    patterns_found: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def risk_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for match in self.matches:
+            counts[match.risk] = counts.get(match.risk, 0) + 1
+        return counts
+
+# Constructs that depend on a pattern's own group numbering or that must open
+# the whole expression: inline global flags, backreferences, named groups and
+# conditionals. Patterns using them are scanned on their own.
+STANDALONE = re.compile(r'\\[1-9]|\(\?P[<=]|\(\?\(|\(\?[aiLmsux]+\)')
+
+class SecurityScanner:
+    """
+    All risk patterns compiled into one zero-width lookahead alternation, so a
+    text is scanned once for the positions where any pattern matches; only
+    there is each pattern tried. Matching is on the lowercased text, as the
+    per-pattern searches did, and every pattern reports the same matches its
+    own finditer would, overlapping other patterns' matches or not. Patterns
+    that cannot share the alternation (see STANDALONE) run their own finditer.
+    """
+
+    def __init__(self, patterns: Dict[str, List[str]]):
+        self.entries: List[Tuple[str, str]] = []
+        self.compiled: List[re.Pattern] = []
+        for risk, risk_patterns in patterns.items():
+            for pattern in risk_patterns:
+                self.compiled.append(re.compile(pattern))
+                self.entries.append((risk, pattern))
+        self.combined = [entry for entry, (_, pattern) in enumerate(self.entries) if not STANDALONE.search(pattern)]
+        self.regex = None
+        if self.combined:
+            alternation = '|'.join(f"(?:{self.entries[entry][1]})" for entry in self.combined)
+            try:
+                self.regex = re.compile(f"(?=(?:{alternation}))")
+            except re.error:
+                self.combined = []
+        combined = set(self.combined)
+        self.standalone = [entry for entry in range(len(self.entries)) if entry not in combined]
+        self._folded = None
+
+    def scan(self, text: str, lowered: Optional[str] = None) -> ScanResult:
+        """Scan text; pass text.lower() as lowered when it is already at hand."""
+        result = ScanResult()
+        if not self.entries:
+            return result
+        regex, compiled = self.regex, self.compiled
+        lowered = text.lower() if lowered is None else lowered
+        if len(lowered) != len(text):
+            # A few characters lowercase to two; match case-insensitively so spans stay valid
+            if self._folded is None:
+                self._folded = (re.compile(regex.pattern, re.IGNORECASE) if regex is not None else None,
+                                [re.compile(p.pattern, re.IGNORECASE) for p in compiled])
+            regex, compiled = self._folded
+            lowered = text
+
+        # Per pattern, where its next match may start: its own matches do not overlap
+        resume = [0] * len(compiled)
+        found = []
+        for candidate in regex.finditer(lowered) if regex is not None else ():
+            start = candidate.start()
+            for entry in self.combined:
+                if resume[entry] > start:
+                    continue
+                match = compiled[entry].match(lowered, start)
+                if match:
+                    found.append((start, entry, match.end()))
+                    resume[entry] = match.end() if match.end() > start else start + 1
+        if self.standalone:
+            for entry in self.standalone:
+                found.extend((match.start(), entry, match.end()) for match in compiled[entry].finditer(lowered))
+            found.sort()
+
+        seen = set()
+        line, position = 1, 0
+        for start, entry, end in found:
+            seen.add(entry)
+            risk, pattern = self.entries[entry]
+            # Matches come in order, so line numbers are counted incrementally
+            line += text.count('\n', position, start)
+            position = start
+            result.matches.append(SecurityMatch(risk, pattern, start, end, line))
+        result.patterns_found = [self.entries[entry] for entry in sorted(seen)]
+        return result
+
+def load_risk_patterns(config: Optional[Dict[str, Any]] = None) -> Dict[str, List[str]]:
+    """
+    Merge the default patterns with the `security` section of a benchmark config:
+    inline `patterns` and `pattern_packs` files, both mapping risk to regexes.
+    """
+    options = (config or {}).get('security') or {}
+    merged: Dict[str, List[str]] = {}
+    packs = []
+    if options.get('include_defaults', True):
+        packs.append(DEFAULT_RISK_PATTERNS)
+    for pack_file in options.get('pattern_packs') or []:
+        with open(pack_file, 'r', encoding='utf-8') as f:
+            packs.append(yaml.safe_load(f) or {})
+    packs.append(options.get('patterns') or {})
+
+    for pack in packs:
+        for risk, patterns in pack.items():
+            merged.setdefault(risk, [])
+            for pattern in patterns:
+                try:
+                    re.compile(pattern)
+                except (re.error, TypeError) as e:
+                    raise ValueError(f"Invalid {risk} security pattern {pattern!r}: {e}") from None
+                if pattern not in merged[risk]:
+                    merged[risk].append(pattern)
+    return merged
+
+_scanners: Dict[tuple, SecurityScanner] = {}
+
+def get_scanner(patterns: Dict[str, List[str]]) -> SecurityScanner:
+    """Compiled scanner for a pattern set, built once per process."""
+    key = tuple((risk, tuple(risk_patterns)) for risk, risk_patterns in patterns.items())
+    if key not in _scanners:
+        _scanners[key] = SecurityScanner(patterns)
+    return _scanners[key]
+
+def main():
+    parser = argparse.ArgumentParser(description='Scan prompt files for security risk patterns')
+    parser.add_argument('files', nargs='+', help='Files to scan')
+    parser.add_argument('-c', '--config', help='Benchmark YAML config with a security section')
+    parser.add_argument('--fail-on', type=lambda s: [r.strip() for r in s.split(',')],
+                        help='Comma-separated risk categories that fail the scan (default: all)')
+    args = parser.parse_args()
+
+    config = None
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f)
+    try:
+        scanner = get_scanner(load_risk_patterns(config))
+    except ValueError as e:
+        parser.error(str(e))
+
+    failed = False
+    for file_path in args.files:
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                result = scanner.scan(f.read())
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Error processing {file_path}: {e}", file=sys.stderr)
+            failed = True
+            continue
+        for match in result.matches:
+            if args.fail_on is None or match.risk in args.fail_on:
+                failed = True
+                print(f"{file_path}:{match.line}: {match.risk}: '{match.pattern}'")
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Tuple
+import numpy as np
+from prompt_corpus import PromptCorpus, cache_path
+from neighbour_index import top_k
+
+class SemanticIndex:
+    """
+    Embeddings of the catalog's prompts, one row per prompt in corpus order,
+    kept as a memory-mapped float32 .npy next to the other caches. A query is
+    embedded on its own and scored against every prompt with one matrix-vector
+    product. Rows of unchanged prompts are carried over on refresh; the others
+    come from the shared EmbeddingStore, or from the model when never embedded.
+    """
+
+    def __init__(self, prompts_dir: Path, dtype: str = 'float32'):
+        self.prompts_dir = Path(prompts_dir)
+        self.dtype = dtype
+        self.matrix_file = cache_path(self.prompts_dir, 'semantic', '.npy')
+        self.index_file = cache_path(self.prompts_dir, 'semantic', '.json')
+        self.paths: List[str] = []
+        self.shas: List[str] = []
+        self.matrix: Optional[np.ndarray] = None
+        self._analyzer = None
+
+    @property
+    def analyzer(self):
+        """PromptAnalyzer over the persistent store; the model itself loads on the first encode."""
+        if self._analyzer is None:
+            from benchmark_analysis import EMBEDDING_MODEL, PromptAnalyzer
+            from embedding_store import EmbeddingStore
+            self._analyzer = PromptAnalyzer(store=EmbeddingStore(EMBEDDING_MODEL, self.dtype))
+        return self._analyzer
+
+    @property
+    def model_name(self) -> str:
+        from benchmark_analysis import EMBEDDING_MODEL
+        return EMBEDDING_MODEL
+
+    def _read(self) -> bool:
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            matrix = np.load(self.matrix_file, mmap_mode='r')
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"Warning: ignoring unreadable semantic index {self.matrix_file}: {e}", file=sys.stderr)
+            return False
+        if index.get('model') != self.model_name or len(index['paths']) != matrix.shape[0]:
+            return False
+        self.paths, self.shas, self.matrix = index['paths'], index['shas'], matrix
+        return True
+
+    def _write(self, vectors: np.ndarray) -> None:
+        try:
+            self.matrix_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_matrix = self.matrix_file.with_suffix(f".{os.getpid()}.tmp.npy")
+            tmp_index = self.index_file.with_suffix(f".{os.getpid()}.tmp")
+            np.save(tmp_matrix, vectors)
+            with open(tmp_index, 'w', encoding='utf-8') as f:
+                json.dump({'model': self.model_name, 'paths': self.paths, 'shas': self.shas}, f)
+            os.replace(tmp_matrix, self.matrix_file)
+            os.replace(tmp_index, self.index_file)
+        except OSError as e:
+            print(f"Warning: could not write semantic index {self.matrix_file}: {e}", file=sys.stderr)
+            return
+        self.matrix = np.load(self.matrix_file, mmap_mode='r')
+
+    def refresh(self, corpus: PromptCorpus) -> Dict[str, int]:
+        """Bring the matrix in line with the corpus, embedding only prompts whose content hash changed."""
+        documents = list(corpus)
+        current = [(str(doc.path.relative_to(self.prompts_dir)), doc.sha) for doc in documents]
+        loaded = self._read()
+        if loaded and current == list(zip(self.paths, self.shas)):
+            return {'embedded': 0, 'reused': len(documents)}
+
+        previous = {key: row for row, key in enumerate(zip(self.paths, self.shas))} if loaded else {}
+        rows = np.array([previous.get(key, -1) for key in current], dtype=np.int64)
+        changed = np.flatnonzero(rows < 0)
+        kept = rows >= 0
+        if len(changed):
+            fresh = self.analyzer.encode_prompts([documents[i].content for i in changed])
+            dim = fresh.shape[1]
+        else:
+            dim = self.matrix.shape[1] if self.matrix is not None else 0
+        vectors = np.empty((len(documents), dim), dtype=np.float32)
+        if kept.any():
+            vectors[kept] = self.matrix[rows[kept]]
+        if len(changed):
+            vectors[changed] = fresh
+        self.paths = [path for path, _ in current]
+        self.shas = [sha for _, sha in current]
+        self._write(vectors)
+        from embedding_store import text_key
+        self.analyzer.store.retain(str(self.prompts_dir.resolve()), [text_key(doc.content) for doc in documents])
+        return {'embedded': len(changed), 'reused': len(documents) - len(changed)}
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def embed(self, text: str) -> np.ndarray:
+        """Unit-length embedding of a query; queries are not added to the store."""
+        vector = self.analyzer.model.encode([text], convert_to_numpy=True, normalize_embeddings=True)[0]
+        return np.asarray(vector, dtype=np.float32)
+
+    def search(self, query: np.ndarray, k: int = 10, allowed: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """The k prompts closest to a unit-length query vector, optionally only among allowed paths."""
+        if self.matrix is None or not len(self.paths):
+            return []
+        scores = self.matrix @ np.asarray(query, dtype=np.float32)
+        if allowed is not None:
+            allowed = set(allowed)
+            mask = np.fromiter((path in allowed for path in self.paths), dtype=bool, count=len(self.paths))
+            scores[~mask] = -np.inf
+            k = min(k, int(mask.sum()))
+        return [(self.paths[i], float(scores[i])) for i in top_k(scores, k)]
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import time
+import random
+import asyncio
+import argparse
+from typing import Tuple
+from aiohttp import web
+
+def build_app(latency: float = 0.5, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0) -> web.Application:
+    """OpenAI-style /v1/chat/completions endpoint that answers after a configurable delay."""
+    rng = random.Random(seed)
+
+    async def chat_completions(request: web.Request) -> web.Response:
+        payload = await request.json()
+        await asyncio.sleep(max(0.0, latency + rng.uniform(-jitter, jitter)))
+        if rng.random() < error_rate:
+            return web.json_response({'error': {'message': 'Simulated overload'}}, status=503)
+
+        prompt = ' '.join(message.get('content', '') for message in payload.get('messages', []))
+        prompt_tokens = len(prompt.split())
+        completion_tokens = min(payload.get('max_tokens', 500), max(1, prompt_tokens // 2))
+        return web.json_response({
+            'id': f"stub-{rng.getrandbits(32):08x}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': ' '.join(['token'] * completion_tokens)},
+                'finish_reason': 'stop'
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens
+            }
+        })
+
+    app = web.Application()
+    app.router.add_post('/v1/chat/completions', chat_completions)
+    return app
+
+async def start_stub_server(host: str = '127.0.0.1', port: int = 0, **options) -> Tuple[web.AppRunner, str]:
+    """Start the stub in the running event loop; returns the runner and its base URL."""
+    runner = web.AppRunner(build_app(**options))
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}/v1"
+
+def main():
+    parser = argparse.ArgumentParser(description='Local OpenAI-style chat stub for offline benchmarking')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.5, help='Seconds before each response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Random +/- seconds added to latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 503')
+    args = parser.parse_args()
+
+    print(f"Stub chat API on http://{args.host}:{args.port}/v1 (latency {args.latency}s)")
+    web.run_app(build_app(args.latency, args.jitter, args.error_rate), host=args.host, port=args.port, print=None)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import random
+import shutil
+import argparse
+from pathlib import Path
+from typing import Dict, Any, Optional
+import yaml
+from prompt_corpus import CACHE_DIR
+
+try:
+    from yaml import CSafeDumper as YAMLDumper
+except ImportError:
+    from yaml import SafeDumper as YAMLDumper
+
+# Bump when the generated text changes, so cached corpora are regenerated
+GENERATOR_VERSION = 1
+
+CATEGORIES = {
+    'developer': ['api', 'architecture', 'best-practices', 'frameworks', 'testing', 'devops'],
+    'content-creation': ['articles', 'blog', 'newsletter', 'seo', 'video', 'writing'],
+    'data': ['analysis', 'visualization', 'engineering'],
+    'education': ['courses', 'tutoring', 'assessment'],
+    'finance': ['investing', 'accounting'],
+    'health': ['fitness', 'nutrition'],
+    'legal': ['contracts', 'compliance'],
+    'product': ['management', 'design', 'research'],
+    'productivity': ['planning', 'habits'],
+    'art': ['filmmaking', 'music', 'coloring-book'],
+    'career': ['development', 'interviews'],
+    'academic': ['research', 'writing'],
+}
+
+# Roughly the catalog's mix of prompt types and models
+PROMPT_TYPES = ['Instruction-based prompting'] * 10 + ['Role-based prompting'] * 7 + [
+    'Chain-of-thought prompting', 'Template-based prompting', 'Generated knowledge prompting', 'Analysis Framework']
+MODELS = ['GPT-4'] * 18 + ['GPT-4 Turbo', 'Claude 3']
+
+TAGS = """
+python javascript typescript docker kubernetes devops api testing security performance architecture
+database sql analytics visualization machine-learning data-engineering writing blog seo marketing
+newsletter storytelling video education course tutoring assessment finance investing accounting
+health fitness nutrition legal contracts compliance product design research planning productivity
+career interview leadership communication documentation best-practices automation workflow tools
+ensino pesquisa negocios saude educacao produtividade
+""".split()
+
+WORDS = """
+the a of to and in for with on by as is are be this that each when how what use using your their
+prompt model response context output input user task step example variable format structure review
+analysis guide framework strategy plan code test data report content section detail quality goal
+clear concise specific relevant consistent complete accurate robust simple practical common key
+create define describe explain identify evaluate improve optimize organize summarize validate write
+project team process system service feature requirement constraint result metric source audience
+para com uma que dos das não também análise conteúdo prática informação usuário resposta exemplo
+""".split()
+
+# ASCII content words for titles and file names
+TOPIC_WORDS = [word for word in WORDS if word.isascii() and len(word) > 3]
+
+SECTIONS = ['purpose', 'context', 'instructions', 'variables', 'examples', 'notes']
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = ' '.join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+def _paragraph(rng: random.Random, size: int) -> str:
+    sentences = []
+    length = 0
+    while length < size:
+        sentence = _sentence(rng, rng.randint(6, 18))
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return ' '.join(sentences)
+
+def _list(rng: random.Random, size: int, numbered: bool) -> str:
+    items = []
+    length = 0
+    while length < size:
+        item = _sentence(rng, rng.randint(4, 12))
+        items.append(f"{len(items) + 1}. {item}" if numbered else f"- {item}")
+        length += len(items[-1]) + 1
+    return '\n'.join(items)
+
+def _section(rng: random.Random, name: str, size: int) -> str:
+    if name == 'instructions':
+        return _list(rng, size, numbered=True)
+    if name == 'variables':
+        count = max(1, size // 60)
+        return '\n'.join(f"- variable_{i + 1}: {_sentence(rng, rng.randint(4, 8))}" for i in range(count))
+    if name == 'notes':
+        return _list(rng, size, numbered=False)
+    if name == 'examples':
+        parts = []
+        for i in range(max(1, size // 200)):
+            parts.append(f"Example {i + 1}:\nInput: {_sentence(rng, 8)}\nOutput: {_paragraph(rng, 120)}")
+        return '\n\n'.join(parts)
+    return _paragraph(rng, size)
+
+def _body_size(rng: random.Random) -> int:
+    # Log-normal around the catalog's median of ~3 KB, with its long tail up to ~17 KB
+    return int(min(17000, max(200, rng.lognormvariate(8.0, 0.6))))
+
+def generate_prompt(number: int, seed: int = 0) -> Dict[str, Any]:
+    """
+    Metadata, body and relative path of synthetic prompt `number`. Each prompt
+    has its own generator, so the first n prompts are the same for every size.
+    """
+    rng = random.Random(seed * 1000003 + number)
+    category = rng.choice(sorted(CATEGORIES))
+    subcategory = rng.choice(CATEGORIES[category])
+    topic = ' '.join(rng.choice(TOPIC_WORDS) for _ in range(rng.randint(2, 4)))
+    title = topic.title()
+    slug = f"{topic.replace(' ', '-')}-{number}"
+    tag_count = rng.choice([3, 4, 5, 5, 5, 5, 5, 6, 7, 8])
+    metadata = {
+        'title': title,
+        'path': f"{category}/{subcategory}/{slug}",
+        'category': category.replace('-', ' ').title(),
+        'tags': [category, subcategory] + rng.sample(TAGS, tag_count - 2),
+        'description': _sentence(rng, rng.randint(14, 40)),
+        'prompt_type': rng.choice(PROMPT_TYPES),
+        'model': rng.choice(MODELS),
+        'version': '1.0',
+    }
+    size = _body_size(rng)
+    weights = [rng.uniform(0.5, 1.5) for _ in SECTIONS]
+    total = sum(weights)
+    if rng.random() < 0.2:
+        # Template layout: one XML-style block per section
+        body = '\n\n'.join(f"<{name}>\n{_section(rng, name, int(size * w / total))}\n</{name}>"
+                           for name, w in zip(SECTIONS, weights))
+    else:
+        body = f"# {title}\n\n" + '\n\n'.join(
+            f"## {name.title()}\n{_section(rng, name, int(size * w / total))}" for name, w in zip(SECTIONS, weights))
+    return {'path': f"{category}/{subcategory}/{slug}.md", 'metadata': metadata, 'content': body}
+
+def render_prompt(prompt: Dict[str, Any]) -> str:
+    """The prompt as a markdown file with YAML frontmatter, as fix_prompts writes them."""
+    frontmatter = yaml.dump(prompt['metadata'], Dumper=YAMLDumper, allow_unicode=True, sort_keys=True)
+    return f"---\n{frontmatter}---\n\n{prompt['content']}\n"
+
+def write_corpus(directory: Path, count: int, seed: int = 0) -> Path:
+    """Write `count` synthetic prompts under directory/prompts and return that prompts directory."""
+    prompts_dir = Path(directory) / 'prompts'
+    created = set()
+    for number in range(count):
+        prompt = generate_prompt(number, seed)
+        file_path = prompts_dir / prompt['path']
+        if file_path.parent not in created:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            created.add(file_path.parent)
+        file_path.write_text(render_prompt(prompt), encoding='utf-8')
+    return prompts_dir
+
+def ensure_corpus(count: int, seed: int = 0, directory: Optional[Path] = None) -> Path:
+    """
+    Prompts directory of a synthetic corpus, generated once and kept under
+    the cache directory; a marker file records a complete generation.
+    """
+    directory = Path(directory) if directory else CACHE_DIR / 'synthetic' / f"{count}-s{seed}-v{GENERATOR_VERSION}"
+    marker = directory / '.complete'
+    if marker.exists():
+        return directory / 'prompts'
+    if directory.exists():
+        shutil.rmtree(directory)
+    prompts_dir = write_corpus(directory, count, seed)
+    marker.touch()
+    return prompts_dir
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a deterministic synthetic prompt corpus')
+    parser.add_argument('directory', help='Output directory; prompts are written to DIRECTORY/prompts')
+    parser.add_argument('-n', '--count', type=int, default=1000, help='Number of prompts')
+    parser.add_argument('--seed', type=int, default=0, help='Seed; the same seed always gives the same corpus')
+    args = parser.parse_args()
+    prompts_dir = write_corpus(Path(args.directory), args.count, args.seed)
+    print(f"Wrote {args.count} prompts to {prompts_dir}", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
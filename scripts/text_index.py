@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import unicodedata
+from typing import List, Dict, Any, Iterable, Tuple
+
+INDEX_VERSION = 1
+
+# Portuguese and English function words, already accent-folded
+STOPWORDS = frozenset("""
+a ao aos as com como da das de do dos e em entre na nas no nos o os ou para pela pelas pelo pelos
+por que se sem sua suas seu seus um uma umas uns ser sao ja mais mas muito nao tambem este esta
+isso isto ele ela eles elas voce voces
+an and are as at be but by for from has have in into is it its of on or that the their this to was
+were will with you your
+""".split())
+
+# Weights of each field in a term's score; integers keep the postings compact
+FIELD_BOOSTS = {'title': 4, 'tags': 3, 'description': 2, 'content': 1}
+
+TOKEN = re.compile(r'[a-z0-9]+')
+# Words as SQLite FTS5's unicode61 tokenizer splits them: letters and digits, not underscores
+WORD = re.compile(r'[^\W_]+')
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents (ação -> acao), matching the folding extra.js applies to queries."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    if decomposed.isascii():
+        return decomposed.lower()
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+def tokenize(text: str) -> List[str]:
+    """Accent-folded terms of a text, without stopwords and one-letter tokens."""
+    return [term for term in TOKEN.findall(fold(text)) if len(term) > 1 and term not in STOPWORDS]
+
+def field_terms(fields: Dict[str, Any]) -> Dict[str, int]:
+    """Boosted term frequencies of one document over the weighted fields."""
+    weights: Dict[str, int] = {}
+    for field, boost in FIELD_BOOSTS.items():
+        value = fields.get(field) or ''
+        if isinstance(value, (list, tuple)):
+            value = ' '.join(str(item) for item in value)
+        for term in tokenize(str(value)):
+            weights[term] = weights.get(term, 0) + boost
+    return weights
+
+def delta_encode(values: Iterable[int]) -> List[int]:
+    """Sorted integers as the first value followed by successive gaps."""
+    encoded = []
+    previous = 0
+    for value in values:
+        encoded.append(value - previous)
+        previous = value
+    return encoded
+
+def build_client_index(documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Inverted index for the gallery's in-browser search. Documents are numbered
+    by their position in `documents`. Terms are sorted so the browser can
+    binary-search prefixes; each posting list holds delta-encoded document
+    numbers and the matching boosted term frequencies.
+    """
+    postings: Dict[str, Tuple[List[int], List[int]]] = {}
+    lengths = []
+    for number, fields in enumerate(documents):
+        weights = field_terms(fields)
+        lengths.append(sum(weights.values()))
+        for term, weight in weights.items():
+            numbers, tfs = postings.setdefault(term, ([], []))
+            numbers.append(number)
+            tfs.append(weight)
+
+    terms = sorted(postings)
+    return {
+        'version': INDEX_VERSION,
+        'documents': len(documents),
+        'average_length': sum(lengths) / len(lengths) if lengths else 0.0,
+        'lengths': lengths,
+        'boosts': FIELD_BOOSTS,
+        'stopwords': sorted(STOPWORDS),
+        'terms': terms,
+        'postings': [[delta_encode(postings[term][0]), postings[term][1]] for term in terms]
+    }
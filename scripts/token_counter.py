@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import re
+import math
+import base64
+import sqlite3
+from pathlib import Path
+from typing import List, Dict, Optional, Union
+from prompt_corpus import CACHE_DIR, content_hash
+
+# Local BPE vocabularies in tiktoken's format (one "base64-token rank" per line),
+# named <encoding>.tiktoken. cl100k_base and o200k_base are bundled in
+# scripts/vocab; nothing is ever downloaded.
+VOCAB_DIR = Path(os.environ.get('PROMPT_VOCAB_DIR', Path(__file__).parent / 'vocab'))
+
+# Model name prefix -> encoding, first match wins
+MODEL_ENCODINGS = [
+    ('gpt-4o', 'o200k_base'),
+    ('o1', 'o200k_base'),
+    ('gpt-4', 'cl100k_base'),
+    ('gpt-3.5', 'cl100k_base'),
+    ('claude-', 'claude'),
+    ('gemini-', 'gemini'),
+    ('llama-', 'llama'),
+    ('mixtral-', 'llama'),
+]
+DEFAULT_ENCODING = 'cl100k_base'
+
+# Tokens per cl100k-like token, for estimating encodings without a public vocabulary
+ESTIMATE_SCALE = {'cl100k_base': 1.0, 'claude': 1.1, 'gemini': 0.95, 'llama': 1.25}
+
+CL100K_PATTERN = (r"(?i:'s|'t|'re|'ve|'m|'ll|'d)|[^\r\n\p{L}\p{N}]?\p{L}+|\p{N}{1,3}|"
+                  r" ?[^\s\p{L}\p{N}]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+")
+
+O200K_PATTERN = (r"[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]*[\p{Ll}\p{Lm}\p{Lo}\p{M}]+(?i:'s|'t|'re|'ve|'m|'ll|'d)?|"
+                 r"[^\r\n\p{L}\p{N}]?[\p{Lu}\p{Lt}\p{Lm}\p{Lo}\p{M}]+[\p{Ll}\p{Lm}\p{Lo}\p{M}]*(?i:'s|'t|'re|'ve|'m|'ll|'d)?|"
+                 r"\p{N}{1,3}| ?[^\s\p{L}\p{N}]+[\r\n/]*|\s*[\r\n]+|\s+(?!\S)|\s+")
+
+# Pre-tokenization split of each bundled encoding
+ENCODING_PATTERNS = {'cl100k_base': CL100K_PATTERN, 'o200k_base': O200K_PATTERN}
+
+# The same split written for the re module: [^\W\d_] is a letter
+ESTIMATE_PATTERN = re.compile(r"'(?:s|t|re|ve|m|ll|d)|[^\r\n\w]?[^\W\d_]+|\d{1,3}|"
+                              r" ?[^\s\w]+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+", re.IGNORECASE)
+CJK = re.compile(r'[぀-ヿ㐀-䶿一-鿿가-힯]')
+
+def encoding_for(model: Union[str, object, None]) -> str:
+    """Encoding name for a model name or ModelType."""
+    name = getattr(model, 'value', model) or ''
+    for prefix, encoding in MODEL_ENCODINGS:
+        if name.startswith(prefix):
+            return encoding
+    return DEFAULT_ENCODING
+
+class BPETokenizer:
+    """Byte-level BPE over a local tiktoken-format vocabulary; counts only."""
+
+    def __init__(self, name: str, vocab_file: Path, pattern: str = CL100K_PATTERN):
+        import regex
+        self.name = name
+        self.estimated = False
+        self.ranks: Dict[bytes, int] = {}
+        with open(vocab_file, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    token, rank = line.split()
+                    self.ranks[base64.b64decode(token)] = int(rank)
+        self.pattern = regex.compile(pattern)
+        self._pieces: Dict[str, int] = {}
+
+    def _merge_count(self, piece: bytes) -> int:
+        parts = [piece[i:i + 1] for i in range(len(piece))]
+        while len(parts) > 1:
+            best = None
+            for i in range(len(parts) - 1):
+                rank = self.ranks.get(parts[i] + parts[i + 1])
+                if rank is not None and (best is None or rank < best[0]):
+                    best = (rank, i)
+            if best is None:
+                break
+            i = best[1]
+            parts[i:i + 2] = [parts[i] + parts[i + 1]]
+        return len(parts)
+
+    def count(self, text: str) -> int:
+        total = 0
+        pieces = self._pieces
+        for piece in self.pattern.findall(text):
+            count = pieces.get(piece)
+            if count is None:
+                data = piece.encode('utf-8')
+                count = 1 if data in self.ranks else self._merge_count(data)
+                pieces[piece] = count
+            total += count
+        return total
+
+class EstimatingTokenizer:
+    """
+    Estimate for model families without a public vocabulary (Claude, Gemini,
+    Llama), marked as estimated: the cl100k split, with long or non-ASCII
+    words, digits and symbol runs costing several tokens, CJK one per
+    character, scaled per model family.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.estimated = True
+        self.scale = ESTIMATE_SCALE.get(name, 1.0)
+        self._pieces: Dict[str, float] = {}
+
+    @staticmethod
+    def _estimate(piece: str) -> float:
+        word = piece.strip()
+        if not word:
+            return 1.0
+        if CJK.search(word):
+            return float(len(word))
+        if word[-1].isalpha():
+            if word.isascii():
+                return 1.0 if len(word) <= 7 else math.ceil(len(word) / 4)
+            return math.ceil(len(word) / 3)
+        if word.isdigit():
+            return 1.0
+        return math.ceil(len(word) / 2)
+
+    def count(self, text: str) -> int:
+        total = 0.0
+        pieces = self._pieces
+        for piece in ESTIMATE_PATTERN.findall(text):
+            count = pieces.get(piece)
+            if count is None:
+                count = pieces[piece] = self._estimate(piece)
+            total += count
+        return round(total * self.scale)
+
+_tokenizers: Dict[str, Union[BPETokenizer, EstimatingTokenizer]] = {}
+
+def get_tokenizer(encoding: str, vocab_dir: Optional[Path] = None):
+    """Tokenizer for an encoding: BPE when its vocabulary is bundled, else the estimate."""
+    if encoding not in _tokenizers:
+        vocab_file = Path(vocab_dir or VOCAB_DIR) / f"{encoding}.tiktoken"
+        if vocab_file.exists():
+            _tokenizers[encoding] = BPETokenizer(encoding, vocab_file, ENCODING_PATTERNS.get(encoding, CL100K_PATTERN))
+        else:
+            _tokenizers[encoding] = EstimatingTokenizer(encoding)
+    return _tokenizers[encoding]
+
+class TokenCounter:
+    """
+    Prompt token counts per model family, cached by content hash in memory and
+    in SQLite, so the catalog is tokenized once per encoding.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None, vocab_dir: Optional[Path] = None):
+        self.db_path = Path(db_path) if db_path else CACHE_DIR / 'token_counts.sqlite'
+        self.vocab_dir = vocab_dir
+        self._memory: Dict[tuple, int] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path))
+            self._conn.execute("CREATE TABLE IF NOT EXISTS token_counts ("
+                               "encoding TEXT NOT NULL, key TEXT NOT NULL, count INTEGER NOT NULL, "
+                               "PRIMARY KEY (encoding, key))")
+        return self._conn
+
+    def tokenizer(self, model=None):
+        return get_tokenizer(encoding_for(model), self.vocab_dir)
+
+    def _cache_name(self, tokenizer) -> str:
+        # Estimates and real counts never share cache entries
+        return f"{tokenizer.name}~estimate" if tokenizer.estimated else tokenizer.name
+
+    def count_batch(self, texts: List[str], model=None) -> List[int]:
+        """Token counts for many texts, reading and filling the cache in bulk."""
+        tokenizer = self.tokenizer(model)
+        name = self._cache_name(tokenizer)
+        keys = [content_hash(text.encode('utf-8')) for text in texts]
+        missing = list(dict.fromkeys(key for key in keys if (name, key) not in self._memory))
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT key, count FROM token_counts WHERE encoding = ? AND key IN ({','.join('?' * len(chunk))})",
+                [name] + chunk).fetchall()
+            for key, count in rows:
+                self._memory[(name, key)] = count
+
+        new_rows = []
+        for text, key in zip(texts, keys):
+            if (name, key) not in self._memory:
+                count = tokenizer.count(text)
+                self._memory[(name, key)] = count
+                new_rows.append((name, key, count))
+        if new_rows:
+            with self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO token_counts (encoding, key, count) VALUES (?, ?, ?)",
+                                      new_rows)
+        return [self._memory[(name, key)] for key in keys]
+
+    def count(self, text: str, model=None) -> int:
+        return self.count_batch([text], model)[0]
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
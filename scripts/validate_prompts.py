@@ -3,10 +3,9 @@
 
 import os
 import sys
-import glob
 from pathlib import Path
-import frontmatter
 from typing import List, Dict, Optional
+from prompt_corpus import PromptCorpus, PromptDocument, load_corpus, load_prompt
 
 REQUIRED_FIELDS = {
     'title': str,
@@ -33,9 +32,21 @@ class PromptValidator:
     def validate_prompt_file(self, file_path: str) -> bool:
         """Validate a single prompt file."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                post = frontmatter.load(f)
-            
+            post = load_prompt(file_path)
+        except Exception as e:
+            return self.record_load_error(file_path, str(e))
+        return self.validate_document(post)
+
+    def record_load_error(self, file_path: str, error: str) -> bool:
+        """Record a file that could not be read or parsed."""
+        self.errors[file_path] = [f"Erro ao processar arquivo: {error}"]
+        self.invalid_count += 1
+        return False
+
+    def validate_document(self, post: PromptDocument) -> bool:
+        """Validate an already loaded prompt document."""
+        file_path = str(post.path)
+        try:
             file_errors = []
             file_warnings = []
             
@@ -70,27 +81,28 @@ class PromptValidator:
             return len(file_errors) == 0
 
         except Exception as e:
-            self.errors[file_path] = [f"Erro ao processar arquivo: {str(e)}"]
-            self.invalid_count += 1
-            return False
-
-    def find_and_validate_prompts(self) -> bool:
-        """Find and validate all prompt files."""
-        prompts_dir = Path('prompts')
-        if not prompts_dir.exists():
-            print(f"❌ Erro: Diretório {prompts_dir} não encontrado")
-            return False
-
-        files = glob.glob(str(prompts_dir / '**/*.md'), recursive=True)
-        if not files:
+            return self.record_load_error(file_path, str(e))
+
+    def find_and_validate_prompts(self, corpus: Optional[PromptCorpus] = None) -> bool:
+        """Find and validate all prompt files, or those of an already loaded corpus."""
+        if corpus is None:
+            prompts_dir = Path('prompts')
+            if not prompts_dir.exists():
+                print(f"❌ Erro: Diretório {prompts_dir} não encontrado")
+                return False
+            corpus = load_corpus(str(prompts_dir))
+
+        if not corpus.paths:
             print("❌ Erro: Nenhum arquivo de prompt encontrado")
             return False
 
-        print(f"\n🔍 Validando {len(files)} arquivos de prompt...\n")
+        print(f"\n🔍 Validando {len(corpus.paths)} arquivos de prompt...\n")
         
         all_valid = True
-        for file_path in files:
-            is_valid = self.validate_prompt_file(file_path)
+        for file_path, error in corpus.errors.items():
+            all_valid = self.record_load_error(file_path, error) and all_valid
+        for post in corpus:
+            is_valid = self.validate_document(post)
             all_valid = all_valid and is_valid
 
         return all_valid
@@ -119,25 +131,29 @@ class PromptValidator:
                 for warning in warnings:
                     print(f"  • {warning}")
 
-def main():
-    """Main function to run the validation."""
+def run(corpus: Optional[PromptCorpus] = None) -> int:
+    """Validate every prompt and print the report; returns the exit code."""
     try:
         validator = PromptValidator()
-        all_valid = validator.find_and_validate_prompts()
+        all_valid = validator.find_and_validate_prompts(corpus)
         validator.print_report()
         
         if not all_valid:
             print("\n❌ Validação falhou! Corrija os erros acima.")
-            sys.exit(1)
+            return 1
         else:
             print("\n✅ Todos os prompts são válidos!")
             if validator.warnings:
                 print("⚠️  Há alguns avisos que podem ser revisados.")
-            sys.exit(0)
+            return 0
     
     except Exception as e:
         print(f"\n❌ Erro durante a validação: {str(e)}")
-        sys.exit(1)
+        return 1
+
+def main():
+    """Main function to run the validation."""
+    sys.exit(run())
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file